@@ -1,2 +1,7 @@
-from .main import app
-
+def __getattr__(name: str):
+    # Resolved lazily so importing a submodule (e.g. in a spawned password-hashing
+    # worker) doesn't pull in the whole app: FastAPI, Firestore, pandas, PIL
+    if name == "app":
+        from .main import app
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -12,11 +12,27 @@ class Settings(BaseSettings):
     jwt_secret: str = "change-me"
     jwt_algorithm: str = "HS256"
     jwt_exp_days: int = 7
+    token_cache_size: int = 10000
+    revocation_sync_seconds: int = 15
+
+    bcrypt_rounds: int = 12
+    password_pool_size: int = 2
+    password_queue_depth: int = 32
+    password_retry_after: int = 2
+    # Fall back to an `in` query over raw phoneNumber spellings until phoneE164 is backfilled
+    phone_lookup_legacy_fallback: bool = True
 
     firebase_credentials: str | None = None
     firebase_storage_bucket: str | None = None
+    firestore_max_workers: int = 32
 
     balance_encryption_key: str = "change-me-2"
+    wallet_txn_attempts: int = 10
+    wallet_default_shards: int = 10
+    # Legacy embedded transaction lists at least this long are analysed column-wise. Measured with
+    # scripts/bench_wallet_analytics.py at the route's limit (50 and 500): even at ~4k rows, 1.2x at 5k, 2.3x at 10k
+    columnar_analytics_min_rows: int = 5000
+    export_chunk_size: int = 500
 
     blockchain_enabled: bool = False
     web3_rpc_url: str | None = None
@@ -24,7 +40,51 @@ class Settings(BaseSettings):
 
     openai_api_key: str | None = None
 
+    cache_backend: str = "memory"  # memory | redis | fakeredis
+    redis_url: str = "redis://localhost:6379/0"
+    entity_cache_size: int = 10000
+    entity_cache_ttl: int = 60
+
+    compression_encodings: str = "br,zstd,gzip"  # server preference; br/zstd need their packages
+    compression_min_bytes: int = 1024
+
+    task_concurrency: int = 4
+    task_max_attempts: int = 3
+    task_backoff_seconds: float = 2.0
+    task_lock_ttl_seconds: int = 600
+    task_drain_seconds: float = 25.0
+
+    job_index_sync_seconds: int = 30
+    heatmap_tile_days: int = 120
+    heatmap_tile_sync_seconds: int = 30
+    trend_bucket_seconds: int = 3600
+    trend_buckets: int = 336
+    trend_half_life_buckets: float = 72.0
+    trend_snapshot_seconds: int = 300
+    trend_snapshot_path: Path = Path("/workspace/python-backend/snapshots/trends.pickle")
+
+    leaderboard_sync_seconds: int = 15
+    leaderboard_snapshot_seconds: int = 300
+    leaderboard_snapshot_path: Path = Path("/workspace/python-backend/snapshots/leaderboards.pickle")
+
     uploads_dir: Path = Path("/workspace/python-backend/uploads")
+    profile_image_max_bytes: int = 10 * 1024 * 1024
+    image_max_pixels: int = 40_000_000
+    image_quality: int = 82
+    image_workers: int = 2
+    upload_chunk_bytes: int = 64 * 1024
+    upload_staging_dir: Path = Path("/workspace/python-backend/uploads_staging")
+    chat_audio_max_bytes: int = 15 * 1024 * 1024
+    chat_image_max_bytes: int = 10 * 1024 * 1024
+
+    storage_backend: str = "gcs"  # gcs | filesystem
+    storage_emulator_host: str | None = None
+    storage_fs_root: Path = Path("/workspace/python-backend/bucket")
+    storage_pool_size: int = 32
+    storage_resumable_threshold: int = 8 * 1024 * 1024
+    storage_chunk_bytes: int = 8 * 1024 * 1024  # must be a multiple of 256 KiB
+    signed_url_ttl_seconds: int = 7 * 24 * 3600
+    signed_url_cache_size: int = 10000
 
     class Config:
         env_file = ".env"
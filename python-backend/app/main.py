@@ -1,13 +1,46 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.middleware.gzip import GZipMiddleware
 from starlette.middleware.sessions import SessionMiddleware
 from .config import settings
-from fastapi.staticfiles import StaticFiles
+from .middleware.compression import CompressionMiddleware
+from .services.async_repos import run_blocking, shutdown_executor
+from .services.passwords import shutdown_pool
+from .services import images
+from .services import geo, leaderboard, revocations, tiles, trends
+from .services.tasks import runner
+from .utils.responses import ORJSONResponse
+from .utils.static_files import ImmutableStaticFiles
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Restore the trend window before the job feed starts replaying into it
+    await run_blocking(trends.engine.load_snapshot, settings.trend_snapshot_path)
+    revocation_sync = asyncio.create_task(revocations.sync_forever())
+    leaderboard_sync = asyncio.create_task(leaderboard.sync_forever())
+    job_index_sync = asyncio.create_task(geo.sync_forever())
+    tile_sync = asyncio.create_task(tiles.sync_forever())
+    trend_snapshots = asyncio.create_task(trends.snapshot_forever())
+    await runner.start()
+    yield
+    await runner.drain(settings.task_drain_seconds)
+    for background in (revocation_sync, leaderboard_sync, job_index_sync, tile_sync, trend_snapshots):
+        background.cancel()
+        with suppress(asyncio.CancelledError):
+            await background
+    if leaderboard.leaderboards.synced_at is not None:
+        await run_blocking(leaderboard.leaderboards.save_snapshot, settings.leaderboard_snapshot_path)
+    if len(trends.engine):
+        await run_blocking(trends.engine.save_snapshot, settings.trend_snapshot_path)
+    shutdown_pool()
+    images.shutdown_pool()
+    shutdown_executor()
 
 
 def create_app() -> FastAPI:
-    app = FastAPI(title=settings.app_name)
+    app = FastAPI(title=settings.app_name, lifespan=lifespan, default_response_class=ORJSONResponse)
 
     app.add_middleware(
         CORSMiddleware,
@@ -16,11 +49,11 @@ def create_app() -> FastAPI:
         allow_methods=["*"],
         allow_headers=["*"],
     )
-    app.add_middleware(GZipMiddleware, minimum_size=1024)
+    app.add_middleware(CompressionMiddleware, minimum_size=settings.compression_min_bytes)
     app.add_middleware(SessionMiddleware, secret_key=settings.jwt_secret)
 
     # Routers will be included below to match Flutter ApiService endpoints
-    from .routers import auth, user, wallet, ai, heatmap, chatbot, credit_score, gamification, savings, profile_image, cybersecurity
+    from .routers import auth, user, wallet, ai, heatmap, chatbot, credit_score, gamification, savings, profile_image, cybersecurity, tasks
 
     app.include_router(auth.router, prefix=settings.api_prefix + "/auth", tags=["auth"])
     app.include_router(user.router, prefix=settings.api_prefix + "/user", tags=["user"])
@@ -33,11 +66,12 @@ def create_app() -> FastAPI:
     app.include_router(savings.router, prefix=settings.api_prefix + "/savings", tags=["savings"])
     app.include_router(profile_image.router, prefix=settings.api_prefix + "/profile-image", tags=["profile-image"])
     app.include_router(cybersecurity.router, prefix=settings.api_prefix + "/cybersecurity", tags=["cybersecurity"])
+    app.include_router(tasks.router, prefix=settings.api_prefix + "/tasks", tags=["tasks"])
 
-    # Static files for uploaded profile images
+    # Static files for uploaded profile images (content-addressed, cached immutably)
     app.mount(
         "/uploads/profile-images",
-        StaticFiles(directory=str(settings.uploads_dir)),
+        ImmutableStaticFiles(directory=str(settings.uploads_dir)),
         name="profile-images",
     )
 
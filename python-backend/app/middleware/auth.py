@@ -1,19 +1,58 @@
 from __future__ import annotations
+import hashlib
 from typing import Optional
 from fastapi import Header, HTTPException
 from jose import jwt
 from ..config import settings
+from ..services import revocations
+from ..services.cache import LRUCache
+
+
+# Verified claims keyed by token hash, each entry expiring with the token itself
+_verified = LRUCache(maxsize=settings.token_cache_size)
+
+
+def token_key(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def decode_token(token: str) -> dict:
+    """Decode and verify a JWT, serving repeat presentations from the verified-token cache."""
+    key = token_key(token)
+    if revocations.is_revoked(key):
+        raise HTTPException(status_code=401, detail={"success": False, "message": "Token revoked", "code": "TOKEN_REVOKED"})
+    payload = _verified.get(key)
+    if payload is None:
+        payload = jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
+        if payload.get("exp") is not None:
+            _verified.set(key, payload, expires_at=float(payload["exp"]))
+    return payload
+
+
+def revoke_token(token: str) -> None:
+    key = token_key(token)
+    payload = _verified.get(key)
+    if payload is None:
+        payload = jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
+    _verified.delete(key)
+    revocations.revoke(key, float(payload.get("exp") or 0))
+
+
+def bearer_token(authorization: Optional[str]) -> str:
+    scheme, token = authorization.split(" ", 1)
+    if scheme.lower() != "bearer":
+        raise ValueError("Invalid scheme")
+    return token
 
 
 async def get_current_user(authorization: Optional[str] = Header(default=None)) -> dict:
     if not authorization:
         raise HTTPException(status_code=401, detail={"success": False, "message": "Access token required", "code": "NO_TOKEN"})
     try:
-        scheme, token = authorization.split(" ", 1)
-        if scheme.lower() != "bearer":
-            raise ValueError("Invalid scheme")
-        payload = jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
+        payload = decode_token(bearer_token(authorization))
         return {"userId": payload.get("userId", "")}
+    except HTTPException:
+        raise
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail={"success": False, "message": "Token expired", "code": "TOKEN_EXPIRED"})
     except Exception:
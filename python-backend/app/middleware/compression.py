@@ -0,0 +1,88 @@
+from __future__ import annotations
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from ..utils import compression
+
+
+class CompressionMiddleware:
+    """Negotiated br / zstd / gzip response compression, replacing GZipMiddleware.
+
+    Responses that already carry Content-Encoding (cached precompressed bodies),
+    incompressible media and bodies under `minimum_size` pass through untouched.
+    Streamed bodies are compressed incrementally, chunk by chunk.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = compression.negotiate(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await _Responder(self.app, encoding, self.minimum_size)(scope, receive, send)
+
+
+class _Responder:
+    def __init__(self, app: ASGIApp, encoding: str, minimum_size: int) -> None:
+        self.app = app
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.send: Send
+        self.start: Message = {}
+        self.passthrough = False
+        self.started = False
+        self.stream: compression.StreamCompressor | None = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    async def send_compressed(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # Hold the start message until the first body chunk shows how to encode
+            self.start = message
+            headers = Headers(raw=message["headers"])
+            self.passthrough = "content-encoding" in headers or not compression.compressible(headers.get("content-type"))
+            return
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+        if self.passthrough:
+            if not self.started:
+                self.started = True
+                await self.send(self.start)
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if not self.started:
+            self.started = True
+            headers = MutableHeaders(raw=self.start["headers"])
+            if not more_body:
+                if len(body) < self.minimum_size:
+                    await self.send(self.start)
+                    await self.send(message)
+                    return
+                body = compression.compress(self.encoding, body)
+                headers["content-length"] = str(len(body))
+            else:
+                self.stream = compression.StreamCompressor(self.encoding)
+                body = self.stream.compress(body)
+                del headers["content-length"]
+            headers["content-encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            await self.send(self.start)
+            await self.send({"type": "http.response.body", "body": body, "more_body": more_body})
+            return
+
+        if self.stream is None:
+            await self.send(message)
+            return
+        body = self.stream.compress(body) if more_body else self.stream.compress(body) + self.stream.finish()
+        await self.send({"type": "http.response.body", "body": body, "more_body": more_body})
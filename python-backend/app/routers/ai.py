@@ -2,6 +2,7 @@ from __future__ import annotations
 from fastapi import APIRouter, Depends
 from datetime import datetime, timedelta
 from ..middleware.auth import get_current_user
+from ..utils.response_cache import cached_response
 
 router = APIRouter()
 
@@ -40,6 +41,7 @@ async def insights(period: int = 30, user=Depends(get_current_user)):
 
 
 @router.get('/market-trends')
+@cached_response(ttl=300)
 async def market_trends(period: int = 30, location: str | None = None, user=Depends(get_current_user)):
     trends = {
         'jobTrends': {},
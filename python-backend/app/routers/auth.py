@@ -1,10 +1,18 @@
+import asyncio
 from datetime import datetime, timedelta
-from fastapi import APIRouter, HTTPException
+from typing import Optional
+from fastapi import APIRouter, Header, HTTPException
 from pydantic import BaseModel, EmailStr
 from jose import jwt
+from google.api_core.exceptions import AlreadyExists
+from google.cloud.firestore import DELETE_FIELD
 from ..config import settings
 from ..services.firebase import get_db
-from ..services.repos import UsersRepo, WalletsRepo, CreditRepo
+from ..utils.ids import new_id
+from ..utils.phone import to_e164, phone_variants
+from ..middleware.auth import bearer_token, revoke_token
+from ..services.async_repos import AsyncUsersRepo, run_blocking
+from ..services import passwords
 
 
 router = APIRouter()
@@ -38,20 +46,38 @@ def issue_token(user_id: str, days: int | None = None) -> str:
     return jwt.encode(payload, settings.jwt_secret, algorithm=settings.jwt_algorithm)
 
 
+def _auth_busy() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail={"success": False, "message": "Authentication service busy, please retry", "code": "AUTH_BUSY"},
+        headers={"Retry-After": str(settings.password_retry_after)},
+    )
+
+
 @router.post("/register")
-def register(req: RegisterRequest):
+async def register(req: RegisterRequest):
     if get_db() is None:
         raise HTTPException(status_code=503, detail={"success": False, "message": "Firebase unavailable", "code": "FIREBASE_UNAVAILABLE"})
 
-    # Check existing
-    if UsersRepo.find_by_email(req.email) or UsersRepo.find_by_phone(req.phoneNumber):
+    # Uniqueness checks and password hashing run concurrently (one round trip)
+    phone_e164 = to_e164(req.phoneNumber)
+    lookups = [AsyncUsersRepo.find_by_email(req.email)]
+    if phone_e164:
+        lookups.append(AsyncUsersRepo.find_by_phone_e164(phone_e164))
+    if settings.phone_lookup_legacy_fallback:
+        lookups.append(AsyncUsersRepo.find_by_phone_variants(phone_variants(req.phoneNumber)))
+    try:
+        password_hash, *existing = await asyncio.gather(passwords.hash_password(req.password), *lookups)
+    except passwords.PasswordPoolSaturated:
+        raise _auth_busy()
+    if any(existing):
         raise HTTPException(status_code=400, detail={"success": False, "message": "Email or phone already registered", "code": "USER_EXISTS"})
 
-    user_id = f"user_{int(datetime.utcnow().timestamp())}"
+    user_id = new_id("user")
     user_doc = {
         "email": req.email.lower(),
         "phoneNumber": req.phoneNumber,
-        "passwordHash": UsersRepo.hash_password(req.password),
+        "passwordHash": password_hash,
         "fullName": req.fullName,
         "location": req.location,
         "skills": req.skills or [],
@@ -65,11 +91,11 @@ def register(req: RegisterRequest):
         "lastActive": None,
         "isVerified": False,
     }
-    UsersRepo.create_user(user_id, user_doc)
-
-    # Initialize wallet and credit score
-    WalletsRepo.get_or_create(user_id)
-    CreditRepo.get_or_create(user_id)
+    # User, wallet and credit score in a single batched write (second round trip)
+    try:
+        await AsyncUsersRepo.register(user_id, user_doc)
+    except AlreadyExists:
+        raise HTTPException(status_code=400, detail={"success": False, "message": "Email or phone already registered", "code": "USER_EXISTS"})
 
     token = issue_token(user_id)
     user_public = {"userId": user_id, "email": req.email.lower(), "fullName": req.fullName}
@@ -81,7 +107,7 @@ def register(req: RegisterRequest):
 
 
 @router.post("/login")
-def login(req: LoginRequest):
+async def login(req: LoginRequest):
     if get_db() is None:
         raise HTTPException(status_code=503, detail={"success": False, "message": "Firebase unavailable", "code": "FIREBASE_UNAVAILABLE"})
     if not req.password:
@@ -93,47 +119,34 @@ def login(req: LoginRequest):
     phone_norm = str(req.phoneNumber).strip() if req.phoneNumber else None
 
     if email_norm:
-        user_doc = UsersRepo.find_by_email(email_norm)
+        user_doc = await AsyncUsersRepo.find_by_email(email_norm)
     elif phone_norm:
-        # Try multiple reasonable variants to tolerate past formatting
-        variants: list[str] = []
-        raw = phone_norm.replace(" ", "").replace("-", "")
-        variants.append(raw)
-        # Ensure leading '+' for common country codes if missing
-        if raw.startswith("254") and not raw.startswith("+254"):
-            variants.append("+" + raw)
-        if raw.startswith("27") and not raw.startswith("+27"):
-            variants.append("+" + raw)
-        # Kenya: remove trunk '0' after country code (e.g., +2540xxxx -> +254xxxx)
-        if raw.startswith("+2540"):
-            variants.append("+254" + raw[len("+2540"):])
-        # South Africa: remove trunk '0' after country code (e.g., +270xxx -> +27xxx)
-        if raw.startswith("+270"):
-            variants.append("+27" + raw[len("+270"):])
-        # Local numbers to E.164 (Kenya common prefixes 07x/01x)
-        if raw.startswith("07"):
-            variants.append("+254" + raw[1:])
-        if raw.startswith("01"):
-            variants.append("+254" + raw[1:])
-        # Also try collapsing any duplicate variants while preserving order
-        seen: set[str] = set()
-        ordered_variants: list[str] = []
-        for v in variants:
-            if v not in seen:
-                seen.add(v)
-                ordered_variants.append(v)
-        for candidate in ordered_variants:
-            user_doc = UsersRepo.find_by_phone(candidate)
-            if user_doc:
-                break
+        phone_e164 = to_e164(phone_norm)
+        if phone_e164:
+            user_doc = await AsyncUsersRepo.find_by_phone_e164(phone_e164)
+        if not user_doc and settings.phone_lookup_legacy_fallback:
+            user_doc = await AsyncUsersRepo.find_by_phone_variants(phone_variants(phone_norm))
 
     # Support both Python ('passwordHash') and legacy Node ('password') hashed fields
     password_hash = (user_doc or {}).get("passwordHash") or (user_doc or {}).get("password") or ""
-    if not user_doc or not UsersRepo.verify_password(req.password, password_hash):
+    try:
+        valid, needs_rehash = await passwords.verify_password(req.password, password_hash) if user_doc else (False, False)
+    except passwords.PasswordPoolSaturated:
+        raise _auth_busy()
+    if not valid:
         raise HTTPException(status_code=401, detail={"success": False, "message": "Invalid credentials", "code": "INVALID_CREDENTIALS"})
 
-    # Update last login
-    UsersRepo.update_profile(user_doc["userId"], {"lastLogin": datetime.utcnow()})
+    # Update last login, upgrading outdated or legacy-field hashes in the same write
+    updates: dict = {"lastLogin": datetime.utcnow()}
+    legacy_field = not user_doc.get("passwordHash")
+    if needs_rehash or legacy_field:
+        try:
+            updates["passwordHash"] = await passwords.hash_password(req.password)
+            if "password" in user_doc:
+                updates["password"] = DELETE_FIELD
+        except passwords.PasswordPoolSaturated:
+            pass  # best effort; the next login retries the upgrade
+    await AsyncUsersRepo.update_profile(user_doc["userId"], updates)
 
     token = issue_token(user_doc["userId"], 30 if req.rememberMe else settings.jwt_exp_days)
     user_public = {"userId": user_doc["userId"], "email": user_doc.get("email"), "fullName": user_doc.get("fullName")}
@@ -141,7 +154,12 @@ def login(req: LoginRequest):
 
 
 @router.post("/logout")
-def logout():
+async def logout(authorization: Optional[str] = Header(default=None)):
+    if authorization:
+        try:
+            await run_blocking(revoke_token, bearer_token(authorization))
+        except Exception:
+            pass  # malformed or expired tokens are already unusable
     return {"success": True, "message": "Logout successful"}
 
 
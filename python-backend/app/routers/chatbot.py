@@ -1,8 +1,14 @@
 from __future__ import annotations
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Query
 from pydantic import BaseModel
 from datetime import datetime
+from ..config import settings
 from ..middleware.auth import get_current_user
+from ..services import uploads
+from ..services.async_repos import AsyncChatRepo, run_blocking
+from ..utils.pagination import pagination_meta
 
 router = APIRouter()
 
@@ -20,22 +26,37 @@ async def chat(req: ChatRequest, user=Depends(get_current_user)):
   return {'success': True, 'data': {'reply': 'Hello! How can I assist you today?', 'createdAt': datetime.utcnow().isoformat()}}
 
 
+@asynccontextmanager
+async def _staged(file: UploadFile, allowed: set[str], max_bytes: int) -> AsyncIterator[uploads.StoredUpload]:
+  # Chat media is only needed while the request is handled; nothing is kept on disk
+  try:
+    stored = await uploads.receive(file, settings.upload_staging_dir, allowed, max_bytes)
+  except uploads.UploadRejected as e:
+    raise HTTPException(status_code=e.status_code, detail=e.detail())
+  try:
+    yield stored
+  finally:
+    await run_blocking(stored.path.unlink, True)
+
+
 @router.post('/voice-chat')
 async def voice_chat(audio: UploadFile = File(...), user=Depends(get_current_user)):
   # Stub: Accept voice and return text reply
-  if audio.content_type not in ['audio/mpeg', 'audio/wav', 'audio/x-wav', 'audio/webm']:
-    raise HTTPException(status_code=400, detail={'success': False, 'message': 'Unsupported audio type', 'code': 'UNSUPPORTED_AUDIO'})
-  return {'success': True, 'data': {'reply': 'Received your voice message and processed it.', 'createdAt': datetime.utcnow().isoformat()}}
+  async with _staged(audio, uploads.AUDIO_TYPES, settings.chat_audio_max_bytes) as stored:
+    return {'success': True, 'data': {'reply': 'Received your voice message and processed it.', 'contentType': stored.content_type, 'size': stored.size, 'createdAt': datetime.utcnow().isoformat()}}
 
 
 @router.post('/analyze-image')
 async def analyze_image(image: UploadFile = File(...), user=Depends(get_current_user)):
-  if image.content_type not in ['image/png', 'image/jpeg']:
-    raise HTTPException(status_code=400, detail={'success': False, 'message': 'Unsupported image type', 'code': 'UNSUPPORTED_IMAGE'})
-  # Stub: Perform content safety and object detection
-  return {'success': True, 'data': {'analysis': {'safe': True, 'labels': ['document']}}}
+  async with _staged(image, uploads.IMAGE_TYPES, settings.chat_image_max_bytes) as stored:
+    # Stub: Perform content safety and object detection
+    return {'success': True, 'data': {'analysis': {'safe': True, 'labels': ['document']}, 'contentType': stored.content_type, 'size': stored.size}}
 
 
 @router.get('/history')
-async def history(page: int = 1, limit: int = 20, user=Depends(get_current_user)):
-  return {'success': True, 'data': {'history': [], 'pagination': {'page': page, 'limit': limit, 'total': 0}}}
+async def history(page: int = 1, limit: int = Query(20, ge=1, le=100), cursor: str | None = None, user=Depends(get_current_user)):
+  try:
+    items, total, next_cursor = await AsyncChatRepo.list_by_user(user['userId'], limit, cursor=cursor, page=page)
+  except ValueError:
+    raise HTTPException(status_code=400, detail={'success': False, 'message': 'Invalid cursor', 'code': 'INVALID_CURSOR'})
+  return {'success': True, 'data': {'history': items, 'pagination': pagination_meta(page, limit, total, next_cursor)}}
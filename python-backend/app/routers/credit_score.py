@@ -1,14 +1,25 @@
 from __future__ import annotations
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from datetime import datetime
 from ..middleware.auth import get_current_user
+from ..services import credit_scoring
+from ..services.async_repos import AsyncCreditRepo
+from ..services.tasks import runner
 
 router = APIRouter()
 
+runner.register('credit_score.recalculate', credit_scoring.recalculate_user)
+
 
 @router.get('/score')
 async def score(user=Depends(get_current_user)):
-    return {'success': True, 'data': {'score': {'currentScore': 300, 'updatedAt': datetime.utcnow().isoformat()}}}
+    doc = await AsyncCreditRepo.get_or_create(user['userId'])
+    result = credit_scoring.score_one(doc)
+    return {'success': True, 'data': {'score': {
+        'currentScore': result['currentScore'],
+        'components': result['components'],
+        'updatedAt': datetime.utcnow().isoformat(),
+    }}}
 
 
 @router.get('/analysis')
@@ -32,17 +43,25 @@ async def history(page: int = 1, limit: int = 20, user=Depends(get_current_user)
 
 @router.post('/recalculate')
 async def recalculate(user=Depends(get_current_user)):
-    return {'success': True, 'message': 'Credit score recalculation started'}
+    task = await runner.submit(
+        'credit_score.recalculate',
+        {'userId': user['userId']},
+        user_id=user['userId'],
+        dedupe_key=f"credit_score.recalculate:{user['userId']}",
+    )
+    return {'success': True, 'message': 'Credit score recalculation started', 'data': {'taskId': task['taskId'], 'status': task['status']}}
 
 
 @router.get('/eligibility')
-async def eligibility(amount: float, termMonths: int, user=Depends(get_current_user)):
-    return {'success': True, 'data': {'eligible': True, 'maxAmount': amount, 'termMonths': termMonths}}
+async def eligibility(amount: float = Query(..., gt=0), termMonths: int = Query(..., ge=1, le=60), user=Depends(get_current_user)):
+    doc = await AsyncCreditRepo.get_or_create(user['userId'])
+    return {'success': True, 'data': credit_scoring.eligibility(doc, amount, termMonths)}
 
 
 @router.get('/factors')
 async def factors(user=Depends(get_current_user)):
-    return {'success': True, 'data': {'factors': []}}
+    doc = await AsyncCreditRepo.get_or_create(user['userId'])
+    return {'success': True, 'data': {'factors': credit_scoring.factors(doc)}}
 
 
 @router.get('/comparison')
@@ -1,18 +1,38 @@
 from __future__ import annotations
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
 from ..middleware.auth import get_current_user
+from ..services import leaderboard as lb
+from ..services.async_repos import AsyncGamificationRepo, run_blocking
+from ..utils.pagination import pagination_meta
+from ..utils.response_cache import cached_response
 
 router = APIRouter()
 
+POINTS_PER_LEVEL = 1000
+
 
 @router.get('/profile')
 async def profile(user=Depends(get_current_user)):
-    return {'success': True, 'data': {'profile': {'userId': user['userId'], 'points': 0, 'level': 1}}}
+    doc = await AsyncGamificationRepo.get_or_create(user['userId'])
+    points = int(doc.get('points', 0))
+    return {'success': True, 'data': {'profile': {'userId': user['userId'], 'points': points, 'level': 1 + points // POINTS_PER_LEVEL, 'rank': lb.leaderboards.boards['points'].rank(user['userId'])}}}
 
 
 @router.get('/leaderboard')
-async def leaderboard(page: int = 1, limit: int = 20, type: str = 'points', user=Depends(get_current_user)):
-    return {'success': True, 'data': {'leaderboard': [], 'pagination': {'page': page, 'limit': limit, 'total': 0}}}
+@cached_response(ttl=30, tags=('leaderboard:{type}',), per_user=True)
+async def leaderboard(page: int = Query(1, ge=1), limit: int = Query(20, ge=1, le=100), type: str = 'points', user=Depends(get_current_user)):
+    board = lb.leaderboards.board(type)
+    if board is None:
+        raise HTTPException(status_code=400, detail={'success': False, 'message': 'Unknown leaderboard type', 'code': 'INVALID_LEADERBOARD'})
+    entries = board.page((page - 1) * limit, limit)
+    total = len(board)
+    data = {
+        'leaderboard': entries,
+        'myRank': board.rank(user['userId']),
+        'myScore': board.score(user['userId']),
+        'pagination': pagination_meta(page, limit, total, None) | {'hasMore': page * limit < total},
+    }
+    return {'success': True, 'data': data}
 
 
 @router.get('/badges')
@@ -21,8 +41,12 @@ async def badges(user=Depends(get_current_user)):
 
 
 @router.post('/redeem')
-async def redeem(points: int, reason: str | None = None, user=Depends(get_current_user)):
-    return {'success': True, 'message': 'Points redeemed'}
+async def redeem(points: int = Query(..., gt=0), reason: str | None = None, user=Depends(get_current_user)):
+    try:
+        doc = await run_blocking(lb.adjust_points, user['userId'], -points)
+    except lb.InsufficientPoints:
+        raise HTTPException(status_code=400, detail={'success': False, 'message': 'Not enough points', 'code': lb.InsufficientPoints.code})
+    return {'success': True, 'message': 'Points redeemed', 'data': {'points': doc['points']}}
 
 
 @router.get('/achievements')
@@ -1,130 +1,130 @@
 from __future__ import annotations
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
-from datetime import datetime
+from datetime import datetime, time, timedelta
+from ..services.async_repos import AsyncJobsRepo, run_blocking
+from ..services.geo import job_index, nearby_from_store
+from ..services.heatmap import area_named, build_job_heatmap
+from ..services import tiles, trends
+from ..config import settings
+from ..utils.response_cache import cached_response
+from ..utils.responses import ORJSONResponse
 
 router = APIRouter()
 
 
-JOB_CATEGORIES = {
-    'Boda Boda': { 'color': '#FF6B6B', 'icon': '🏍️', 'intensity': 1.0 },
-    'Mama Fua': { 'color': '#4ECDC4', 'icon': '👩‍💼', 'intensity': 0.8 },
-    'Delivery': { 'color': '#45B7D1', 'icon': '📦', 'intensity': 0.9 },
-    'Cleaning': { 'color': '#96CEB4', 'icon': '🧹', 'intensity': 0.7 },
-    'Construction': { 'color': '#FFEAA7', 'icon': '🔨', 'intensity': 0.6 },
-    'Gardening': { 'color': '#DDA0DD', 'icon': '🌱', 'intensity': 0.5 },
-    'Other': { 'color': '#98D8C8', 'icon': '💼', 'intensity': 0.4 },
-}
-
-KENYA_AREAS = {
-    'Nairobi': {
-        'coordinates': { 'latitude': -1.2921, 'longitude': 36.8219 },
-        'districts': ['CBD', 'Westlands', 'Kilimani', 'Karen', 'Runda', 'Kasarani', 'Eastleigh']
-    },
-    'Mombasa': {
-        'coordinates': { 'latitude': -4.0435, 'longitude': 39.6682 },
-        'districts': ['Mombasa Island', 'Nyali', 'Bamburi', 'Diani']
-    },
-    'Kisumu': {
-        'coordinates': { 'latitude': -0.0917, 'longitude': 34.7680 },
-        'districts': ['Kisumu Central', 'Kondele', 'Mamboleo']
-    },
-    'Nakuru': {
-        'coordinates': { 'latitude': -0.3072, 'longitude': 36.0800 },
-        'districts': ['Nakuru Town', 'Lanet', 'Kiamunyi']
-    },
-    'Eldoret': {
-        'coordinates': { 'latitude': 0.5143, 'longitude': 35.2698 },
-        'districts': ['Eldoret Central', 'Langas', 'Huruma']
-    },
-    'Thika': {
-        'coordinates': { 'latitude': -1.0333, 'longitude': 37.0833 },
-        'districts': ['Thika Town', 'Makongeni', 'Kiganjo']
-    },
-    'Malindi': {
-        'coordinates': { 'latitude': -3.2175, 'longitude': 40.1191 },
-        'districts': ['Malindi Town', 'Watamu', 'Kilifi']
-    },
-    'Nyeri': {
-        'coordinates': { 'latitude': -0.4201, 'longitude': 36.9476 },
-        'districts': ['Nyeri Town', 'Karatina', 'Mukurwe-ini']
-    },
-    'Meru': {
-        'coordinates': { 'latitude': 0.0463, 'longitude': 37.6559 },
-        'districts': ['Meru Town', 'Maua', 'Chuka']
-    },
-    'Kakamega': {
-        'coordinates': { 'latitude': 0.2827, 'longitude': 34.7519 },
-        'districts': ['Kakamega Town', 'Mumias', 'Butere']
-    },
-}
+def _parse_date(value: str | None) -> datetime | None:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise HTTPException(status_code=400, detail={'success': False, 'message': f'Invalid date: {value}', 'code': 'INVALID_DATE'})
+
+
+def _viewport_heatmap(bbox: tuple[float, float, float, float], category: str | None) -> dict:
+    return build_job_heatmap(job_index.columns(*bbox, category=category))
+
+
+def _tile_heatmap(first, last, category: str | None, area: str | None, limit: int) -> dict | None:
+    found = tiles.tile_store.tiles(first, last, category=category, area=area)
+    # Tiles cannot keep just the newest `limit` jobs; only serve them when nothing would be cut
+    if sum(int(t.get('jobs', 0)) for t in found) > limit:
+        return None
+    return tiles.heatmap(found)
+
+
+def _whole_day(value: datetime, at: time) -> bool:
+    return value.time() == at and value.utcoffset() in (None, timedelta(0))
+
+
+def _day_bounds(start: datetime | None, end: datetime | None):
+    """(first, last) days when [start, end] is exactly whole UTC days inside the tile window, else None.
+
+    Without a startDate the query path is unbounded, which the tile window cannot match.
+    """
+    if start is None or not _whole_day(start, time()) or start.date() < datetime.utcnow().date() - timedelta(days=settings.heatmap_tile_days):
+        return None
+    if end is not None and not _whole_day(end, time.max):
+        return None
+    return start.date(), end.date() if end else datetime.utcnow().date()
 
 
 @router.get('/jobs')
-async def jobs(startDate: str | None = None, endDate: str | None = None, category: str | None = None, location: str | None = None, minPrice: float | None = None, maxPrice: float | None = None, limit: int = 1000):
-    # Stub: return static/empty heatmap with schema matching frontend
-    points: list[dict] = []
-    area_counts: dict[str, int] = {k: 0 for k in KENYA_AREAS.keys()}
-    return {
+async def jobs(startDate: str | None = None, endDate: str | None = None, category: str | None = None, location: str | None = None, minPrice: float | None = None, maxPrice: float | None = None, limit: int = Query(1000, ge=1, le=100000),
+               south: float | None = Query(None, ge=-90, le=90), west: float | None = Query(None, ge=-180, le=180), north: float | None = Query(None, ge=-90, le=90), east: float | None = Query(None, ge=-180, le=180)):
+    bbox = (south, west, north, east)
+    has_bbox = all(v is not None for v in bbox)
+    priced = minPrice is not None or maxPrice is not None
+    area = area_named(location) if location else None
+    aggregated = None
+    if has_bbox and job_index.ready and not (startDate or endDate or location or priced):
+        # Map viewport: aggregate straight from the grid cells under the box
+        aggregated = await run_blocking(_viewport_heatmap, bbox, category)
+    elif not has_bbox and not priced and (location is None or area) and tiles.tile_store.ready and (days := _day_bounds(_parse_date(startDate), _parse_date(endDate))):
+        # Day-granular filters within the tile window are answered without reading jobs
+        aggregated = await run_blocking(_tile_heatmap, *days, category, area, limit)
+    if aggregated is None:
+        found = await AsyncJobsRepo.query(
+            start=_parse_date(startDate),
+            end=_parse_date(endDate),
+            category=category,
+            location=location,
+            min_price=minPrice,
+            max_price=maxPrice,
+            limit=limit,
+        )
+        aggregated = await run_blocking(build_job_heatmap, found)
+    # Thousands of plain points: render directly rather than walking them with jsonable_encoder
+    return ORJSONResponse({
         'success': True,
         'data': {
-            'heatmap': {
-                'points': points,
-                'areaCounts': area_counts,
-                'totalJobs': len(points)
-            },
-            'statistics': {
-                'totalJobs': len(points),
-                'averagePrice': 0,
-                'priceRange': {'min': 0, 'max': 0},
-                'categoryDistribution': {k: {'count': 0, 'percentage': 0, 'averagePrice': 0} for k in JOB_CATEGORIES.keys()},
-                'areaDistribution': {k: 0 for k in KENYA_AREAS.keys()},
-                'timeDistribution': {}
-            },
+            'heatmap': aggregated['heatmap'],
+            'statistics': aggregated['statistics'],
             'filters': {
                 'startDate': startDate,
                 'endDate': endDate,
                 'category': category,
                 'location': location,
                 'minPrice': minPrice,
-                'maxPrice': maxPrice
+                'maxPrice': maxPrice,
+                'bbox': {'south': south, 'west': west, 'north': north, 'east': east} if all(v is not None for v in bbox) else None,
             },
             'generatedAt': datetime.utcnow().isoformat()
         }
-    }
+    })
+
+
+@router.get('/nearby')
+async def nearby(lat: float = Query(..., ge=-90, le=90), lng: float = Query(..., ge=-180, le=180), radiusKm: float = Query(5, gt=0, le=100), category: str | None = None, limit: int = Query(50, ge=1, le=500)):
+    if job_index.ready:
+        found = await run_blocking(job_index.nearby, lat, lng, radiusKm, category, limit)
+    else:
+        found = await run_blocking(nearby_from_store, lat, lng, radiusKm, category, limit)
+    return ORJSONResponse({'success': True, 'data': {'jobs': found, 'center': {'latitude': lat, 'longitude': lng}, 'radiusKm': radiusKm, 'generatedAt': datetime.utcnow().isoformat()}})
 
 
 @router.get('/density')
-async def density(period: int = 30):
-    density = {
-        area: {
-            'totalJobs': 0,
-            'averagePrice': 0,
-            'categories': {k: {'count': 0, 'percentage': 0, 'averagePrice': 0} for k in JOB_CATEGORIES.keys()},
-            'coordinates': data['coordinates'],
-            'districts': data['districts'],
-        }
-        for area, data in KENYA_AREAS.items()
-    }
+@cached_response(ttl=60, tags=('heatmap',))
+async def density(period: int = Query(30, ge=1, le=settings.heatmap_tile_days)):
+    first, last = tiles.window(period)
+    density = tiles.density(tiles.tile_store.tiles(first, last))
     return {'success': True, 'data': {'density': density, 'period': period, 'generatedAt': datetime.utcnow().isoformat()}}
 
 
 @router.get('/categories')
-async def categories(period: int = 30, location: str | None = None):
-    cats = {
-        k: {
-            'count': 0,
-            'percentage': 0,
-            'averagePrice': 0,
-            'totalValue': 0,
-            'color': v['color'],
-            'icon': v['icon'],
-            'intensity': v['intensity'],
-        } for k, v in JOB_CATEGORIES.items()
-    }
+@cached_response(ttl=60, tags=('heatmap',))
+async def categories(period: int = Query(30, ge=1, le=settings.heatmap_tile_days), location: str | None = None):
+    first, last = tiles.window(period)
+    area = (area_named(location) or location) if location else None
+    cats = tiles.categories(tiles.tile_store.tiles(first, last, area=area))
     return {'success': True, 'data': {'categories': cats, 'period': period, 'location': location or 'All', 'generatedAt': datetime.utcnow().isoformat()}}
 
 
 @router.get('/trending')
-async def trending(period: int = 7):
-    return {'success': True, 'data': {'trending': {}, 'period': period, 'generatedAt': datetime.utcnow().isoformat()}}
+async def trending(period: int = Query(7, ge=1, le=7), hours: int | None = Query(None, ge=1, le=168), limit: int = Query(10, ge=1, le=50)):
+    # `period` (days) is what the app sends; `hours` narrows the window below a day
+    window_hours = hours or period * 24
+    window = max(1, window_hours * 3600 // settings.trend_bucket_seconds)
+    trend = {kind: trends.engine.top(kind, limit, window) for kind in trends.KINDS}
+    return {'success': True, 'data': {'trending': trend, 'period': period, 'windowHours': window_hours, 'generatedAt': datetime.utcnow().isoformat()}}
@@ -1,19 +1,55 @@
 from __future__ import annotations
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Query
+from google.cloud.firestore import DELETE_FIELD
 from ..config import settings
 from ..middleware.auth import get_current_user
+from ..services import images, uploads
+from ..services.async_repos import AsyncUsersRepo, run_blocking
+from ..services.repos import now_ts
 
 router = APIRouter()
 
+URL_PREFIX = '/uploads/profile-images'
+
+
+def _rejected(e: images.ImageRejected) -> HTTPException:
+    status = 413 if e.code == 'IMAGE_TOO_LARGE' else 400
+    return HTTPException(status_code=status, detail={'success': False, 'message': e.message, 'code': e.code})
+
+
+def _urls(names: dict[str, str]) -> dict[str, str]:
+    return {size: f"{URL_PREFIX}/{name}" for size, name in names.items()}
+
+
+async def _receive(profileImage: UploadFile) -> uploads.StoredUpload:
+    try:
+        return await uploads.receive(profileImage, settings.upload_staging_dir, uploads.IMAGE_TYPES, settings.profile_image_max_bytes)
+    except uploads.UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail())
+
 
 @router.post('/upload')
 async def upload(profileImage: UploadFile = File(...), user=Depends(get_current_user)):
-    if profileImage.content_type not in ['image/png', 'image/jpeg']:
-        raise HTTPException(status_code=400, detail={'success': False, 'message': 'Unsupported image type', 'code': 'UNSUPPORTED_IMAGE'})
-    path = settings.uploads_dir / f"profile_{user['userId']}.bin"
-    with path.open('wb') as f:
-        f.write(await profileImage.read())
-    return {'success': True, 'data': {'url': f"/uploads/profile-images/profile_{user['userId']}.bin"}}
+    staged = await _receive(profileImage)
+    try:
+        variants = await images.process(staged.path)
+    except images.ImageRejected as e:
+        raise _rejected(e)
+    finally:
+        staged.path.unlink(missing_ok=True)
+    uid = user['userId']
+    previous = ((await AsyncUsersRepo.find_by_id(uid)) or {}).get('profileImage') or {}
+    names = await run_blocking(images.store_variants, uid, variants, settings.uploads_dir)
+    await AsyncUsersRepo.update_profile(uid, {'profileImage': {
+        'variants': names,
+        'contentType': variants[0].content_type,
+        'updatedAt': now_ts(),
+    }})
+    stale = set((previous.get('variants') or {}).values()) - set(names.values())
+    if stale:
+        await run_blocking(images.remove_files, stale, settings.uploads_dir)
+    urls = _urls(names)
+    return {'success': True, 'data': {'url': urls['medium'], 'variants': urls}}
 
 
 @router.put('/')
@@ -22,19 +58,38 @@ async def update(profileImage: UploadFile = File(...), user=Depends(get_current_
 
 
 @router.get('/{userId}')
-async def get(userId: str, size: str = 'medium'):
-    return {'success': True, 'data': {'url': f"/uploads/profile-images/profile_{userId}.bin"}}
+async def get(userId: str, size: str = Query('medium', pattern='^(small|medium|large)$')):
+    profile = await AsyncUsersRepo.find_by_id(userId)
+    image = (profile or {}).get('profileImage') or {}
+    name = (image.get('variants') or {}).get(size)
+    if name:
+        # The URL changes whenever the image does, so clients and CDNs may cache it indefinitely
+        return {'success': True, 'data': {'url': f"{URL_PREFIX}/{name}", 'size': size, 'contentType': image.get('contentType'), 'immutable': True}}
+    legacy = f"profile_{userId}.bin"
+    if await run_blocking((settings.uploads_dir / legacy).exists):
+        return {'success': True, 'data': {'url': f"{URL_PREFIX}/{legacy}", 'size': size, 'immutable': False}}
+    raise HTTPException(status_code=404, detail={'success': False, 'message': 'No profile image', 'code': 'PROFILE_IMAGE_NOT_FOUND'})
 
 
 @router.delete('/')
 async def delete(user=Depends(get_current_user)):
-    path = settings.uploads_dir / f"profile_{user['userId']}.bin"
-    if path.exists():
-        path.unlink()
+    uid = user['userId']
+    current = ((await AsyncUsersRepo.find_by_id(uid)) or {}).get('profileImage') or {}
+    await AsyncUsersRepo.update_profile(uid, {'profileImage': DELETE_FIELD})
+    await run_blocking(images.remove_files, [*(current.get('variants') or {}).values(), f"profile_{uid}.bin"], settings.uploads_dir)
     return {'success': True, 'message': 'Profile image deleted'}
 
 
 @router.post('/validate')
 async def validate(profileImage: UploadFile = File(...), user=Depends(get_current_user)):
-    # Stub: Perform basic validation
-    return {'success': True, 'data': {'valid': True}}
+    try:
+        staged = await uploads.receive(profileImage, settings.upload_staging_dir, uploads.IMAGE_TYPES, settings.profile_image_max_bytes)
+    except uploads.UploadRejected as e:
+        return {'success': True, 'data': {'valid': False, 'code': e.code, 'message': e.message}}
+    try:
+        info = await images.validate(staged.path)
+    except images.ImageRejected as e:
+        return {'success': True, 'data': {'valid': False, 'code': e.code, 'message': e.message}}
+    finally:
+        staged.path.unlink(missing_ok=True)
+    return {'success': True, 'data': {'valid': True, **info}}
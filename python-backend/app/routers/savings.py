@@ -1,8 +1,11 @@
 from __future__ import annotations
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 from datetime import datetime
 from ..middleware.auth import get_current_user
+from ..services.async_repos import AsyncSavingsRepo
+from ..utils.pagination import pagination_meta
+from ..utils.ids import new_id
 
 router = APIRouter()
 
@@ -16,20 +19,26 @@ class CreateGoalRequest(BaseModel):
 
 
 @router.get('/goals')
-async def goals(page: int = 1, limit: int = 20, user=Depends(get_current_user)):
-    return {'success': True, 'data': {'goals': [], 'pagination': {'page': page, 'limit': limit, 'total': 0}}}
+async def goals(page: int = 1, limit: int = Query(20, ge=1, le=100), cursor: str | None = None, user=Depends(get_current_user)):
+    try:
+        items, total, next_cursor = await AsyncSavingsRepo.list_goals(user['userId'], limit, cursor=cursor, page=page)
+    except ValueError:
+        raise HTTPException(status_code=400, detail={'success': False, 'message': 'Invalid cursor', 'code': 'INVALID_CURSOR'})
+    return {'success': True, 'data': {'goals': items, 'pagination': pagination_meta(page, limit, total, next_cursor)}}
 
 
 @router.post('/goals')
 async def create_goal(req: CreateGoalRequest, user=Depends(get_current_user)):
     goal = {
-        'id': f'goal_{int(datetime.utcnow().timestamp())}',
         'userId': user['userId'],
         'name': req.name,
         'target': req.target,
         'saved': 0,
         'category': req.category,
+        'dueDate': req.dueDate,
+        'hustle': req.hustle,
     }
+    goal = await AsyncSavingsRepo.create_goal(goal)
     return {'success': True, 'data': {'goal': goal}}
 
 
@@ -43,7 +52,7 @@ class ContributeRequest(BaseModel):
 @router.post('/goals/{goalId}/contribute')
 async def contribute(goalId: str, req: ContributeRequest, user=Depends(get_current_user)):
     txn = {
-        'id': f'contrib_{int(datetime.utcnow().timestamp())}',
+        'id': new_id('contrib'),
         'goalId': goalId,
         'amount': req.amount,
         'date': datetime.utcnow().isoformat(),
@@ -67,7 +76,7 @@ class LoanRequest(BaseModel):
 @router.post('/loans')
 async def request_loan(req: LoanRequest, user=Depends(get_current_user)):
     loan = {
-        'id': f'loan_{int(datetime.utcnow().timestamp())}',
+        'id': new_id('loan'),
         'amount': req.amount,
         'purpose': req.purpose,
         'termMonths': req.termMonths,
@@ -0,0 +1,23 @@
+from __future__ import annotations
+from fastapi import APIRouter, Depends, HTTPException
+from ..middleware.auth import get_current_user
+from ..services.tasks import runner
+
+router = APIRouter()
+
+
+@router.get('/{taskId}')
+async def status(taskId: str, user=Depends(get_current_user)):
+    task = await runner.get(taskId)
+    if not task or task.get('userId') != user['userId']:
+        raise HTTPException(status_code=404, detail={'success': False, 'message': 'Task not found', 'code': 'TASK_NOT_FOUND'})
+    return {'success': True, 'data': {'task': {
+        'taskId': task['taskId'],
+        'name': task.get('name'),
+        'status': task.get('status'),
+        'attempts': task.get('attempts', 0),
+        'result': task.get('result'),
+        'error': task.get('error'),
+        'createdAt': task.get('createdAt'),
+        'updatedAt': task.get('updatedAt'),
+    }}}
@@ -2,7 +2,8 @@ from __future__ import annotations
 from fastapi import APIRouter, Depends
 from pydantic import BaseModel
 from ..middleware.auth import get_current_user
-from ..services.repos import UsersRepo
+from ..services.async_repos import AsyncUsersRepo
+from ..utils.response_cache import cached_response
 
 router = APIRouter()
 
@@ -32,7 +33,7 @@ class UserProfile(BaseModel):
 
 @router.get('/profile')
 async def get_profile(user=Depends(get_current_user)):
-    u = UsersRepo.find_by_id(user['userId']) or {}
+    u = await AsyncUsersRepo.find_by_id(user['userId']) or {}
     profile = UserProfile(
         userId=user['userId'],
         fullName=str(u.get('fullName', '')) or 'User',
@@ -62,7 +63,7 @@ async def update_profile(req: UpdateProfileRequest, user=Depends(get_current_use
     if req.coordinates is not None:
         updates['coordinates'] = req.coordinates
     if updates:
-        UsersRepo.update_profile(user['userId'], updates)
+        await AsyncUsersRepo.update_profile(user['userId'], updates)
     return await get_profile(user)
 
 
@@ -113,6 +114,7 @@ async def set_notifications(_: NotificationsRequest, user=Depends(get_current_us
 
 
 @router.get('/{userId}')
+@cached_response(ttl=300, tags=('user:{userId}',))
 async def get_public_profile(userId: str):
     profile = UserProfile(
         userId=userId,
@@ -1,18 +1,25 @@
 from __future__ import annotations
+import asyncio
 from datetime import datetime
-from idlelib.query import Query
-from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException
+from typing import AsyncIterator, Iterator, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from ..middleware.auth import get_current_user
 from ..utils.security import mask_balance
-from ..services.repos import WalletsRepo, TransactionsRepo
+from ..services.async_repos import AsyncWalletsRepo, AsyncTransactionsRepo, AsyncRollupsRepo, run_blocking
+from ..services import balances as balance_engine, statements, wallet_analytics
+from ..services.repos import TransactionsRepo
+from ..config import settings
+from ..services.rollups import summarize as _summarize_rollups, tx_direction as _tx_direction
+from ..utils.pagination import pagination_meta
+from ..utils.responses import ORJSONResponse
 from passlib.context import CryptContext
 
 from typing import Any, Dict, List
 from datetime import timedelta
 
-from auth import get_current_user
+router = APIRouter()
 
 # ---------- Pydantic models for analytics ----------
 
@@ -49,9 +56,6 @@ class AnalyticsResponse(BaseModel):
 
 # ---------- Helpers ----------
 
-IN_TYPES = {"deposit", "transfer_in", "convert_in", "airtime_cashback", "refund"}
-OUT_TYPES = {"withdraw", "transfer_out", "convert_out", "payment", "bill"}
-
 def _parse_date(dt: Any) -> Optional[datetime]:
     if not dt:
         return None
@@ -74,21 +78,6 @@ def _parse_date(dt: Any) -> Optional[datetime]:
                 return None
     return None
 
-def _tx_direction(tx_type: Optional[str]) -> Optional[str]:
-    if not tx_type:
-        return None
-    t = str(tx_type).lower()
-    if t in IN_TYPES:
-        return "in"
-    if t in OUT_TYPES:
-        return "out"
-    # Heuristic fallback
-    if "deposit" in t or "in" in t:
-        return "in"
-    if "withdraw" in t or "out" in t or "payment" in t:
-        return "out"
-    return None
-
 def _coerce_float(val: Any, default: float = 0.0) -> float:
     try:
         return float(val)
@@ -96,9 +85,9 @@ def _coerce_float(val: Any, default: float = 0.0) -> float:
         return default
 
 def _build_simple_tx(raw: Dict[str, Any]) -> SimpleTransaction:
-    date = _parse_date(raw.get("date"))
+    date = _parse_date(raw.get("date") or raw.get("initiatedAt"))
     return SimpleTransaction(
-        id=raw.get("id"),
+        id=raw.get("id") or raw.get("transactionId"),
         type=raw.get("type"),
         amount=_coerce_float(raw.get("amount", 0)),
         currencyCode=str(raw.get("currencyCode") or "KES"),
@@ -110,15 +99,8 @@ def _build_simple_tx(raw: Dict[str, Any]) -> SimpleTransaction:
         hustle=raw.get("hustle"),
     )
 
-async def _maybe_await(val):
-    # Utility to support either sync or async helpers
-    if hasattr(val, "__await__"):
-        return await val
-    return val
-
 async def _get_user_wallet(user_id: str) -> Dict[str, Any]:
-    # Reuse existing internal wallet fetcher if available
-    wallet = await _maybe_await(_get_wallet(user_id))  # type: ignore[name-defined]
+    wallet = await AsyncWalletsRepo.get_or_create(user_id)
     if not wallet:
         raise HTTPException(status_code=404, detail={"success": False, "message": "Wallet not found"})
     return wallet
@@ -223,12 +205,73 @@ def _analyze_transactions(txs: List[SimpleTransaction]) -> Dict[str, Any]:
         "lastActivity": last_activity,
     }
 
+def _analyze_columnar(
+    transactions: List[Dict[str, Any]],
+    start_at: Optional[datetime],
+    end_at: Optional[datetime],
+    limit: int,
+) -> tuple[List[SimpleTransaction], Dict[str, Any]]:
+    # Same result as _filter_and_normalize_transactions + _analyze_transactions for large lists
+    window = wallet_analytics.filter_window(wallet_analytics.load_transactions(transactions), start_at, end_at, limit)
+    return [SimpleTransaction(**r) for r in wallet_analytics.to_records(window)], wallet_analytics.analyze(window)
+
+# ---------- Route: GET /transactions ----------
+
+@router.get("/transactions")
+async def list_transactions(
+    page: int = 1,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    type: Optional[str] = None,
+    status: Optional[str] = None,
+    startDate: Optional[str] = None,
+    endDate: Optional[str] = None,
+    current_user: Dict[str, str] = Depends(get_current_user),
+):
+    filters = {"type": type, "status": status, "startDate": _parse_date(startDate), "endDate": _parse_date(endDate)}
+    try:
+        items, total, next_cursor = await AsyncTransactionsRepo.list_by_user(current_user["userId"], limit, cursor=cursor, filters=filters, page=page)
+    except ValueError:
+        raise HTTPException(status_code=400, detail={"success": False, "message": "Invalid cursor", "code": "INVALID_CURSOR"})
+    return ORJSONResponse({"success": True, "data": {"transactions": items, "pagination": pagination_meta(page, limit, total, next_cursor)}})
+
+# ---------- Route: GET /transactions/export ----------
+
+def _next_encoded(chunks: Iterator[List[Dict[str, Any]]], fmt: str) -> Optional[bytes]:
+    rows = next(chunks, None)
+    return None if rows is None else statements.encode_chunk(fmt, rows)
+
+async def _export_body(chunks: Iterator[List[Dict[str, Any]]], fmt: str) -> AsyncIterator[bytes]:
+    # One Firestore chunk is fetched and encoded at a time, so memory stays flat however long the history
+    if fmt == "csv":
+        yield statements.csv_header()
+    while (body := await run_blocking(_next_encoded, chunks, fmt)) is not None:
+        yield body
+
+@router.get("/transactions/export")
+async def export_transactions(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    startDate: Optional[str] = None,
+    endDate: Optional[str] = None,
+    current_user: Dict[str, str] = Depends(get_current_user),
+):
+    start_at, end_at = _parse_date(startDate), _parse_date(endDate)
+    if (startDate and not start_at) or (endDate and not end_at):
+        raise HTTPException(status_code=400, detail={"success": False, "message": "Invalid date", "code": "INVALID_DATE"})
+    chunks = TransactionsRepo.iter_chunks(current_user["userId"], start_at, end_at, settings.export_chunk_size)
+    filename = f"transactions_{datetime.utcnow():%Y%m%d}.{format}"
+    return StreamingResponse(
+        _export_body(chunks, format),
+        media_type=statements.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
 # ---------- Route: GET /analytics ----------
 
-@router.get("/analytics", response_model=AnalyticsResponse, summary="Get analytics for the current user's wallet")  # type: ignore[name-defined]
+@router.get("/analytics", response_model=AnalyticsResponse, summary="Get analytics for the current user's wallet")
 async def get_user_analytics(
-    days: int = Query(30),
-    limit: int = Query(50),
+    days: int = Query(30, ge=1, le=366),
+    limit: int = Query(50, ge=1, le=500),
     current_user: Dict[str, str] = Depends(get_current_user),
 ):
     user_id = current_user.get("userId")
@@ -238,29 +281,31 @@ async def get_user_analytics(
     # Time window
     end_at = datetime.utcnow()
     start_at = end_at - timedelta(days=days)
+    first_day = end_at.date() - timedelta(days=days - 1)
 
-    # Fetch wallet
     wallet = await _get_user_wallet(user_id)
-    balances = _extract_balances(wallet)
+    # Hot (sharded) wallets hold part of their credits in shards, outside the cached wallet doc
+    balances = await run_blocking(balance_engine.with_shards, user_id, wallet, _extract_balances(wallet))
 
-    # Collect transactions
-    raw_transactions: List[Dict[str, Any]] = []
-
-    # Preferred: read from wallet object if available
+    # Legacy wallets embed their transactions; analyse those directly
     wallet_txs = wallet.get("transactions")
-    if isinstance(wallet_txs, list):
-        raw_transactions = wallet_txs
-
-    # If none were found, you can plug in your datastore read here
-    # Example (pseudo):
-    # raw_transactions = await transactions_repo.list_for_user(user_id, start_at, end_at, limit)
-    # Make sure each item has fields: amount, currencyCode, type, date, status, description, category
-
-    # Normalize, filter, and limit
-    recent = _filter_and_normalize_transactions(raw_transactions, start_at, end_at, limit)
-
-    # Analyze
-    analysis = _analyze_transactions(recent)
+    if isinstance(wallet_txs, list) and len(wallet_txs) >= settings.columnar_analytics_min_rows:
+        recent, analysis = await run_blocking(_analyze_columnar, wallet_txs, start_at, end_at, limit)
+    elif isinstance(wallet_txs, list):
+        recent = _filter_and_normalize_transactions(wallet_txs, start_at, end_at, limit)
+        analysis = _analyze_transactions(recent)
+    else:
+        # At most `days` daily rollups and the last `limit` transactions, fetched concurrently
+        rollups, recent_raw = await asyncio.gather(
+            AsyncRollupsRepo.get_range(user_id, first_day, end_at.date()),
+            AsyncTransactionsRepo.recent(user_id, limit, start_at),
+        )
+        recent = [_build_simple_tx(raw) for raw in recent_raw]
+        summary = _summarize_rollups(rollups)
+        analysis = summary | {
+            "averagesByCurrency": [CurrencyAverage(currencyCode=cur, averageAmount=avg) for cur, avg in summary["averagesByCurrency"].items()],
+            "categoryCounts": [CategoryCount(category=k, count=v) for k, v in sorted(summary["categoryCounts"].items(), key=lambda x: (-x[1], x[0]))],
+        }
 
     return AnalyticsResponse(
         success=True,
@@ -272,4 +317,4 @@ async def get_user_analytics(
         totalTransactions=analysis["totalTransactions"],
         lastActivity=analysis["lastActivity"],
         recent=recent,
-    )
\ No newline at end of file
+    )
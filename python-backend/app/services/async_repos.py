@@ -0,0 +1,57 @@
+from __future__ import annotations
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+from ..config import settings
+from .repos import CountersRepo, UsersRepo, WalletsRepo, TransactionsRepo, RollupsRepo, SavingsRepo, ChatRepo, JobsRepo, CreditRepo, GamificationRepo
+
+
+T = TypeVar("T")
+
+# The Firestore client is synchronous; every repo call is offloaded to this
+# bounded pool so a slow round trip never stalls the event loop.
+_executor = ThreadPoolExecutor(max_workers=settings.firestore_max_workers, thread_name_prefix="firestore")
+
+
+async def run_blocking(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(fn, *args, **kwargs))
+
+
+def shutdown_executor() -> None:
+    _executor.shutdown(wait=True)
+
+
+class AsyncRepo:
+    """Awaitable view over a synchronous repo class with the same method surface."""
+
+    def __init__(self, repo: type) -> None:
+        self._repo = repo
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._repo, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def call(*args: Any, **kwargs: Any) -> Any:
+            return await run_blocking(attr, *args, **kwargs)
+
+        setattr(self, name, call)
+        return call
+
+    def __repr__(self) -> str:
+        return f"AsyncRepo({self._repo.__name__})"
+
+
+AsyncUsersRepo = AsyncRepo(UsersRepo)
+AsyncWalletsRepo = AsyncRepo(WalletsRepo)
+AsyncTransactionsRepo = AsyncRepo(TransactionsRepo)
+AsyncSavingsRepo = AsyncRepo(SavingsRepo)
+AsyncChatRepo = AsyncRepo(ChatRepo)
+AsyncJobsRepo = AsyncRepo(JobsRepo)
+AsyncCreditRepo = AsyncRepo(CreditRepo)
+AsyncCountersRepo = AsyncRepo(CountersRepo)
+AsyncRollupsRepo = AsyncRepo(RollupsRepo)
+AsyncGamificationRepo = AsyncRepo(GamificationRepo)
@@ -0,0 +1,155 @@
+from __future__ import annotations
+import random
+from typing import Any, Optional
+from google.cloud.firestore import Increment, transactional
+from ..config import settings
+from .firebase import get_db
+from .repos import WalletsRepo, now_ts
+
+
+class BalanceError(Exception):
+    code = "BALANCE_ERROR"
+
+    def __init__(self, message: str) -> None:
+        super().__init__(message)
+        self.message = message
+
+
+class WalletFrozen(BalanceError):
+    code = "WALLET_FROZEN"
+
+
+class InsufficientFunds(BalanceError):
+    code = "INSUFFICIENT_FUNDS"
+
+
+class DailyLimitExceeded(BalanceError):
+    code = "DAILY_LIMIT_EXCEEDED"
+
+
+def _shards(wallet_ref):
+    return wallet_ref.collection("balance_shards")
+
+
+def _today() -> str:
+    return now_ts().strftime("%Y-%m-%d")
+
+
+def _usage_updates(data: dict[str, Any], currency: str, kind: Optional[str], amount: float, today: str) -> dict[str, Any]:
+    """Check the daily limit for `kind` and return the field updates recording the usage."""
+    if not kind:
+        return {}
+    same_day = data.get("dailyUsageDate") == today
+    used = float(((data.get("dailyUsage") or {}).get(currency) or {}).get(kind, 0)) if same_day else 0.0
+    limit = ((data.get("dailyLimits") or {}).get(currency) or {}).get(kind)
+    if limit is not None and used + amount > float(limit):
+        raise DailyLimitExceeded(f"Daily {kind} limit of {limit} {currency} exceeded")
+    if same_day:
+        return {f"dailyUsage.{currency}.{kind}": used + amount}
+    # First movement of the day resets every counter at once
+    return {"dailyUsage": {currency: {kind: amount}}, "dailyUsageDate": today}
+
+
+@transactional
+def _apply_in_txn(txn, wallet_ref, currency: str, delta: float, kind: Optional[str]) -> dict[str, Any]:
+    snap = wallet_ref.get(transaction=txn)
+    data = (snap.to_dict() or {}) if snap.exists else WalletsRepo.default_doc()
+    if data.get("isFrozen"):
+        raise WalletFrozen("Wallet is frozen")
+
+    balance = float((data.get("balances") or {}).get(currency, 0.0))
+    parked: list[tuple[Any, float]] = []
+    if delta < 0 and data.get("shardCount"):
+        # Debits on a sharded wallet must see the credits parked in the shards
+        for shard in _shards(wallet_ref).get(transaction=txn):
+            amount = float(((shard.to_dict() or {}).get("balances") or {}).get(currency, 0.0))
+            if amount:
+                parked.append((shard.reference, amount))
+    shard_total = sum(amount for _, amount in parked)
+    if delta < 0 and balance + shard_total + delta < 0:
+        raise InsufficientFunds(f"Insufficient {currency} balance")
+
+    # The shards read above are folded into the main balance, so it never goes negative
+    new_balance = balance + shard_total + delta
+    for shard_ref, amount in parked:
+        txn.update(shard_ref, {f"balances.{currency}": Increment(-amount)})
+    usage = _usage_updates(data, currency, kind, abs(delta), _today())
+    if snap.exists:
+        # Field-path update: only the touched counters are written, not the whole wallet
+        txn.update(wallet_ref, {f"balances.{currency}": new_balance, "updatedAt": now_ts()} | usage)
+    else:
+        # A fresh wallet has no dailyUsageDate, so `usage` holds only top-level fields
+        data["balances"][currency] = new_balance
+        txn.set(wallet_ref, data | usage)
+    return {currency: new_balance}
+
+
+def apply_delta(user_id: str, currency: str, delta: float, kind: Optional[str] = None) -> dict[str, float]:
+    """Atomically add `delta` to a wallet balance.
+
+    `kind` ("deposit" or "withdrawal") is checked against `dailyLimits` and
+    recorded in `dailyUsage` inside the same transaction. Debits never take the
+    balance below zero. Returns the resulting balance for `currency`.
+    """
+    wallet_ref = WalletsRepo._col().document(user_id)
+    txn = get_db().transaction(max_attempts=settings.wallet_txn_attempts)
+    try:
+        return _apply_in_txn(txn, wallet_ref, currency, float(delta), kind)
+    finally:
+        WalletsRepo.invalidate(user_id)
+
+
+def credit_sharded(user_id: str, currency: str, amount: float) -> None:
+    """Blind increment of one random shard; used for hot wallets taking many concurrent credits.
+
+    No read and no transaction, so credits never contend with each other. Daily
+    deposit limits are not enforced on this path.
+    """
+    # The cached wallet doc never includes shard totals, so it stays valid across shard credits
+    shard_count = int(WalletsRepo.get_or_create(user_id).get("shardCount") or settings.wallet_default_shards)
+    shard = _shards(WalletsRepo._col().document(user_id)).document(str(random.randrange(shard_count)))
+    shard.set({"balances": {currency: Increment(float(amount))}, "updatedAt": now_ts()}, merge=True)
+
+
+def enable_sharding(user_id: str, shard_count: Optional[int] = None) -> None:
+    WalletsRepo.get_or_create(user_id)
+    WalletsRepo._col().document(user_id).update({"shardCount": shard_count or settings.wallet_default_shards, "updatedAt": now_ts()})
+    WalletsRepo.invalidate(user_id)
+
+
+def credit(user_id: str, currency: str, amount: float, kind: Optional[str] = "deposit", sharded: bool = False) -> None:
+    if sharded:
+        credit_sharded(user_id, currency, amount)
+    else:
+        apply_delta(user_id, currency, abs(amount), kind)
+
+
+def debit(user_id: str, currency: str, amount: float, kind: Optional[str] = "withdrawal") -> dict[str, float]:
+    return apply_delta(user_id, currency, -abs(amount), kind)
+
+
+def shard_totals(user_id: str) -> dict[str, float]:
+    """Credits parked in a sharded wallet's shards and not yet folded into `balances`."""
+    totals: dict[str, float] = {}
+    for shard in _shards(WalletsRepo._col().document(user_id)).stream():
+        for cur, amount in ((shard.to_dict() or {}).get("balances") or {}).items():
+            totals[cur] = totals.get(cur, 0.0) + float(amount)
+    return totals
+
+
+def with_shards(user_id: str, wallet: dict[str, Any], balances: dict[str, float]) -> dict[str, float]:
+    """`balances` read from `wallet`, plus its shard totals when the wallet is sharded."""
+    if not wallet.get("shardCount"):
+        return balances
+    merged = dict(balances)
+    for cur, amount in shard_totals(user_id).items():
+        key = str(cur).upper()
+        merged[key] = merged.get(key, 0.0) + amount
+    return merged
+
+
+def read_balances(user_id: str) -> dict[str, float]:
+    """Wallet balances with any shard totals folded in."""
+    snap = WalletsRepo._col().document(user_id).get()
+    data = (snap.to_dict() or {}) if snap.exists else WalletsRepo.default_doc()
+    return with_shards(user_id, data, {k: float(v) for k, v in (data.get("balances") or {}).items()})
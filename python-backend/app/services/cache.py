@@ -0,0 +1,167 @@
+from __future__ import annotations
+import copy
+import pickle
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+from ..config import settings
+
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Thread-safe bounded LRU with optional per-entry expiry (epoch seconds)."""
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[str, tuple[Optional[float], Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, expires_at: Optional[float] = None) -> None:
+        if expires_at is None:
+            ttl = self.ttl if ttl is None else ttl
+            expires_at = time.time() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class MemoryCache:
+    """Default in-process backend: TTL + LRU, values copied in and out so callers can't mutate entries."""
+
+    def __init__(self, maxsize: int = 10000) -> None:
+        self._lru = LRUCache(maxsize=maxsize)
+
+    def get(self, key: str) -> Any:
+        value = self._lru.get(key)
+        return copy.deepcopy(value) if value is not None else None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self._lru.set(key, copy.deepcopy(value), ttl=ttl)
+
+    def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._lru.delete(key)
+
+    def clear(self) -> None:
+        self._lru.clear()
+
+
+class RedisCache:
+    """Backend over any Redis-compatible client exposing get/set(ex=)/delete."""
+
+    def __init__(self, client: Any, prefix: str = "jashoo:") -> None:
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key: str) -> Any:
+        raw = self.client.get(self.prefix + key)
+        return pickle.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self.client.set(self.prefix + key, pickle.dumps(value), ex=int(ttl) if ttl else None)
+
+    def delete(self, *keys: str) -> None:
+        if keys:
+            self.client.delete(*(self.prefix + k for k in keys))
+
+
+class FakeRedis:
+    """Minimal in-memory stand-in for a Redis client, for local runs and tests."""
+
+    def __init__(self) -> None:
+        self._data: dict[str, tuple[Optional[float], bytes]] = {}
+
+    def get(self, key: str) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.time():
+            del self._data[key]
+            return None
+        return value
+
+    def set(self, key: str, value: bytes, ex: Optional[int] = None) -> bool:
+        self._data[key] = (time.time() + ex if ex else None, value)
+        return True
+
+    def delete(self, *keys: str) -> int:
+        return sum(self._data.pop(k, None) is not None for k in keys)
+
+
+_cache = None
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        if settings.cache_backend == "redis":
+            import redis  # optional dependency, only needed for the redis backend
+            _cache = RedisCache(redis.Redis.from_url(settings.redis_url))
+        elif settings.cache_backend == "fakeredis":
+            _cache = RedisCache(FakeRedis())
+        else:
+            _cache = MemoryCache(maxsize=settings.entity_cache_size)
+    return _cache
+
+
+def set_cache(cache) -> None:
+    global _cache
+    _cache = cache
+
+
+def _tag_key(tag: str) -> str:
+    return f"tag:{tag}"
+
+
+def tag_versions(tags: list[str]) -> list[str]:
+    """Current version token of each tag. Keys built from them go stale when a tag is invalidated."""
+    cache = get_cache()
+    versions = []
+    for tag in tags:
+        version = cache.get(_tag_key(tag))
+        if version is None:
+            # Missing or evicted: a fresh token can only cause misses, never stale hits
+            version = secrets.token_hex(8)
+            cache.set(_tag_key(tag), version)
+        versions.append(version)
+    return versions
+
+
+def invalidate_tags(*tags: str) -> None:
+    cache = get_cache()
+    for tag in tags:
+        cache.set(_tag_key(tag), secrets.token_hex(8))
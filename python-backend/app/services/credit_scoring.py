@@ -0,0 +1,168 @@
+from __future__ import annotations
+from typing import Any, Callable, Iterable, Optional
+import numpy as np
+from google.cloud.firestore import FieldPath
+from .repos import CreditRepo, now_ts
+
+
+MIN_SCORE = 300
+MAX_SCORE = 850
+
+# Component weights; they sum to 1 so a perfect profile maps to MAX_SCORE
+WEIGHTS = {
+    'paymentHistory': 0.35,
+    'income': 0.15,
+    'savingsRate': 0.15,
+    'employmentStability': 0.15,
+    'gigWorkConsistency': 0.15,
+    'debtToIncome': 0.05,
+}
+
+FACTOR_LABELS = {
+    'paymentHistory': 'On-time payment ratio',
+    'income': 'Monthly income',
+    'savingsRate': 'Savings rate',
+    'employmentStability': 'Employment stability',
+    'gigWorkConsistency': 'Gig work consistency',
+    'debtToIncome': 'Debt-to-income ratio',
+}
+
+FEATURES = (
+    'monthlyIncome', 'monthlyExpenses', 'savingsRate', 'debtToIncomeRatio',
+    'employmentStability', 'gigWorkConsistency', 'onTimePayments', 'latePayments', 'missedPayments',
+)
+
+INCOME_CEILING_KES = 200_000.0
+SAVINGS_RATE_TARGET = 0.30
+
+
+def features_from_docs(docs: Iterable[dict[str, Any]]) -> dict[str, np.ndarray]:
+    """Columnar feature arrays from credit_scores documents (financialProfile + paymentPatterns)."""
+    rows = []
+    for doc in docs:
+        profile = doc.get('financialProfile') or {}
+        patterns = doc.get('paymentPatterns') or {}
+        rows.append((
+            profile.get('monthlyIncome') or 0, profile.get('monthlyExpenses') or 0, profile.get('savingsRate') or 0,
+            profile.get('debtToIncomeRatio') or 0, profile.get('employmentStability') or 0, profile.get('gigWorkConsistency') or 0,
+            patterns.get('onTimePayments') or 0, patterns.get('latePayments') or 0, patterns.get('missedPayments') or 0,
+        ))
+    matrix = np.array(rows, dtype=np.float64).reshape(-1, len(FEATURES))
+    return {name: matrix[:, i] for i, name in enumerate(FEATURES)}
+
+
+def _unit(values: np.ndarray) -> np.ndarray:
+    # Stored ratios are either 0..1 or percentages 0..100
+    return np.clip(np.where(values > 1, values / 100.0, values), 0.0, 1.0)
+
+
+def components(f: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+    """Per-user component scores in [0, 1], one array per entry in WEIGHTS."""
+    history = f['onTimePayments'] + f['latePayments'] + f['missedPayments']
+    paid = f['onTimePayments'] + 0.5 * f['latePayments']
+    payment = np.divide(paid, history, out=np.full_like(history, 0.5), where=history > 0)
+    income = np.clip(np.log1p(np.maximum(f['monthlyIncome'], 0)) / np.log1p(INCOME_CEILING_KES), 0.0, 1.0)
+    return {
+        'paymentHistory': payment,
+        'income': income,
+        'savingsRate': np.clip(_unit(f['savingsRate']) / SAVINGS_RATE_TARGET, 0.0, 1.0),
+        'employmentStability': _unit(f['employmentStability']),
+        'gigWorkConsistency': _unit(f['gigWorkConsistency']),
+        'debtToIncome': 1.0 - _unit(f['debtToIncomeRatio']),
+    }
+
+
+def score(f: dict[str, np.ndarray], comps: Optional[dict[str, np.ndarray]] = None) -> np.ndarray:
+    comps = components(f) if comps is None else comps
+    weighted = sum(WEIGHTS[name] * comps[name] for name in WEIGHTS)
+    return np.rint(MIN_SCORE + (MAX_SCORE - MIN_SCORE) * weighted).astype(np.int64)
+
+
+def max_loan_amount(scores: np.ndarray, monthly_income: np.ndarray, term_months: int) -> np.ndarray:
+    """Largest principal offered: a score-dependent multiple of monthly income, scaled by term."""
+    multiple = np.select([scores >= 750, scores >= 650, scores >= 550, scores >= 500], [3.0, 2.0, 1.0, 0.5], default=0.0)
+    return np.round(multiple * monthly_income * min(max(term_months, 1), 24) / 12.0, 2)
+
+
+def score_one(doc: dict[str, Any]) -> dict[str, Any]:
+    f = features_from_docs([doc])
+    comps = components(f)
+    return {
+        'currentScore': int(score(f, comps)[0]),
+        'components': {name: float(values[0]) for name, values in comps.items()},
+    }
+
+
+def stored_fields(current_score: int, comps: dict[str, float]) -> dict[str, Any]:
+    """What a re-score persists on the credit_scores document, for one user or in bulk."""
+    return {'currentScore': current_score, 'scoreComponents': comps}
+
+
+def factors(doc: dict[str, Any]) -> list[dict[str, Any]]:
+    comps = score_one(doc)['components']
+    result = []
+    for name, weight in WEIGHTS.items():
+        value = comps[name]
+        result.append({
+            'factor': name,
+            'label': FACTOR_LABELS[name],
+            'value': round(value, 4),
+            'weight': weight,
+            'points': round(weight * value * (MAX_SCORE - MIN_SCORE), 1),
+            'impact': 'positive' if value >= 0.7 else 'negative' if value < 0.4 else 'neutral',
+        })
+    return sorted(result, key=lambda r: -r['weight'])
+
+
+def eligibility(doc: dict[str, Any], amount: float, term_months: int) -> dict[str, Any]:
+    f = features_from_docs([doc])
+    current = score(f)
+    max_amount = float(max_loan_amount(current, f['monthlyIncome'], term_months)[0])
+    return {
+        'eligible': max_amount > 0 and amount <= max_amount,
+        'maxAmount': max_amount,
+        'requestedAmount': amount,
+        'termMonths': term_months,
+        'currentScore': int(current[0]),
+    }
+
+
+def recalculate_user(payload: dict[str, Any]) -> dict[str, Any]:
+    """Task handler: re-score one user and persist the result."""
+    doc = CreditRepo.get_or_create(payload['userId'])
+    result = score_one(doc)
+    CreditRepo.update(payload['userId'], stored_fields(result['currentScore'], result['components']))
+    return {'currentScore': result['currentScore']}
+
+
+def recalculate_all(db, chunk_size: int = 5000, dry_run: bool = False, progress: Optional[Callable[[int], None]] = None) -> int:
+    """Re-score every credit_scores document: stream in id-ordered chunks, score each chunk as arrays, bulk-write."""
+    col = db.collection('credit_scores')
+    writer = None if dry_run else db.bulk_writer()
+    last = None
+    done = 0
+    while True:
+        q = col.select(['financialProfile', 'paymentPatterns', 'currentScore', 'scoreComponents']).order_by(FieldPath.document_id()).limit(chunk_size)
+        if last is not None:
+            q = q.start_after(last)
+        snaps = list(q.stream())
+        if not snaps:
+            break
+        docs = [s.to_dict() or {} for s in snaps]
+        f = features_from_docs(docs)
+        comps = components(f)
+        scores = score(f, comps)
+        if writer is not None:
+            stamp = now_ts()
+            columns = {name: values.tolist() for name, values in comps.items()}
+            for i, (snap, doc, new) in enumerate(zip(snaps, docs, scores.tolist())):
+                fields = stored_fields(new, {name: values[i] for name, values in columns.items()})
+                if any(doc.get(k) != v for k, v in fields.items()):
+                    writer.update(snap.reference, fields | {'updatedAt': stamp})
+        done += len(snaps)
+        last = snaps[-1]
+        if progress:
+            progress(done)
+    if writer is not None:
+        writer.close()
+    return done
@@ -0,0 +1,192 @@
+from __future__ import annotations
+import asyncio
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Optional
+import numpy as np
+from geopy.distance import EARTH_RADIUS
+from ..config import settings
+from ..utils import geohash
+from .async_repos import run_blocking
+from .firebase import get_db
+from .heatmap import AREA_NAMES, CATEGORY_NAMES, JobColumns, _CATEGORY_INDEX, _OTHER, job_coordinates, nearest_area
+from .repos import JobsRepo
+from .trends import EVENT_FIELDS, engine as trend_engine
+
+
+# Re-read window on every incremental sync, so writes landing mid-query aren't missed
+SYNC_OVERLAP_SECONDS = 5
+
+# Cells of ~4.9 x 4.9 km: a 10 km radius touches at most ~25 of them
+INDEX_PRECISION = 5
+INDEXED_STATUSES = ("active", "completed")
+
+
+def haversine_km(lat: np.ndarray, lng: np.ndarray, lat0: float, lng0: float) -> np.ndarray:
+    phi, phi0 = np.radians(lat), np.radians(lat0)
+    dphi = phi - phi0
+    dlmb = np.radians(lng - lng0)
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi) * np.cos(phi0) * np.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def geo_fields(job: dict[str, Any]) -> dict[str, Any]:
+    """Denormalised location fields written with every job, so queries never parse `location`."""
+    point = job_coordinates(job)
+    if point is None:
+        return {}
+    lat, lng = point
+    area = int(nearest_area(np.array([lat]), np.array([lng]))[0])
+    return {
+        "geo": {"lat": lat, "lng": lng},
+        "geohash": geohash.encode(lat, lng, 9),
+        "area": AREA_NAMES[area] if area >= 0 else None,
+    }
+
+
+def _row(job: dict[str, Any]) -> Optional[tuple]:
+    """(lat, lng, category index, price, created epoch) for a located job, else None."""
+    geo = job.get("geo") or {}
+    point = (geo.get("lat"), geo.get("lng")) if geo else job_coordinates(job)
+    if not point or point[0] is None:
+        return None
+    created = job.get("createdAt")
+    return (float(point[0]), float(point[1]), _CATEGORY_INDEX.get(job.get("category"), _OTHER), float(job.get("priceKes") or 0),
+            created.timestamp() if isinstance(created, datetime) else np.nan)
+
+
+def rank_nearby(ids: list[str], rows: np.ndarray, lat: float, lng: float, radius_km: float, category: Optional[str], limit: int) -> list[dict[str, Any]]:
+    """Candidates within `radius_km`, nearest first; distances are computed in one vectorised pass."""
+    if not ids:
+        return []
+    dist = haversine_km(rows[:, 0], rows[:, 1], lat, lng)
+    keep = dist <= radius_km
+    if category:
+        keep &= rows[:, 2] == _CATEGORY_INDEX.get(category, -1)
+    idx = np.flatnonzero(keep)
+    if len(idx) > limit:
+        idx = idx[np.argpartition(dist[idx], limit - 1)[:limit]]
+    idx = idx[np.argsort(dist[idx], kind="stable")]
+    return [
+        {
+            "id": ids[i],
+            "coordinates": {"latitude": float(rows[i, 0]), "longitude": float(rows[i, 1])},
+            "category": CATEGORY_NAMES[int(rows[i, 2])],
+            "priceKes": float(rows[i, 3]),
+            "distanceKm": round(float(dist[i]), 3),
+        }
+        for i in idx
+    ]
+
+
+def nearby_from_store(lat: float, lng: float, radius_km: float, category: Optional[str] = None, limit: int = 50) -> list[dict[str, Any]]:
+    """Same answer as JobGeoIndex.nearby, read from Firestore with geohash-prefix range queries.
+
+    Used until the in-memory index has finished its first sync.
+    """
+    box = geohash.radius_box(lat, lng, radius_km)
+    prefixes = geohash.covering(*box, geohash.precision_for(radius_km))
+    ids: list[str] = []
+    rows: list[tuple] = []
+    for job in JobsRepo.query_geohash(prefixes, category=category):
+        row = _row(job)
+        if row is not None and job.get("status") in INDEXED_STATUSES:
+            ids.append(job["id"])
+            rows.append(row)
+    return rank_nearby(ids, np.array(rows, dtype=np.float64).reshape(-1, 5), lat, lng, radius_km, category, limit)
+
+
+class JobGeoIndex:
+    """In-memory grid of located jobs bucketed by geohash cell, refreshed incrementally from Firestore."""
+
+    def __init__(self) -> None:
+        self._cells: dict[str, dict[str, tuple]] = {}
+        self._where: dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.synced_at: Optional[datetime] = None
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    @property
+    def ready(self) -> bool:
+        return self.synced_at is not None
+
+    def upsert(self, job: dict[str, Any]) -> None:
+        job_id = str(job.get("id"))
+        if job.get("status") not in INDEXED_STATUSES:
+            self.remove(job_id)
+            return
+        row = _row(job)
+        if row is None:
+            self.remove(job_id)
+            return
+        cell = geohash.encode(row[0], row[1], INDEX_PRECISION)
+        with self._lock:
+            old = self._where.get(job_id)
+            if old is not None and old != cell:
+                self._cells[old].pop(job_id, None)
+            self._cells.setdefault(cell, {})[job_id] = row
+            self._where[job_id] = cell
+
+    def remove(self, job_id: str) -> None:
+        with self._lock:
+            cell = self._where.pop(job_id, None)
+            if cell is not None:
+                self._cells[cell].pop(job_id, None)
+
+    def _candidates(self, south: float, west: float, north: float, east: float) -> tuple[list[str], np.ndarray]:
+        """Ids and rows (lat, lng, category, price, created) from the cells intersecting the box only."""
+        precision = min(INDEX_PRECISION, geohash.precision_for((north - south) * 110.574 / 8))
+        prefixes = geohash.covering(south, west, north, east, precision)
+        ids: list[str] = []
+        rows: list[tuple] = []
+        with self._lock:
+            if precision == INDEX_PRECISION:
+                buckets = [self._cells[c] for c in prefixes if c in self._cells]
+            else:
+                buckets = [b for c, b in self._cells.items() if c[:precision] in prefixes]
+            for bucket in buckets:
+                ids.extend(bucket)
+                rows.extend(bucket.values())
+        return ids, np.array(rows, dtype=np.float64).reshape(-1, 5)
+
+    def nearby(self, lat: float, lng: float, radius_km: float, category: Optional[str] = None, limit: int = 50) -> list[dict[str, Any]]:
+        ids, rows = self._candidates(*geohash.radius_box(lat, lng, radius_km))
+        return rank_nearby(ids, rows, lat, lng, radius_km, category, limit)
+
+    def columns(self, south: float, west: float, north: float, east: float, category: Optional[str] = None) -> JobColumns:
+        """Jobs inside the box as heatmap columns, read only from the covering cells."""
+        ids, rows = self._candidates(south, west, north, east)
+        keep = (rows[:, 0] >= south) & (rows[:, 0] <= north) & (rows[:, 1] >= west) & (rows[:, 1] <= east)
+        if category:
+            keep &= rows[:, 2] == _CATEGORY_INDEX.get(category, -1)
+        rows = rows[keep]
+        return JobColumns([ids[i] for i in np.flatnonzero(keep)], rows[:, 0], rows[:, 1], rows[:, 3], rows[:, 2].astype(np.int64), rows[:, 4])
+
+    def sync_from_store(self) -> int:
+        if get_db() is None:
+            return 0
+        started = datetime.utcnow()
+        since = self.synced_at - timedelta(seconds=SYNC_OVERLAP_SECONDS) if self.synced_at else None
+        # Only the few fields the trend counters need are kept for the whole pass
+        events = []
+        for job in JobsRepo.changed_since(since):
+            self.upsert(job)
+            events.append({k: job.get(k) for k in EVENT_FIELDS})
+        # The same change feed drives the trend counters: new postings are their events
+        trend_engine.observe_new(events, since, started, SYNC_OVERLAP_SECONDS)
+        self.synced_at = started
+        return len(events)
+
+
+job_index = JobGeoIndex()
+
+
+async def sync_forever() -> None:
+    while True:
+        try:
+            await run_blocking(job_index.sync_from_store)
+        except Exception:
+            pass  # serve from the current index; retry on the next tick
+        await asyncio.sleep(settings.job_index_sync_seconds)
@@ -0,0 +1,223 @@
+from __future__ import annotations
+from datetime import datetime
+from typing import Any, Optional
+import numpy as np
+
+
+JOB_CATEGORIES = {
+    'Boda Boda': { 'color': '#FF6B6B', 'icon': '🏍️', 'intensity': 1.0 },
+    'Mama Fua': { 'color': '#4ECDC4', 'icon': '👩‍💼', 'intensity': 0.8 },
+    'Delivery': { 'color': '#45B7D1', 'icon': '📦', 'intensity': 0.9 },
+    'Cleaning': { 'color': '#96CEB4', 'icon': '🧹', 'intensity': 0.7 },
+    'Construction': { 'color': '#FFEAA7', 'icon': '🔨', 'intensity': 0.6 },
+    'Gardening': { 'color': '#DDA0DD', 'icon': '🌱', 'intensity': 0.5 },
+    'Other': { 'color': '#98D8C8', 'icon': '💼', 'intensity': 0.4 },
+}
+
+KENYA_AREAS = {
+    'Nairobi': {
+        'coordinates': { 'latitude': -1.2921, 'longitude': 36.8219 },
+        'districts': ['CBD', 'Westlands', 'Kilimani', 'Karen', 'Runda', 'Kasarani', 'Eastleigh']
+    },
+    'Mombasa': {
+        'coordinates': { 'latitude': -4.0435, 'longitude': 39.6682 },
+        'districts': ['Mombasa Island', 'Nyali', 'Bamburi', 'Diani']
+    },
+    'Kisumu': {
+        'coordinates': { 'latitude': -0.0917, 'longitude': 34.7680 },
+        'districts': ['Kisumu Central', 'Kondele', 'Mamboleo']
+    },
+    'Nakuru': {
+        'coordinates': { 'latitude': -0.3072, 'longitude': 36.0800 },
+        'districts': ['Nakuru Town', 'Lanet', 'Kiamunyi']
+    },
+    'Eldoret': {
+        'coordinates': { 'latitude': 0.5143, 'longitude': 35.2698 },
+        'districts': ['Eldoret Central', 'Langas', 'Huruma']
+    },
+    'Thika': {
+        'coordinates': { 'latitude': -1.0333, 'longitude': 37.0833 },
+        'districts': ['Thika Town', 'Makongeni', 'Kiganjo']
+    },
+    'Malindi': {
+        'coordinates': { 'latitude': -3.2175, 'longitude': 40.1191 },
+        'districts': ['Malindi Town', 'Watamu', 'Kilifi']
+    },
+    'Nyeri': {
+        'coordinates': { 'latitude': -0.4201, 'longitude': 36.9476 },
+        'districts': ['Nyeri Town', 'Karatina', 'Mukurwe-ini']
+    },
+    'Meru': {
+        'coordinates': { 'latitude': 0.0463, 'longitude': 37.6559 },
+        'districts': ['Meru Town', 'Maua', 'Chuka']
+    },
+    'Kakamega': {
+        'coordinates': { 'latitude': 0.2827, 'longitude': 34.7519 },
+        'districts': ['Kakamega Town', 'Mumias', 'Butere']
+    },
+}
+
+CATEGORY_NAMES = list(JOB_CATEGORIES)
+AREA_NAMES = list(KENYA_AREAS)
+AREA_COORDS = np.array([[a['coordinates']['latitude'], a['coordinates']['longitude']] for a in KENYA_AREAS.values()])
+_CATEGORY_INDEX = {name: i for i, name in enumerate(CATEGORY_NAMES)}
+_OTHER = _CATEGORY_INDEX['Other']
+_AREA_BY_LOWER = {name.lower(): name for name in AREA_NAMES}
+
+DEFAULT_CELL_DEG = 0.01  # ~1.1 km at the equator
+AREA_RADIUS_KM = 75.0
+_KM_PER_DEG = 111.32
+
+
+class JobColumns:
+    """Columnar view of a job list: one NumPy array per field the aggregations need."""
+
+    def __init__(self, ids: list[str], lat: np.ndarray, lng: np.ndarray, price: np.ndarray, category: np.ndarray, created: np.ndarray) -> None:
+        self.ids = ids
+        self.lat = lat
+        self.lng = lng
+        self.price = price
+        self.category = category
+        self.created = created  # epoch seconds, NaN when unknown
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def from_jobs(cls, jobs: list[dict[str, Any]]) -> "JobColumns":
+        n = len(jobs)
+        lat = np.full(n, np.nan)
+        lng = np.full(n, np.nan)
+        price = np.zeros(n)
+        category = np.full(n, _OTHER, dtype=np.int64)
+        created = np.full(n, np.nan)
+        ids: list[str] = []
+        for i, job in enumerate(jobs):
+            ids.append(str(job.get('id', '')))
+            point = job_coordinates(job)
+            if point:
+                lat[i], lng[i] = point
+            price[i] = float(job.get('priceKes') or 0)
+            category[i] = _CATEGORY_INDEX.get(job.get('category'), _OTHER)
+            ts = job.get('createdAt')
+            if isinstance(ts, datetime):
+                created[i] = ts.timestamp()
+        return cls(ids, lat, lng, price, category, created)
+
+
+def job_coordinates(job: dict[str, Any]) -> Optional[tuple[float, float]]:
+    """(lat, lng) from location.coordinates, else the centre of the area named in location.city."""
+    location = job.get('location') or {}
+    coords = location.get('coordinates') if isinstance(location, dict) else None
+    if isinstance(coords, dict) and coords.get('latitude') is not None and coords.get('longitude') is not None:
+        return float(coords['latitude']), float(coords['longitude'])
+    city = str(location.get('city') or location.get('address') or '').lower() if isinstance(location, dict) else str(location).lower()
+    for name, area in KENYA_AREAS.items():
+        if name.lower() in city:
+            return area['coordinates']['latitude'], area['coordinates']['longitude']
+    return None
+
+
+def area_named(text: str) -> Optional[str]:
+    """The KENYA_AREAS name `text` refers to (case-insensitive), if any."""
+    return _AREA_BY_LOWER.get(text.strip().lower())
+
+
+def nearest_area(lat: np.ndarray, lng: np.ndarray, max_km: float = AREA_RADIUS_KM) -> np.ndarray:
+    """Index into AREA_NAMES of the closest area per point, -1 when none is within max_km."""
+    dlat = lat[:, None] - AREA_COORDS[None, :, 0]
+    dlng = (lng[:, None] - AREA_COORDS[None, :, 1]) * np.cos(np.radians(lat))[:, None]
+    dist2 = dlat * dlat + dlng * dlng
+    idx = np.argmin(dist2, axis=1) if len(lat) else np.zeros(0, dtype=np.int64)
+    best = np.sqrt(dist2[np.arange(len(lat)), idx]) * _KM_PER_DEG if len(lat) else np.zeros(0)
+    return np.where(np.isfinite(best) & (best <= max_km), idx, -1)
+
+
+def intensity_levels(price: np.ndarray) -> np.ndarray:
+    return np.select([price >= 2000, price >= 1000, price >= 500, price >= 200], [1.0, 0.8, 0.6, 0.4], default=0.2)
+
+
+def _group_min_max(values: np.ndarray, groups: np.ndarray, n_groups: int) -> tuple[np.ndarray, np.ndarray]:
+    order = np.lexsort((values, groups))
+    sorted_groups = groups[order]
+    starts = np.searchsorted(sorted_groups, np.arange(n_groups), side='left')
+    ends = np.searchsorted(sorted_groups, np.arange(n_groups), side='right') - 1
+    sorted_values = values[order]
+    return sorted_values[starts], sorted_values[ends]
+
+
+def category_distribution(category: np.ndarray, price: np.ndarray) -> dict[str, dict[str, float]]:
+    n_cat = len(CATEGORY_NAMES)
+    counts = np.bincount(category, minlength=n_cat)
+    sums = np.bincount(category, weights=price, minlength=n_cat)
+    total = int(counts.sum())
+    return {
+        name: {
+            'count': int(counts[i]),
+            'percentage': float(counts[i] / total * 100) if total else 0,
+            'averagePrice': float(sums[i] / counts[i]) if counts[i] else 0,
+        }
+        for i, name in enumerate(CATEGORY_NAMES)
+    }
+
+
+def build_job_heatmap(jobs: list[dict[str, Any]] | JobColumns, cell_deg: float = DEFAULT_CELL_DEG) -> dict[str, Any]:
+    """Aggregate jobs into grid cells plus the area/category/hour statistics the heatmap endpoint serves."""
+    cols = jobs if isinstance(jobs, JobColumns) else JobColumns.from_jobs(jobs)
+    n = len(cols)
+    located = np.isfinite(cols.lat) & np.isfinite(cols.lng)
+    lat, lng, price, cat = cols.lat[located], cols.lng[located], cols.price[located], cols.category[located]
+
+    area_idx = nearest_area(lat, lng)
+    area_counts = np.bincount(area_idx[area_idx >= 0], minlength=len(AREA_NAMES))
+
+    points: list[dict[str, Any]] = []
+    if len(lat):
+        row = np.floor(lat / cell_deg).astype(np.int64)
+        col = np.floor(lng / cell_deg).astype(np.int64)
+        keys = (row - row.min()) * (col.max() - col.min() + 1) + (col - col.min())
+        cells, inverse = np.unique(keys, return_inverse=True)
+        n_cells = len(cells)
+        counts = np.bincount(inverse, minlength=n_cells)
+        price_sum = np.bincount(inverse, weights=price, minlength=n_cells)
+        lat_mean = np.bincount(inverse, weights=lat, minlength=n_cells) / counts
+        lng_mean = np.bincount(inverse, weights=lng, minlength=n_cells) / counts
+        price_min, price_max = _group_min_max(price, inverse, n_cells)
+        n_cat = len(CATEGORY_NAMES)
+        dominant = np.bincount(inverse * n_cat + cat, minlength=n_cells * n_cat).reshape(n_cells, n_cat).argmax(axis=1)
+        avg_price = price_sum / counts
+        intensity = intensity_levels(avg_price)
+        cell_area = nearest_area(lat_mean, lng_mean)
+        for i in range(n_cells):
+            category = CATEGORY_NAMES[dominant[i]]
+            points.append({
+                'coordinates': {'latitude': float(lat_mean[i]), 'longitude': float(lng_mean[i])},
+                'count': int(counts[i]),
+                'category': category,
+                'price': float(avg_price[i]),
+                'minPrice': float(price_min[i]),
+                'maxPrice': float(price_max[i]),
+                'intensity': float(intensity[i]),
+                'color': JOB_CATEGORIES[category]['color'],
+                'icon': JOB_CATEGORIES[category]['icon'],
+                'area': AREA_NAMES[cell_area[i]] if cell_area[i] >= 0 else None,
+            })
+
+    created = cols.created[np.isfinite(cols.created)]
+    hours = np.bincount(((created // 3600) % 24).astype(np.int64), minlength=24)
+    area_distribution = {name: int(area_counts[i]) for i, name in enumerate(AREA_NAMES)}
+    return {
+        'heatmap': {
+            'points': points,
+            'areaCounts': area_distribution,
+            'totalJobs': n,
+        },
+        'statistics': {
+            'totalJobs': n,
+            'averagePrice': float(cols.price.mean()) if n else 0,
+            'priceRange': {'min': float(cols.price.min()) if n else 0, 'max': float(cols.price.max()) if n else 0},
+            'categoryDistribution': category_distribution(cols.category, cols.price),
+            'areaDistribution': area_distribution,
+            'timeDistribution': {str(h): int(c) for h, c in enumerate(hours) if c},
+        },
+    }
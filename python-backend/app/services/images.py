@@ -0,0 +1,129 @@
+from __future__ import annotations
+import asyncio
+import hashlib
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+from ..config import settings
+
+
+# Longest edge, in pixels, of each pre-generated profile image variant
+VARIANT_SIZES = {"small": 96, "medium": 256, "large": 768}
+ACCEPTED_FORMATS = {"PNG", "JPEG", "WEBP"}
+
+Image.MAX_IMAGE_PIXELS = settings.image_max_pixels
+
+
+class ImageRejected(Exception):
+    def __init__(self, code: str, message: str) -> None:
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+@dataclass(frozen=True)
+class Variant:
+    size: str
+    data: bytes
+    content_type: str
+    extension: str
+    width: int
+    height: int
+
+    @property
+    def digest(self) -> str:
+        return hashlib.sha256(self.data).hexdigest()[:20]
+
+    def filename(self, user_id: str) -> str:
+        # Content-hashed: a new upload never reuses a name, so caches can never serve a stale avatar
+        return f"{user_id}_{self.size}_{self.digest}.{self.extension}"
+
+
+def _open(source: bytes | Path) -> Image.Image:
+    if isinstance(source, bytes) and len(source) > settings.profile_image_max_bytes:
+        raise ImageRejected("IMAGE_TOO_LARGE", "Image exceeds the upload size limit")
+    try:
+        img = Image.open(io.BytesIO(source) if isinstance(source, bytes) else source)
+        if img.format not in ACCEPTED_FORMATS:
+            raise ImageRejected("UNSUPPORTED_IMAGE", "Unsupported image type")
+        img.load()
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError):
+        raise ImageRejected("INVALID_IMAGE", "File is not a readable image")
+    return img
+
+
+def inspect(source: bytes | Path) -> dict:
+    img = _open(source)
+    return {"format": img.format, "width": img.width, "height": img.height}
+
+
+def _encode(img: Image.Image) -> tuple[bytes, str, str]:
+    buf = io.BytesIO()
+    # Nothing from the original (EXIF, GPS, ICC, comments) is passed to save(), so no metadata survives
+    if features.check("webp"):
+        img.save(buf, "WEBP", quality=settings.image_quality, method=4)
+        return buf.getvalue(), "image/webp", "webp"
+    img.convert("RGB").save(buf, "JPEG", quality=settings.image_quality, optimize=True, progressive=True)
+    return buf.getvalue(), "image/jpeg", "jpg"
+
+
+def build_variants(source: bytes | Path) -> list[Variant]:
+    """Validate an upload and re-encode it into every VARIANT_SIZES size, metadata stripped."""
+    img = _open(source)
+    # Bake the EXIF orientation into the pixels before the metadata is dropped
+    img = ImageOps.exif_transpose(img)
+    img = img.convert("RGBA" if img.mode in ("RGBA", "LA", "P") else "RGB")
+    variants = []
+    for size, edge in VARIANT_SIZES.items():
+        scaled = img.copy()
+        scaled.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+        body, content_type, ext = _encode(scaled)
+        variants.append(Variant(size, body, content_type, ext, scaled.width, scaled.height))
+    return variants
+
+
+def store_variants(user_id: str, variants: list[Variant], directory: Path) -> dict[str, str]:
+    """Write each variant atomically (temp file + rename); returns {size: filename}."""
+    names = {}
+    for v in variants:
+        name = v.filename(user_id)
+        tmp = directory / f".{name}.tmp"
+        tmp.write_bytes(v.data)
+        os.replace(tmp, directory / name)
+        names[v.size] = name
+    return names
+
+
+def remove_files(names, directory: Path) -> None:
+    for name in names:
+        (directory / name).unlink(missing_ok=True)
+
+
+_pool: Optional[ThreadPoolExecutor] = None
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        # Pillow releases the GIL while resampling and encoding, so threads scale here
+        _pool = ThreadPoolExecutor(max_workers=settings.image_workers, thread_name_prefix="images")
+    return _pool
+
+
+async def process(source: bytes | Path) -> list[Variant]:
+    return await asyncio.get_running_loop().run_in_executor(_get_pool(), build_variants, source)
+
+
+async def validate(source: bytes | Path) -> dict:
+    return await asyncio.get_running_loop().run_in_executor(_get_pool(), inspect, source)
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
@@ -0,0 +1,258 @@
+from __future__ import annotations
+import asyncio
+import os
+import pickle
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Optional
+from google.cloud.firestore import transactional
+from ..config import settings
+from .async_repos import run_blocking
+from .cache import invalidate_tags
+from .firebase import get_db
+from .repos import GamificationRepo, now_ts
+
+
+# Leaderboard `type` -> field of the gamification document it ranks
+LEADERBOARD_FIELDS = {"points": "points", "streak": "streakDays", "savings": "savingsPoints"}
+
+MAX_LEVEL = 32
+
+
+class _Node:
+    __slots__ = ("key", "next", "width")
+
+    def __init__(self, key: Any, level: int) -> None:
+        self.key = key
+        self.next: list[Any] = [None] * level
+        # width[i]: how many bottom-level steps next[i] jumps over
+        self.width = [1] * level
+
+
+class IndexableSkipList:
+    """Sorted set of unique keys with O(log n) insert, remove, rank and positional access."""
+
+    def __init__(self) -> None:
+        self._nil = _Node(None, 0)
+        self._head = _Node(None, MAX_LEVEL)
+        self._head.next = [self._nil] * MAX_LEVEL
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @staticmethod
+    def _level() -> int:
+        level = 1
+        while level < MAX_LEVEL and random.random() < 0.5:
+            level += 1
+        return level
+
+    def _chain(self, key: Any) -> tuple[list[_Node], list[int]]:
+        """Rightmost node before `key` on every level, and the steps taken at each level."""
+        chain: list[_Node] = [self._head] * MAX_LEVEL
+        steps = [0] * MAX_LEVEL
+        node = self._head
+        for i in reversed(range(MAX_LEVEL)):
+            while node.next[i] is not self._nil and node.next[i].key < key:
+                steps[i] += node.width[i]
+                node = node.next[i]
+            chain[i] = node
+        return chain, steps
+
+    def insert(self, key: Any) -> None:
+        chain, steps_at = self._chain(key)
+        level = self._level()
+        node = _Node(key, level)
+        steps = 0
+        for i in range(level):
+            prev = chain[i]
+            node.next[i] = prev.next[i]
+            prev.next[i] = node
+            node.width[i] = prev.width[i] - steps
+            prev.width[i] = steps + 1
+            steps += steps_at[i]
+        for i in range(level, MAX_LEVEL):
+            chain[i].width[i] += 1
+        self._size += 1
+
+    def remove(self, key: Any) -> None:
+        chain, _ = self._chain(key)
+        node = chain[0].next[0]
+        if node is self._nil or node.key != key:
+            raise KeyError(key)
+        for i in range(len(node.next)):
+            prev = chain[i]
+            prev.width[i] += node.width[i] - 1
+            prev.next[i] = node.next[i]
+        for i in range(len(node.next), MAX_LEVEL):
+            chain[i].width[i] -= 1
+        self._size -= 1
+
+    def rank(self, key: Any) -> Optional[int]:
+        """0-based position of `key`, or None if absent."""
+        chain, steps = self._chain(key)
+        node = chain[0].next[0]
+        if node is self._nil or node.key != key:
+            return None
+        return sum(steps)
+
+    def slice(self, start: int, stop: int) -> list[Any]:
+        start, stop = max(start, 0), min(stop, self._size)
+        if start >= stop:
+            return []
+        node, remaining = self._head, start + 1
+        for i in reversed(range(MAX_LEVEL)):
+            while node.width[i] <= remaining:
+                remaining -= node.width[i]
+                node = node.next[i]
+        out = []
+        for _ in range(stop - start):
+            out.append(node.key)
+            node = node.next[0]
+        return out
+
+
+class Board:
+    """One ranked leaderboard: highest score first, ties broken by user id."""
+
+    def __init__(self) -> None:
+        self._ranked = IndexableSkipList()
+        self._scores: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def update(self, user_id: str, score: float) -> None:
+        with self._lock:
+            old = self._scores.get(user_id)
+            if old == score:
+                return
+            if old is not None:
+                self._ranked.remove((-old, user_id))
+            self._scores[user_id] = score
+            self._ranked.insert((-score, user_id))
+
+    def rank(self, user_id: str) -> Optional[int]:
+        """1-based rank, or None for users without a score."""
+        with self._lock:
+            score = self._scores.get(user_id)
+            if score is None:
+                return None
+            return self._ranked.rank((-score, user_id)) + 1
+
+    def score(self, user_id: str) -> Optional[float]:
+        return self._scores.get(user_id)
+
+    def page(self, offset: int, limit: int) -> list[dict[str, Any]]:
+        with self._lock:
+            keys = self._ranked.slice(offset, offset + limit)
+        return [{"rank": offset + i + 1, "userId": uid, "score": -neg} for i, (neg, uid) in enumerate(keys)]
+
+    def scores(self) -> dict[str, float]:
+        with self._lock:
+            return dict(self._scores)
+
+
+class Leaderboards:
+    def __init__(self) -> None:
+        self.boards = {name: Board() for name in LEADERBOARD_FIELDS}
+        self.synced_at: Optional[datetime] = None
+        self._last_snapshot = 0.0
+
+    def board(self, name: str) -> Optional[Board]:
+        return self.boards.get(name)
+
+    def apply(self, doc: dict[str, Any]) -> None:
+        for name, field in LEADERBOARD_FIELDS.items():
+            value = doc.get(field)
+            if value is not None:
+                self.boards[name].update(doc["userId"], float(value))
+
+    def sync_from_store(self) -> int:
+        """Fold in every gamification document changed since the last sync (all of them on a cold start)."""
+        if get_db() is None:
+            return 0
+        started = datetime.utcnow()
+        since = self.synced_at - timedelta(seconds=5) if self.synced_at else None
+        count = 0
+        for doc in GamificationRepo.changed_since(since, list(LEADERBOARD_FIELDS.values())):
+            self.apply(doc)
+            count += 1
+        if count:
+            invalidate_tags(*(f"leaderboard:{name}" for name in self.boards))
+        self.synced_at = started
+        return count
+
+    def save_snapshot(self, path: Path) -> None:
+        payload = {"syncedAt": self.synced_at, "boards": {name: b.scores() for name, b in self.boards.items()}}
+        tmp = path.with_name(f".{path.name}.tmp")
+        tmp.parent.mkdir(parents=True, exist_ok=True)
+        tmp.write_bytes(pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL))
+        os.replace(tmp, path)
+        self._last_snapshot = time.time()
+
+    def load_snapshot(self, path: Path) -> bool:
+        """Restore boards from a snapshot so startup only has to sync what changed since."""
+        try:
+            payload = pickle.loads(path.read_bytes())
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return False
+        for name, scores in payload.get("boards", {}).items():
+            board = self.boards.get(name)
+            if board is not None:
+                for uid, score in scores.items():
+                    board.update(uid, score)
+        self.synced_at = payload.get("syncedAt")
+        return True
+
+    def tick(self) -> None:
+        if self.synced_at is None:
+            self.load_snapshot(settings.leaderboard_snapshot_path)
+        self.sync_from_store()
+        if time.time() - self._last_snapshot >= settings.leaderboard_snapshot_seconds:
+            self.save_snapshot(settings.leaderboard_snapshot_path)
+
+
+leaderboards = Leaderboards()
+
+
+class InsufficientPoints(Exception):
+    code = "INSUFFICIENT_POINTS"
+
+
+@transactional
+def _adjust_in_txn(txn, ref, delta: int) -> dict[str, Any]:
+    snap = ref.get(transaction=txn)
+    data = (snap.to_dict() or {}) if snap.exists else GamificationRepo.default_doc()
+    points = int(data.get("points", 0)) + delta
+    if points < 0:
+        raise InsufficientPoints("Not enough points")
+    data["points"] = points
+    if delta < 0:
+        data["redeemedPoints"] = int(data.get("redeemedPoints", 0)) - delta
+    data["updatedAt"] = now_ts()
+    txn.set(ref, data)
+    return data
+
+
+def adjust_points(user_id: str, delta: int) -> dict[str, Any]:
+    """Atomically add (or, negative, redeem) points and re-rank the user in place."""
+    db = get_db()
+    data = _adjust_in_txn(db.transaction(max_attempts=settings.wallet_txn_attempts), GamificationRepo.col().document(user_id), delta)
+    leaderboards.apply(data | {"userId": user_id})
+    invalidate_tags(*(f"leaderboard:{name}" for name in leaderboards.boards))
+    return data
+
+
+async def sync_forever() -> None:
+    while True:
+        try:
+            await run_blocking(leaderboards.tick)
+        except Exception:
+            pass  # keep serving the current boards; retry on the next tick
+        await asyncio.sleep(settings.leaderboard_sync_seconds)
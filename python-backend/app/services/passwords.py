@@ -0,0 +1,68 @@
+from __future__ import annotations
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+from passlib.context import CryptContext
+from ..config import settings
+
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.bcrypt_rounds)
+
+
+class PasswordPoolSaturated(Exception):
+    """Raised instead of queueing when every hashing slot is taken."""
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify(password: str, password_hash: str) -> tuple[bool, bool]:
+    try:
+        ok = pwd_context.verify(password, password_hash)
+    except (ValueError, TypeError):
+        return False, False
+    return ok, ok and pwd_context.needs_update(password_hash)
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_inflight = 0
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: forking a process that already runs gRPC/Firestore threads is unsafe.
+        # Workers import only this module (app/__init__ is lazy), i.e. config + passlib.
+        _pool = ProcessPoolExecutor(max_workers=settings.password_pool_size, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+async def _submit(fn, *args):
+    global _inflight
+    if _inflight >= settings.password_pool_size + settings.password_queue_depth:
+        raise PasswordPoolSaturated()
+    _inflight += 1
+    try:
+        return await asyncio.wrap_future(_get_pool().submit(fn, *args))
+    finally:
+        _inflight -= 1
+
+
+async def hash_password(password: str) -> str:
+    return await _submit(_hash, password)
+
+
+async def verify_password(password: str, password_hash: str) -> tuple[bool, bool]:
+    """Returns (valid, needs_rehash); needs_rehash is set when the stored cost parameters are outdated."""
+    if not password_hash:
+        return False, False
+    return await _submit(_verify, password, password_hash)
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
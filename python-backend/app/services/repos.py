@@ -1,26 +1,130 @@
 from __future__ import annotations
-from typing import Any, Optional
-from datetime import datetime, timedelta
-from passlib.context import CryptContext
+import copy
+import hashlib
+from typing import Any, Iterator, Optional
+from datetime import date, datetime, timedelta
+from google.api_core.exceptions import AlreadyExists
+from google.cloud.firestore import DELETE_FIELD, FieldPath, Increment
+from .cache import get_cache, invalidate_tags
 from .firebase import get_db, get_bucket
-
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from .rollups import as_datetime, rollup_id, rollup_ids, rollup_increments
+from ..config import settings
+from ..utils.pagination import encode_cursor, decode_cursor
+from ..utils.ids import new_id
+from ..utils.phone import to_e164
 
 
 def now_ts() -> datetime:
     return datetime.utcnow()
 
 
+def _merge(doc: dict[str, Any], updates: dict[str, Any]) -> dict[str, Any]:
+    """Apply a set(merge=True) payload to a local copy of the document."""
+    for key, value in updates.items():
+        if value is DELETE_FIELD:
+            doc.pop(key, None)
+        elif isinstance(value, dict) and isinstance(doc.get(key), dict):
+            _merge(doc[key], value)
+        else:
+            doc[key] = value
+    return doc
+
+
+def _paginate(col, q, order_field: str, limit: int, cursor: Optional[str] = None, page: int = 1) -> tuple[list, Optional[str]]:
+    """Keyset pagination over `order_field` DESC with the document id as tiebreaker.
+
+    Reads at most `limit + 1` documents; the extra one only signals whether a next
+    page exists. Without a cursor, `page` falls back to a server-side offset.
+    """
+    q = q.order_by(order_field, direction="DESCENDING").order_by(FieldPath.document_id(), direction="DESCENDING")
+    if cursor:
+        value, doc_id = decode_cursor(cursor)
+        if value is None:
+            # Id-only cursor: let Firestore read the sort value back from the document
+            snap = col.document(doc_id).get()
+            if not snap.exists:
+                raise ValueError("Invalid cursor")
+            q = q.start_after(snap)
+        else:
+            q = q.start_after({order_field: value, FieldPath.document_id(): col.document(doc_id)})
+    elif page > 1:
+        q = q.offset((page - 1) * limit)
+    docs = list(q.limit(limit + 1).stream())
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        last = docs[-1]
+        next_cursor = encode_cursor((last.to_dict() or {}).get(order_field), last.id)
+    return docs, next_cursor
+
+
+# Per-user document counts, maintained on write so list totals cost one read
+class CountersRepo:
+    @staticmethod
+    def col():
+        return get_db().collection("user_counters")
+
+    @staticmethod
+    def ref(user_id: str):
+        return CountersRepo.col().document(user_id)
+
+    @staticmethod
+    def increment_in(batch, user_id: str, field: str, amount: int = 1) -> None:
+        batch.set(CountersRepo.ref(user_id), {field: Increment(amount), "updatedAt": now_ts()}, merge=True)
+
+    @staticmethod
+    def get(user_id: str, field: str) -> int:
+        doc = CountersRepo.ref(user_id).get()
+        if doc.exists:
+            return int((doc.to_dict() or {}).get(field, 0))
+        return 0
+
+
 # Users
 class UsersRepo:
     @staticmethod
     def _col():
         return get_db().collection("users")
 
+    @staticmethod
+    def _with_phone_index(data: dict[str, Any]) -> dict[str, Any]:
+        if data.get("phoneNumber"):
+            data["phoneE164"] = to_e164(data["phoneNumber"])
+        return data
+
+    @staticmethod
+    def _cache_key(user_id: str) -> str:
+        return f"user:{user_id}"
+
     @staticmethod
     def create_user(user_id: str, data: dict[str, Any]) -> None:
-        UsersRepo._col().document(user_id).set(data | {"createdAt": now_ts(), "updatedAt": now_ts()})
+        UsersRepo._col().document(user_id).set(UsersRepo._with_phone_index(data) | {"createdAt": now_ts(), "updatedAt": now_ts()})
+        get_cache().delete(UsersRepo._cache_key(user_id))
+        invalidate_tags(UsersRepo._cache_key(user_id))
+
+    @staticmethod
+    def _marker_id(value: str) -> str:
+        return hashlib.sha256(value.encode()).hexdigest()
+
+    @staticmethod
+    def register(user_id: str, data: dict[str, Any]) -> None:
+        """Create the user, wallet and credit-score documents in one batched write.
+
+        Marker documents keyed by the email and phone make uniqueness race-free:
+        `create` fails the whole batch with AlreadyExists if either is taken.
+        """
+        db = get_db()
+        data = UsersRepo._with_phone_index(data) | {"createdAt": now_ts(), "updatedAt": now_ts()}
+        marker = {"userId": user_id, "createdAt": now_ts()}
+        batch = db.batch()
+        batch.create(db.collection("unique_emails").document(UsersRepo._marker_id(data["email"])), marker)
+        batch.create(db.collection("unique_phones").document(UsersRepo._marker_id(data.get("phoneE164") or data["phoneNumber"])), marker)
+        batch.create(UsersRepo._col().document(user_id), data)
+        batch.create(WalletsRepo._col().document(user_id), WalletsRepo.default_doc())
+        batch.create(CreditRepo.col().document(user_id), CreditRepo.default_doc())
+        batch.commit()
+        get_cache().delete(UsersRepo._cache_key(user_id), WalletsRepo._cache_key(user_id), CreditRepo._cache_key(user_id))
+        invalidate_tags(UsersRepo._cache_key(user_id))
 
     @staticmethod
     def find_by_email(email: str) -> Optional[dict[str, Any]]:
@@ -40,28 +144,79 @@ class UsersRepo:
             return obj
         return None
 
+    @staticmethod
+    def find_by_phone_e164(phone_e164: str) -> Optional[dict[str, Any]]:
+        docs = UsersRepo._col().where("phoneE164", "==", phone_e164).limit(1).stream()
+        for d in docs:
+            obj = d.to_dict()
+            obj["userId"] = d.id
+            return obj
+        return None
+
+    @staticmethod
+    def find_by_phone_variants(variants: list[str]) -> Optional[dict[str, Any]]:
+        # Single `in` query over raw phoneNumber spellings, for records not yet backfilled
+        if not variants:
+            return None
+        docs = UsersRepo._col().where("phoneNumber", "in", variants[:30]).limit(1).stream()
+        for d in docs:
+            obj = d.to_dict()
+            obj["userId"] = d.id
+            return obj
+        return None
+
     @staticmethod
     def find_by_id(user_id: str) -> Optional[dict[str, Any]]:
+        cached = get_cache().get(UsersRepo._cache_key(user_id))
+        if cached is not None:
+            return cached
         doc = UsersRepo._col().document(user_id).get()
         if doc.exists:
             obj = doc.to_dict() or {}
             obj["userId"] = doc.id
+            get_cache().set(UsersRepo._cache_key(user_id), obj, ttl=settings.entity_cache_ttl)
             return obj
         return None
 
     @staticmethod
     def update_profile(user_id: str, updates: dict[str, Any]) -> dict[str, Any]:
+        # Read (usually a cache hit) before writing so the merged result needs no second read
+        current = UsersRepo.find_by_id(user_id) or {"userId": user_id}
+        UsersRepo._with_phone_index(updates)
         updates["updatedAt"] = now_ts()
-        UsersRepo._col().document(user_id).set(updates, merge=True)
-        return UsersRepo.find_by_id(user_id) or {}
+        old_key = current.get("phoneE164") or current.get("phoneNumber")
+        new_key = (updates.get("phoneE164") or updates.get("phoneNumber")) if "phoneNumber" in updates else old_key
+        if new_key and new_key != old_key:
+            UsersRepo._change_phone(user_id, old_key, new_key, updates)
+        else:
+            UsersRepo._col().document(user_id).set(updates, merge=True)
+        merged = _merge(current, updates)
+        get_cache().set(UsersRepo._cache_key(user_id), merged, ttl=settings.entity_cache_ttl)
+        # Cached responses tagged "user:<id>" (the public profile) go stale with the document
+        invalidate_tags(UsersRepo._cache_key(user_id))
+        return merged
 
     @staticmethod
-    def hash_password(password: str) -> str:
-        return pwd_context.hash(password)
-
-    @staticmethod
-    def verify_password(password: str, password_hash: str) -> bool:
-        return pwd_context.verify(password, password_hash)
+    def _change_phone(user_id: str, old_key: Optional[str], new_key: str, updates: dict[str, Any]) -> None:
+        """Write `updates` while moving the unique_phones marker, all in one batch.
+
+        Raises AlreadyExists when another user holds the number: through the marker's
+        `create`, or through the lookup for users registered before markers existed.
+        """
+        other = UsersRepo.find_by_phone_e164(new_key) if new_key.startswith("+") else UsersRepo.find_by_phone(new_key)
+        if other and other["userId"] != user_id:
+            raise AlreadyExists("Phone number already registered")
+        db = get_db()
+        markers = db.collection("unique_phones")
+        batch = db.batch()
+        batch.create(markers.document(UsersRepo._marker_id(new_key)), {"userId": user_id, "createdAt": now_ts()})
+        if old_key:
+            old_marker = markers.document(UsersRepo._marker_id(old_key))
+            snap = old_marker.get()
+            if snap.exists and (snap.to_dict() or {}).get("userId") == user_id:
+                batch.delete(old_marker)
+        batch.set(UsersRepo._col().document(user_id), updates, merge=True)
+        batch.commit()
 
 
 # Wallets
@@ -70,31 +225,48 @@ class WalletsRepo:
     def _col():
         return get_db().collection("wallets")
 
+    @staticmethod
+    def default_doc() -> dict[str, Any]:
+        return {
+            "balances": {"KES": 0.0, "USDT": 0.0, "USD": 0.0},
+            "hasPin": False,
+            "isPinLocked": False,
+            "isFrozen": False,
+            "status": "active",
+            "dailyLimits": {"KES": {"deposit": 100000, "withdrawal": 50000}},
+            "dailyUsage": {"KES": {"deposit": 0, "withdrawal": 0}},
+            "statistics": {},
+            "createdAt": now_ts(),
+            "updatedAt": now_ts(),
+        }
+
+    @staticmethod
+    def _cache_key(user_id: str) -> str:
+        return f"wallet:{user_id}"
+
+    @staticmethod
+    def invalidate(user_id: str) -> None:
+        get_cache().delete(WalletsRepo._cache_key(user_id))
+
     @staticmethod
     def get_or_create(user_id: str) -> dict[str, Any]:
+        cached = get_cache().get(WalletsRepo._cache_key(user_id))
+        if cached is not None:
+            return cached
         doc_ref = WalletsRepo._col().document(user_id)
         doc = doc_ref.get()
         if not doc.exists:
-            data = {
-                "balances": {"KES": 0.0, "USDT": 0.0, "USD": 0.0},
-                "hasPin": False,
-                "isPinLocked": False,
-                "isFrozen": False,
-                "status": "active",
-                "dailyLimits": {"KES": {"deposit": 100000, "withdrawal": 50000}},
-                "dailyUsage": {"KES": {"deposit": 0, "withdrawal": 0}},
-                "statistics": {},
-                "createdAt": now_ts(),
-                "updatedAt": now_ts(),
-            }
+            data = WalletsRepo.default_doc()
             doc_ref.set(data)
-            return data
-        data = doc.to_dict() or {}
+        else:
+            data = doc.to_dict() or {}
+        get_cache().set(WalletsRepo._cache_key(user_id), data, ttl=settings.entity_cache_ttl)
         return data
 
     @staticmethod
     def set_pin(user_id: str, pin_hash: str) -> None:
         WalletsRepo._col().document(user_id).set({"hasPin": True, "pinHash": pin_hash, "updatedAt": now_ts()}, merge=True)
+        WalletsRepo.invalidate(user_id)
 
     @staticmethod
     def get_pin_hash(user_id: str) -> Optional[str]:
@@ -104,19 +276,10 @@ class WalletsRepo:
         return None
 
     @staticmethod
-    def update_balance(user_id: str, currency: str, delta: float) -> dict[str, Any]:
-        doc_ref = WalletsRepo._col().document(user_id)
-        doc = doc_ref.get()
-        if not doc.exists:
-            WalletsRepo.get_or_create(user_id)
-            doc = doc_ref.get()
-        data = doc.to_dict() or {}
-        balances = data.get("balances", {})
-        balances[currency] = float(balances.get(currency, 0.0)) + float(delta)
-        data["balances"] = balances
-        data["updatedAt"] = now_ts()
-        doc_ref.set(data)
-        return data
+    def update_balance(user_id: str, currency: str, delta: float, kind: Optional[str] = None) -> dict[str, float]:
+        # Atomic read-check-write lives in the balance engine
+        from .balances import apply_delta
+        return apply_delta(user_id, currency, delta, kind)
 
 
 # Transactions
@@ -127,15 +290,57 @@ class TransactionsRepo:
 
     @staticmethod
     def create(txn: dict[str, Any]) -> dict[str, Any]:
-        txn_id = txn.get("transactionId") or f"TXN_{int(now_ts().timestamp())}"
+        txn_id = txn.get("transactionId") or new_id("TXN")
         txn["transactionId"] = txn_id
         txn["createdAt"] = now_ts()
-        TransactionsRepo._col().document(txn_id).set(txn)
+        # Callers may pass initiatedAt as an ISO string; store a timestamp so it sorts and rolls up
+        txn["initiatedAt"] = as_datetime(txn.get("initiatedAt")) or txn["createdAt"]
+        batch = get_db().batch()
+        batch.set(TransactionsRepo._col().document(txn_id), txn)
+        CountersRepo.increment_in(batch, txn["userId"], "transactions")
+        RollupsRepo.add_in(batch, txn)
+        batch.commit()
         return txn
 
     @staticmethod
-    def list_by_user(user_id: str, page: int, limit: int, filters: dict[str, Any] | None = None) -> tuple[list[dict], int]:
+    def recent(user_id: str, limit: int, since: Optional[datetime] = None) -> list[dict[str, Any]]:
+        q = TransactionsRepo._col().where("userId", "==", user_id)
+        if since:
+            q = q.where("initiatedAt", ">=", since)
+        items = []
+        for d in q.order_by("initiatedAt", direction="DESCENDING").limit(limit).stream():
+            obj = d.to_dict()
+            obj["transactionId"] = d.id
+            items.append(obj)
+        return items
+
+    @staticmethod
+    def iter_chunks(user_id: str, start: Optional[datetime] = None, end: Optional[datetime] = None, chunk_size: int = 500) -> Iterator[list[dict[str, Any]]]:
+        """A user's full history, newest first, as successive lists of at most `chunk_size` rows.
+
+        Each chunk is a short query resumed after the previous chunk's last snapshot, so
+        no single stream outlives Firestore's RPC deadline and only one chunk is in memory.
+        """
+        q = TransactionsRepo._col().where("userId", "==", user_id)
+        if start:
+            q = q.where("initiatedAt", ">=", start)
+        if end:
+            q = q.where("initiatedAt", "<=", end)
+        q = q.order_by("initiatedAt", direction="DESCENDING").order_by(FieldPath.document_id(), direction="DESCENDING")
+        last = None
+        while True:
+            docs = list((q.start_after(last) if last is not None else q).limit(chunk_size).stream())
+            if not docs:
+                return
+            yield [d.to_dict() | {"transactionId": d.id} for d in docs]
+            if len(docs) < chunk_size:
+                return
+            last = docs[-1]
+
+    @staticmethod
+    def list_by_user(user_id: str, limit: int, cursor: Optional[str] = None, filters: dict[str, Any] | None = None, page: int = 1) -> tuple[list[dict], int, Optional[str]]:
         q = TransactionsRepo._col().where("userId", "==", user_id)
+        filtered = bool(filters and any(filters.values()))
         if filters:
             if filters.get("type"):
                 q = q.where("type", "==", filters["type"])
@@ -145,18 +350,33 @@ class TransactionsRepo:
                 q = q.where("initiatedAt", ">=", filters["startDate"])  # requires composite indexes as data grows
             if filters.get("endDate"):
                 q = q.where("initiatedAt", "<=", filters["endDate"])  # ditto
-        q = q.order_by("initiatedAt", direction="DESCENDING")
-        docs = list(q.stream())
-        total = len(docs)
-        start = (page - 1) * limit
-        end = start + limit
-        sliced = docs[start:end]
+        # Unfiltered totals come from the maintained counter; filtered ones use a server-side count aggregation
+        total = int(q.count().get()[0][0].value) if filtered else CountersRepo.get(user_id, "transactions")
+        docs, next_cursor = _paginate(TransactionsRepo._col(), q, "initiatedAt", limit, cursor, page)
         items = []
-        for d in sliced:
+        for d in docs:
             obj = d.to_dict()
             obj["transactionId"] = d.id
             items.append(obj)
-        return items, total
+        return items, total, next_cursor
+
+
+# Per-user daily transaction rollups, maintained on every TransactionsRepo.create
+class RollupsRepo:
+    @staticmethod
+    def col():
+        return get_db().collection("transaction_rollups")
+
+    @staticmethod
+    def add_in(batch, txn: dict[str, Any]) -> None:
+        ts = as_datetime(txn.get("initiatedAt")) or as_datetime(txn.get("createdAt")) or now_ts()
+        batch.set(RollupsRepo.col().document(rollup_id(txn["userId"], ts.date())), rollup_increments(txn, ts), merge=True)
+
+    @staticmethod
+    def get_range(user_id: str, start: date, end: date) -> list[dict[str, Any]]:
+        # One batched get of at most (end - start + 1) small documents
+        refs = [RollupsRepo.col().document(doc_id) for doc_id in rollup_ids(user_id, start, end)]
+        return [d.to_dict() or {} for d in get_db().get_all(refs) if d.exists]
 
 
 # Savings
@@ -171,28 +391,29 @@ class SavingsRepo:
 
     @staticmethod
     def create_goal(goal: dict[str, Any]) -> dict[str, Any]:
-        goal_id = goal.get("id") or f"goal_{int(now_ts().timestamp())}"
+        goal_id = goal.get("id") or new_id("goal")
         goal["id"] = goal_id
         goal["createdAt"] = now_ts()
-        SavingsRepo.goals_col().document(goal_id).set(goal)
+        batch = get_db().batch()
+        batch.set(SavingsRepo.goals_col().document(goal_id), goal)
+        CountersRepo.increment_in(batch, goal["userId"], "savingsGoals")
+        batch.commit()
         return goal
 
     @staticmethod
-    def list_goals(user_id: str, page: int, limit: int) -> tuple[list[dict], int]:
-        docs = list(SavingsRepo.goals_col().where("userId", "==", user_id).order_by("createdAt", direction="DESCENDING").stream())
-        total = len(docs)
-        start = (page - 1) * limit
-        end = start + limit
+    def list_goals(user_id: str, limit: int, cursor: Optional[str] = None, page: int = 1) -> tuple[list[dict], int, Optional[str]]:
+        q = SavingsRepo.goals_col().where("userId", "==", user_id)
+        docs, next_cursor = _paginate(SavingsRepo.goals_col(), q, "createdAt", limit, cursor, page)
         res = []
-        for d in docs[start:end]:
+        for d in docs:
             obj = d.to_dict()
             obj["id"] = d.id
             res.append(obj)
-        return res, total
+        return res, CountersRepo.get(user_id, "savingsGoals"), next_cursor
 
     @staticmethod
     def contribute(contrib: dict[str, Any]) -> dict[str, Any]:
-        contrib_id = contrib.get("id") or f"contrib_{int(now_ts().timestamp())}"
+        contrib_id = contrib.get("id") or new_id("contrib")
         contrib["id"] = contrib_id
         contrib["createdAt"] = now_ts()
         SavingsRepo.contrib_col().document(contrib_id).set(contrib)
@@ -207,24 +428,49 @@ class ChatRepo:
 
     @staticmethod
     def add_entry(entry: dict[str, Any]) -> dict[str, Any]:
-        entry_id = entry.get("id") or f"chat_{int(now_ts().timestamp())}"
+        entry_id = entry.get("id") or new_id("chat")
         entry["id"] = entry_id
         entry["createdAt"] = now_ts()
-        ChatRepo.col().document(entry_id).set(entry)
+        batch = get_db().batch()
+        batch.set(ChatRepo.col().document(entry_id), entry)
+        CountersRepo.increment_in(batch, entry["userId"], "chatEntries")
+        batch.commit()
         return entry
 
     @staticmethod
-    def list_by_user(user_id: str, page: int, limit: int) -> tuple[list[dict], int]:
-        docs = list(ChatRepo.col().where("userId", "==", user_id).order_by("createdAt", direction="DESCENDING").stream())
-        total = len(docs)
-        start = (page - 1) * limit
-        end = start + limit
+    def list_by_user(user_id: str, limit: int, cursor: Optional[str] = None, page: int = 1) -> tuple[list[dict], int, Optional[str]]:
+        q = ChatRepo.col().where("userId", "==", user_id)
+        docs, next_cursor = _paginate(ChatRepo.col(), q, "createdAt", limit, cursor, page)
         res = []
-        for d in docs[start:end]:
+        for d in docs:
             obj = d.to_dict()
             obj["id"] = d.id
             res.append(obj)
-        return res, total
+        return res, CountersRepo.get(user_id, "chatEntries"), next_cursor
+
+
+# Heatmap tiles: per (day, area, category) job aggregates, maintained on every job write
+class HeatmapTilesRepo:
+    @staticmethod
+    def col():
+        return get_db().collection("heatmap_tiles")
+
+    @staticmethod
+    def add_in(writer, deltas: list[tuple[str, dict[str, Any]]]) -> None:
+        """Queue tile increments on a batch or transaction."""
+        from .tiles import as_increments
+        for doc_id, delta in deltas:
+            writer.set(HeatmapTilesRepo.col().document(doc_id), as_increments(delta), merge=True)
+
+    @staticmethod
+    def changed_since(since: datetime) -> Iterator[tuple[str, dict[str, Any]]]:
+        for d in HeatmapTilesRepo.col().where("updatedAt", ">", since).stream():
+            yield d.id, d.to_dict() or {}
+
+    @staticmethod
+    def since_day(day: date) -> Iterator[tuple[str, dict[str, Any]]]:
+        for d in HeatmapTilesRepo.col().where("date", ">=", day.isoformat()).stream():
+            yield d.id, d.to_dict() or {}
 
 
 # Jobs (for heatmap)
@@ -233,8 +479,78 @@ class JobsRepo:
     def col():
         return get_db().collection("jobs")
 
+    @staticmethod
+    def create(job: dict[str, Any]) -> dict[str, Any]:
+        from .geo import geo_fields  # geo builds on this repo
+        from .tiles import deltas_for_change, tile_store
+        job_id = job.pop("id", None) or new_id("JOB")
+        job.setdefault("status", "active")
+        job["createdAt"] = job.get("createdAt") or now_ts()
+        job["updatedAt"] = now_ts()
+        if job["status"] == "completed":
+            job.setdefault("completedAt", job["updatedAt"])
+        job.update(geo_fields(job))
+        deltas = deltas_for_change(None, job)
+        batch = get_db().batch()
+        batch.set(JobsRepo.col().document(job_id), job)
+        HeatmapTilesRepo.add_in(batch, deltas)
+        batch.commit()
+        tile_store.apply_all(deltas)
+        return job | {"id": job_id}
+
+    @staticmethod
+    def update(job_id: str, updates: dict[str, Any]) -> Optional[dict[str, Any]]:
+        from google.cloud.firestore import transactional
+        from .geo import geo_fields
+        from .tiles import deltas_for_change, tile_store
+        ref = JobsRepo.col().document(job_id)
+        deltas: list[tuple[str, dict[str, Any]]] = []
+
+        @transactional
+        def apply(txn) -> Optional[dict[str, Any]]:
+            doc = ref.get(transaction=txn)
+            if not doc.exists:
+                return None
+            before = doc.to_dict() or {}
+            changes = dict(updates)
+            after = _merge(copy.deepcopy(before), changes)
+            if "location" in changes:
+                changes |= geo_fields(after)
+            if changes.get("status") == "completed" and before.get("status") != "completed":
+                changes["completedAt"] = now_ts()
+            changes["updatedAt"] = now_ts()
+            after.update(changes)
+            txn.set(ref, changes, merge=True)
+            # Tiles move with the job: out of its old (day, area, category), into the new one
+            deltas[:] = deltas_for_change(before, after)
+            HeatmapTilesRepo.add_in(txn, deltas)
+            return after | {"id": job_id}
+
+        job = apply(get_db().transaction())
+        tile_store.apply_all(deltas)
+        return job
+
+    @staticmethod
+    def changed_since(since: Optional[datetime]) -> Iterator[dict[str, Any]]:
+        """Jobs updated after `since`; every active/completed job when `since` is None."""
+        q = JobsRepo.col()
+        q = q.where("updatedAt", ">", since) if since else q.where("status", "in", ["active", "completed"])
+        for d in q.stream():
+            yield (d.to_dict() or {}) | {"id": d.id}
+
+    @staticmethod
+    def query_geohash(prefixes: set[str], category: Optional[str] = None) -> Iterator[dict[str, Any]]:
+        """Jobs whose geohash starts with any of `prefixes`, one range query per prefix."""
+        for prefix in sorted(prefixes):
+            q = JobsRepo.col().where("geohash", ">=", prefix).where("geohash", "<", prefix + "~")
+            if category:
+                q = q.where("category", "==", category)
+            for d in q.stream():
+                yield (d.to_dict() or {}) | {"id": d.id}
+
     @staticmethod
     def query(start: Optional[datetime] = None, end: Optional[datetime] = None, category: Optional[str] = None, location: Optional[str] = None, min_price: Optional[float] = None, max_price: Optional[float] = None, limit: int = 1000) -> list[dict[str, Any]]:
+        from .heatmap import area_named
         q = JobsRepo.col().where("status", "in", ["active", "completed"])  # requires index
         if start:
             q = q.where("createdAt", ">=", start)
@@ -242,8 +558,13 @@ class JobsRepo:
             q = q.where("createdAt", "<=", end)
         if category:
             q = q.where("category", "==", category)
-        # Firestore can't do LIKE; we can post-filter for location substring
-        docs = list(q.order_by("createdAt", direction="DESCENDING").limit(limit).stream())
+        # Known areas are matched server-side on the denormalised `area` field; other
+        # text (a district, an address) is matched against the location's own fields
+        area = area_named(location) if location else None
+        if area:
+            q = q.where("area", "==", area)
+        needle = location.lower() if location and not area else None
+        docs = q.order_by("createdAt", direction="DESCENDING").limit(limit).stream()
         items = []
         for d in docs:
             obj = d.to_dict()
@@ -252,48 +573,98 @@ class JobsRepo:
                 continue
             if max_price is not None and obj.get("priceKes", 0) > max_price:
                 continue
-            if location and location.lower() not in str(obj.get("location", {})).lower():
+            if needle and needle not in _location_text(obj.get("location")):
                 continue
             items.append(obj)
         return items
 
 
+def _location_text(location: Any) -> str:
+    if isinstance(location, dict):
+        return " ".join(str(location.get(k) or "") for k in ("city", "district", "address")).lower()
+    return str(location or "").lower()
+
+
 # Credit score
 class CreditRepo:
     @staticmethod
     def col():
         return get_db().collection("credit_scores")
 
+    @staticmethod
+    def default_doc() -> dict[str, Any]:
+        return {
+            "currentScore": 300,
+            "financialProfile": {
+                "monthlyIncome": 0,
+                "monthlyExpenses": 0,
+                "savingsRate": 0,
+                "debtToIncomeRatio": 0,
+                "employmentStability": 0,
+                "gigWorkConsistency": 0,
+            },
+            "paymentPatterns": {
+                "onTimePayments": 0,
+                "latePayments": 0,
+                "missedPayments": 0,
+                "averagePaymentDelay": 0,
+            },
+            "updatedAt": now_ts(),
+        }
+
+    @staticmethod
+    def _cache_key(user_id: str) -> str:
+        return f"credit:{user_id}"
+
     @staticmethod
     def get_or_create(user_id: str) -> dict[str, Any]:
+        cached = get_cache().get(CreditRepo._cache_key(user_id))
+        if cached is not None:
+            return cached
         doc_ref = CreditRepo.col().document(user_id)
         doc = doc_ref.get()
         if not doc.exists:
-            data = {
-                "currentScore": 300,
-                "financialProfile": {
-                    "monthlyIncome": 0,
-                    "monthlyExpenses": 0,
-                    "savingsRate": 0,
-                    "debtToIncomeRatio": 0,
-                    "employmentStability": 0,
-                    "gigWorkConsistency": 0,
-                },
-                "paymentPatterns": {
-                    "onTimePayments": 0,
-                    "latePayments": 0,
-                    "missedPayments": 0,
-                    "averagePaymentDelay": 0,
-                },
-                "updatedAt": now_ts(),
-            }
+            data = CreditRepo.default_doc()
             doc_ref.set(data)
-            return data
-        return doc.to_dict() or {"currentScore": 300}
+        else:
+            data = doc.to_dict() or {"currentScore": 300}
+        get_cache().set(CreditRepo._cache_key(user_id), data, ttl=settings.entity_cache_ttl)
+        return data
 
     @staticmethod
     def update(user_id: str, updates: dict[str, Any]) -> dict[str, Any]:
         updates["updatedAt"] = now_ts()
         CreditRepo.col().document(user_id).set(updates, merge=True)
+        get_cache().delete(CreditRepo._cache_key(user_id))
         doc = CreditRepo.col().document(user_id).get()
         return doc.to_dict() or {}
+
+
+# Gamification points; services.leaderboard keeps ranked in-memory views of these fields
+class GamificationRepo:
+    @staticmethod
+    def col():
+        return get_db().collection("gamification")
+
+    @staticmethod
+    def default_doc() -> dict[str, Any]:
+        return {"points": 0, "redeemedPoints": 0, "streakDays": 0, "savingsPoints": 0, "updatedAt": now_ts()}
+
+    @staticmethod
+    def get_or_create(user_id: str) -> dict[str, Any]:
+        doc_ref = GamificationRepo.col().document(user_id)
+        doc = doc_ref.get()
+        if doc.exists:
+            return doc.to_dict() or {}
+        data = GamificationRepo.default_doc()
+        doc_ref.set(data)
+        return data
+
+    @staticmethod
+    def changed_since(since: Optional[datetime], fields: list[str]) -> Iterator[dict[str, Any]]:
+        """Projected documents updated after `since` (every document when `since` is None)."""
+        q = GamificationRepo.col()
+        if since:
+            q = q.where("updatedAt", ">", since)
+        for d in q.select([*fields, "updatedAt"]).stream():
+            yield (d.to_dict() or {}) | {"userId": d.id}
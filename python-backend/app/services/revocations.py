@@ -0,0 +1,89 @@
+from __future__ import annotations
+import asyncio
+import heapq
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+from ..config import settings
+from .async_repos import run_blocking
+from .firebase import get_db
+
+
+# token hash -> expiry. Never evicted before the token's own expiry: a dropped entry
+# would let a logged-out token through, and the incremental sync would not bring it back.
+_revoked: dict[str, float] = {}
+_expiries: list[tuple[float, str]] = []  # min-heap for pruning
+_lock = threading.Lock()
+_hooks: list[Callable[[str, float], None]] = []
+_last_sync: Optional[datetime] = None
+
+
+def add_revocation_hook(hook: Callable[[str, float], None]) -> None:
+    """Register a callback run on every revocation (e.g. to publish it to other workers)."""
+    _hooks.append(hook)
+
+
+def is_revoked(token_key: str) -> bool:
+    expires_at = _revoked.get(token_key)
+    return expires_at is not None and expires_at > time.time()
+
+
+def _remember(token_key: str, expires_at: float) -> None:
+    now = time.time()
+    with _lock:
+        # Entries leave only once their token has expired, oldest first
+        while _expiries and _expiries[0][0] <= now:
+            expired, key = heapq.heappop(_expiries)
+            if _revoked.get(key) == expired:
+                del _revoked[key]
+        if expires_at > now and _revoked.get(token_key) != expires_at:
+            _revoked[token_key] = expires_at
+            heapq.heappush(_expiries, (expires_at, token_key))
+
+
+def revoke(token_key: str, expires_at: float) -> None:
+    _remember(token_key, expires_at)
+    for hook in _hooks:
+        hook(token_key, expires_at)
+
+
+def _persist(token_key: str, expires_at: float) -> None:
+    db = get_db()
+    if db is None:
+        return
+    db.collection("revoked_tokens").document(token_key).set({
+        "expiresAt": datetime.utcfromtimestamp(expires_at),
+        "revokedAt": datetime.utcnow(),
+    })
+
+
+add_revocation_hook(_persist)
+
+
+def sync_from_store() -> int:
+    """Pull revocations made by other workers since the last sync."""
+    global _last_sync
+    db = get_db()
+    if db is None:
+        return 0
+    started = datetime.utcnow()
+    q = db.collection("revoked_tokens")
+    q = q.where("revokedAt", ">", _last_sync - timedelta(seconds=5)) if _last_sync else q.where("expiresAt", ">", started)
+    count = 0
+    for doc in q.stream():
+        expires_at = (doc.to_dict() or {}).get("expiresAt")
+        if expires_at is not None and expires_at.timestamp() > time.time():
+            _remember(doc.id, expires_at.timestamp())
+            count += 1
+    _last_sync = started
+    return count
+
+
+async def sync_forever() -> None:
+    while True:
+        try:
+            await run_blocking(sync_from_store)
+        except Exception:
+            pass  # keep serving from the local list; retry on the next tick
+        await asyncio.sleep(settings.revocation_sync_seconds)
@@ -0,0 +1,108 @@
+from __future__ import annotations
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Iterable, Optional
+from google.cloud.firestore import Increment, Maximum
+
+
+IN_TYPES = {"deposit", "transfer_in", "convert_in", "airtime_cashback", "refund"}
+OUT_TYPES = {"withdraw", "transfer_out", "convert_out", "payment", "bill"}
+SUCCESS_STATUSES = ("success", "completed", "complete", "ok")
+
+
+def tx_direction(tx_type: Optional[str]) -> Optional[str]:
+    if not tx_type:
+        return None
+    t = str(tx_type).lower()
+    if t in IN_TYPES:
+        return "in"
+    if t in OUT_TYPES:
+        return "out"
+    # Heuristic fallback
+    if "deposit" in t or "in" in t:
+        return "in"
+    if "withdraw" in t or "out" in t or "payment" in t:
+        return "out"
+    return None
+
+
+def as_datetime(value: Any) -> Optional[datetime]:
+    """Naive-UTC datetime from a stored timestamp or ISO-8601 string; None if neither."""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+
+
+def rollup_id(user_id: str, day: date) -> str:
+    return f"{user_id}_{day:%Y%m%d}"
+
+
+def rollup_ids(user_id: str, start: date, end: date) -> list[str]:
+    return [rollup_id(user_id, start + timedelta(days=i)) for i in range((end - start).days + 1)]
+
+
+def rollup_increments(txn: dict[str, Any], ts: datetime) -> dict[str, Any]:
+    """set(merge=True) payload folding one transaction into its user's daily rollup."""
+    try:
+        amount = float(txn.get("amount") or 0)
+    except (TypeError, ValueError):
+        amount = 0.0
+    currency = str(txn.get("currencyCode") or "KES").upper()
+    direction = tx_direction(txn.get("type"))
+    bucket: dict[str, Any] = {"count": Increment(1), "amountSum": Increment(abs(amount))}
+    if direction == "in":
+        bucket |= {"inflow": Increment(amount), "net": Increment(amount)}
+    elif direction == "out":
+        bucket |= {"outflow": Increment(amount), "net": Increment(-amount)}
+    category = str(txn.get("category") or "uncategorized").lower()
+    success = str(txn.get("status") or "").lower() in SUCCESS_STATUSES
+    return {
+        "userId": txn.get("userId"),
+        "date": ts.strftime("%Y-%m-%d"),
+        "currencies": {currency: bucket},
+        "categories": {category: Increment(1)},
+        "totalCount": Increment(1),
+        "successCount": Increment(1 if success else 0),
+        # Server-side max, so a backdated transaction never moves it backwards
+        "lastActivityTs": Maximum(ts.replace(tzinfo=timezone.utc).timestamp()),
+    }
+
+
+def summarize(rollups: Iterable[dict[str, Any]]) -> dict[str, Any]:
+    """Combine daily rollup documents into the analytics totals."""
+    totals: dict[str, dict[str, float]] = {}
+    amount_sums: dict[str, list[float]] = {}
+    categories: dict[str, int] = {}
+    total = success = 0
+    last_activity: Optional[datetime] = None
+    for doc in rollups:
+        for cur, b in (doc.get("currencies") or {}).items():
+            t = totals.setdefault(cur, {"inflow": 0.0, "outflow": 0.0, "net": 0.0})
+            t["inflow"] += float(b.get("inflow", 0))
+            t["outflow"] += float(b.get("outflow", 0))
+            t["net"] += float(b.get("net", 0))
+            s = amount_sums.setdefault(cur, [0.0, 0.0])
+            s[0] += float(b.get("amountSum", 0))
+            s[1] += float(b.get("count", 0))
+        for cat, n in (doc.get("categories") or {}).items():
+            categories[cat] = categories.get(cat, 0) + int(n)
+        total += int(doc.get("totalCount", 0))
+        success += int(doc.get("successCount", 0))
+        epoch = doc.get("lastActivityTs")
+        # Documents written before lastActivityTs carry a plain timestamp
+        ts = datetime.utcfromtimestamp(epoch) if epoch is not None else as_datetime(doc.get("lastActivity"))
+        if ts is not None:
+            if last_activity is None or ts > last_activity:
+                last_activity = ts
+    return {
+        "totalsByCurrency": totals,
+        "averagesByCurrency": {cur: (s[0] / s[1] if s[1] else 0.0) for cur, s in amount_sums.items()},
+        "categoryCounts": categories,
+        "successRate": (success / total) if total else 0.0,
+        "totalTransactions": total,
+        "lastActivity": last_activity.isoformat() if last_activity else None,
+    }
@@ -0,0 +1,43 @@
+from __future__ import annotations
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, Iterable
+
+
+# Column order of exported statements; NDJSON rows carry the same keys
+EXPORT_FIELDS = ("transactionId", "initiatedAt", "type", "status", "amount", "currencyCode", "category", "method", "description", "reference")
+
+MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+
+
+def _value(v: Any) -> Any:
+    if isinstance(v, datetime):
+        return v.isoformat()
+    if isinstance(v, (dict, list)):
+        return json.dumps(v, default=str, separators=(",", ":"))
+    return v
+
+
+def _project(row: dict[str, Any]) -> dict[str, Any]:
+    return {k: _value(row.get(k)) for k in EXPORT_FIELDS}
+
+
+def csv_header() -> bytes:
+    return (",".join(EXPORT_FIELDS) + "\r\n").encode()
+
+
+def csv_chunk(rows: Iterable[dict[str, Any]]) -> bytes:
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=EXPORT_FIELDS, extrasaction="ignore")
+    writer.writerows(_project(r) for r in rows)
+    return buf.getvalue().encode()
+
+
+def ndjson_chunk(rows: Iterable[dict[str, Any]]) -> bytes:
+    return "".join(json.dumps(_project(r), default=str, separators=(",", ":")) + "\n" for r in rows).encode()
+
+
+def encode_chunk(fmt: str, rows: Iterable[dict[str, Any]]) -> bytes:
+    return csv_chunk(rows) if fmt == "csv" else ndjson_chunk(rows)
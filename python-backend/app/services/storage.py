@@ -1,18 +1,176 @@
 from __future__ import annotations
+import hashlib
+import hmac
+import os
+import shutil
+import time
 from datetime import timedelta
-from typing import Optional
+from pathlib import Path
+from typing import Any, Optional
+from urllib.parse import quote
 from google.cloud.storage import Blob
+from requests.adapters import HTTPAdapter
+from .async_repos import run_blocking
+from .cache import LRUCache
 from .firebase import get_bucket
+from ..config import settings
+
+
+# Signed URLs are reused until this long before they expire
+SIGNED_URL_MARGIN = 300
+
+_signed_urls = LRUCache(maxsize=settings.signed_url_cache_size)
+
+
+class GCSBucket:
+    """Blocking operations against a google-cloud-storage bucket (real or emulator)."""
+
+    def __init__(self, bucket: Any) -> None:
+        self.bucket = bucket
+        self.name = bucket.name
+        # One authorised session per client; widen its connection pool so concurrent
+        # uploads reuse keep-alive connections instead of opening new ones
+        session = getattr(bucket.client, "_http", None)
+        if session is not None:
+            adapter = HTTPAdapter(pool_connections=settings.storage_pool_size, pool_maxsize=settings.storage_pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+
+    def _blob(self, path: str, size: int) -> Blob:
+        blob = self.bucket.blob(path)
+        if size > settings.storage_resumable_threshold:
+            # Setting chunk_size switches the client to a resumable upload sent in chunks
+            blob.chunk_size = settings.storage_chunk_bytes
+        return blob
+
+    def upload_bytes(self, path: str, data: bytes, content_type: str) -> None:
+        self._blob(path, len(data)).upload_from_string(data, content_type=content_type)
+
+    def upload_file(self, path: str, local_path: Path, content_type: str) -> None:
+        self._blob(path, local_path.stat().st_size).upload_from_filename(str(local_path), content_type=content_type)
+
+    def download_bytes(self, path: str) -> Optional[bytes]:
+        blob = self.bucket.blob(path)
+        return blob.download_as_bytes() if blob.exists() else None
+
+    def delete(self, path: str) -> None:
+        blob = self.bucket.blob(path)
+        if blob.exists():
+            blob.delete()
+
+    def signed_url(self, path: str, expires_in: int) -> str:
+        try:
+            return self.bucket.blob(path).generate_signed_url(expiration=timedelta(seconds=expires_in), method="GET", version="v4")
+        except Exception:
+            return f"https://storage.googleapis.com/{self.name}/{quote(path)}"
+
+
+class FilesystemBucket:
+    """Fake bucket over a local directory, for development and tests without GCS."""
+
+    def __init__(self, root: Path, name: str = "local") -> None:
+        self.root = root
+        self.name = name
+
+    def _path(self, path: str) -> Path:
+        full = (self.root / path).resolve()
+        if not full.is_relative_to(self.root.resolve()):
+            raise ValueError(f"Object path escapes the bucket: {path}")
+        return full
+
+    def _write(self, path: str, write) -> None:
+        full = self._path(path)
+        full.parent.mkdir(parents=True, exist_ok=True)
+        tmp = full.with_name(f".{full.name}.part")
+        write(tmp)
+        os.replace(tmp, full)
+
+    def upload_bytes(self, path: str, data: bytes, content_type: str) -> None:
+        self._write(path, lambda tmp: tmp.write_bytes(data))
+
+    def upload_file(self, path: str, local_path: Path, content_type: str) -> None:
+        self._write(path, lambda tmp: shutil.copyfile(local_path, tmp))
+
+    def download_bytes(self, path: str) -> Optional[bytes]:
+        full = self._path(path)
+        return full.read_bytes() if full.exists() else None
+
+    def delete(self, path: str) -> None:
+        self._path(path).unlink(missing_ok=True)
+
+    def signed_url(self, path: str, expires_in: int) -> str:
+        expires = int(time.time()) + expires_in
+        sig = hmac.new(settings.jwt_secret.encode(), f"{path}:{expires}".encode(), hashlib.sha256).hexdigest()
+        return f"file://{self._path(path)}?expires={expires}&signature={sig}"
+
+
+class Storage:
+    """Async facade: blocking bucket calls run on the shared pool, signed URLs are cached."""
+
+    def __init__(self, bucket: GCSBucket | FilesystemBucket) -> None:
+        self.bucket = bucket
+
+    async def upload_bytes(self, path: str, data: bytes, content_type: str) -> dict:
+        await run_blocking(self.bucket.upload_bytes, path, data, content_type)
+        return {"url": await self.signed_url(path), "path": path}
+
+    async def upload_file(self, path: str, local_path: Path, content_type: str) -> dict:
+        await run_blocking(self.bucket.upload_file, path, local_path, content_type)
+        return {"url": await self.signed_url(path), "path": path}
+
+    async def download_bytes(self, path: str) -> Optional[bytes]:
+        return await run_blocking(self.bucket.download_bytes, path)
+
+    async def delete(self, path: str) -> None:
+        _signed_urls.delete(self._url_key(path))
+        await run_blocking(self.bucket.delete, path)
+
+    def _url_key(self, path: str) -> str:
+        return f"{self.bucket.name}/{path}"
+
+    def signed_url_blocking(self, path: str) -> str:
+        key = self._url_key(path)
+        url = _signed_urls.get(key)
+        if url is None:
+            expires_in = settings.signed_url_ttl_seconds
+            url = self.bucket.signed_url(path, expires_in)
+            _signed_urls.set(key, url, expires_at=time.time() + expires_in - SIGNED_URL_MARGIN)
+        return url
+
+    async def signed_url(self, path: str) -> str:
+        url = _signed_urls.get(self._url_key(path))
+        # RSA signing is CPU work; only a cache miss leaves the event loop
+        return url if url is not None else await run_blocking(self.signed_url_blocking, path)
+
+
+_storage: Optional[Storage] = None
+
+
+def get_storage() -> Optional[Storage]:
+    global _storage
+    if _storage is None:
+        if settings.storage_backend == "filesystem":
+            _storage = Storage(FilesystemBucket(settings.storage_fs_root))
+        elif settings.storage_emulator_host:
+            from google.auth.credentials import AnonymousCredentials
+            from google.cloud import storage as gcs
+            client = gcs.Client(project="emulator", credentials=AnonymousCredentials(), client_options={"api_endpoint": settings.storage_emulator_host})
+            _storage = Storage(GCSBucket(client.bucket(settings.firebase_storage_bucket or "jashoo-local")))
+        elif (bucket := get_bucket()) is not None:
+            _storage = Storage(GCSBucket(bucket))
+    return _storage
+
+
+def set_storage(storage: Optional[Storage]) -> None:
+    global _storage
+    _storage = storage
+    _signed_urls.clear()
 
 
 def upload_bytes(path: str, data: bytes, content_type: str) -> dict:
-    bucket = get_bucket()
-    if not bucket:
+    """Blocking variant for scripts; request handlers should await get_storage().upload_bytes."""
+    storage = get_storage()
+    if storage is None:
         return {"url": None, "path": path}
-    blob: Blob = bucket.blob(path)
-    blob.upload_from_string(data, content_type=content_type)
-    try:
-        url = blob.generate_signed_url(expiration=timedelta(days=7), method="GET")
-    except Exception:
-        url = f"https://storage.googleapis.com/{bucket.name}/{path}"
-    return {"url": url, "path": path}
+    storage.bucket.upload_bytes(path, data, content_type)
+    return {"url": storage.signed_url_blocking(path), "path": path}
@@ -0,0 +1,224 @@
+from __future__ import annotations
+import asyncio
+import hashlib
+import inspect
+import logging
+import random
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Optional, Union
+from google.api_core.exceptions import AlreadyExists
+from ..config import settings
+from ..utils.ids import new_id
+from .async_repos import run_blocking
+from .firebase import get_db
+from .repos import now_ts
+
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[dict[str, Any]], Union[Any, Awaitable[Any]]]
+
+
+class TasksRepo:
+    """Persistent task records plus dedupe locks, so status survives the process and dedupe spans workers."""
+
+    @staticmethod
+    def col():
+        return get_db().collection("background_tasks")
+
+    @staticmethod
+    def locks_col():
+        return get_db().collection("background_task_locks")
+
+    @staticmethod
+    def create(record: dict[str, Any]) -> None:
+        TasksRepo.col().document(record["taskId"]).set(record)
+
+    @staticmethod
+    def update(task_id: str, updates: dict[str, Any]) -> None:
+        updates["updatedAt"] = now_ts()
+        TasksRepo.col().document(task_id).set(updates, merge=True)
+
+    @staticmethod
+    def get(task_id: str) -> Optional[dict[str, Any]]:
+        doc = TasksRepo.col().document(task_id).get()
+        return (doc.to_dict() or {}) if doc.exists else None
+
+    @staticmethod
+    def acquire_lock(key: str, task_id: str, ttl_seconds: int) -> Optional[str]:
+        """Take the dedupe lock for `key`; returns the task id already holding it, or None if acquired."""
+        ref = TasksRepo.locks_col().document(hashlib.sha256(key.encode()).hexdigest())
+        lock = {"taskId": task_id, "expiresAt": now_ts() + timedelta(seconds=ttl_seconds)}
+        try:
+            ref.create(lock)
+            return None
+        except AlreadyExists:
+            held = ref.get().to_dict() or {}
+            expires_at = held.get("expiresAt")
+            if expires_at is not None and expires_at.replace(tzinfo=None) > now_ts():
+                return held.get("taskId")
+            ref.set(lock)  # stale lock left by a crashed worker
+            return None
+
+    @staticmethod
+    def release_lock(key: str) -> None:
+        TasksRepo.locks_col().document(hashlib.sha256(key.encode()).hexdigest()).delete()
+
+
+class TaskRunner:
+    """In-process asyncio job runner with persistent records, dedupe, bounded concurrency and retries."""
+
+    def __init__(self, concurrency: int, max_attempts: int, backoff_seconds: float) -> None:
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self._handlers: dict[str, Handler] = {}
+        self._queue: asyncio.Queue | None = None
+        self._workers: list[asyncio.Task] = []
+        self._active: dict[str, str] = {}  # dedupe key -> task id
+        self._running: dict[str, dict[str, Any]] = {}  # task id -> record, while a worker holds it
+        self._closing = False
+
+    def register(self, name: str, handler: Handler) -> None:
+        self._handlers[name] = handler
+
+    def handler(self, name: str) -> Callable[[Handler], Handler]:
+        def decorator(fn: Handler) -> Handler:
+            self.register(name, fn)
+            return fn
+        return decorator
+
+    async def start(self) -> None:
+        self._closing = False
+        self._queue = asyncio.Queue()
+        self._workers = [asyncio.create_task(self._worker(), name=f"task-worker-{i}") for i in range(self.concurrency)]
+
+    async def submit(self, name: str, payload: dict[str, Any], user_id: Optional[str] = None, dedupe_key: Optional[str] = None) -> dict[str, Any]:
+        if name not in self._handlers:
+            raise KeyError(f"No task handler registered for {name!r}")
+        if self._closing or self._queue is None:
+            raise RuntimeError("Task runner is not accepting work")
+
+        if dedupe_key and dedupe_key in self._active:
+            return await self.get(self._active[dedupe_key]) or {"taskId": self._active[dedupe_key], "status": "queued"}
+        task_id = new_id("task")
+        locked = False
+        if dedupe_key:
+            self._active[dedupe_key] = task_id
+            try:
+                held_by = await run_blocking(TasksRepo.acquire_lock, dedupe_key, task_id, settings.task_lock_ttl_seconds)
+            except Exception:
+                self._active.pop(dedupe_key, None)
+                raise
+            if held_by:
+                self._active.pop(dedupe_key, None)
+                return await self.get(held_by) or {"taskId": held_by, "status": "queued"}
+            locked = True
+
+        record = {
+            "taskId": task_id,
+            "name": name,
+            "payload": payload,
+            "userId": user_id,
+            "dedupeKey": dedupe_key,
+            "status": "queued",
+            "attempts": 0,
+            "result": None,
+            "error": None,
+            "createdAt": now_ts(),
+            "updatedAt": now_ts(),
+        }
+        try:
+            await run_blocking(TasksRepo.create, record)
+        except Exception:
+            # Otherwise every later submit with this key would return a task that never ran
+            if locked:
+                await self._release(record)
+            raise
+        self._queue.put_nowait(record)
+        return record
+
+    async def get(self, task_id: str) -> Optional[dict[str, Any]]:
+        return await run_blocking(TasksRepo.get, task_id)
+
+    async def _run_handler(self, handler: Handler, payload: dict[str, Any]) -> Any:
+        if inspect.iscoroutinefunction(handler):
+            return await handler(payload)
+        return await run_blocking(handler, payload)
+
+    async def _execute(self, record: dict[str, Any]) -> None:
+        task_id = record["taskId"]
+        handler = self._handlers[record["name"]]
+        for attempt in range(1, self.max_attempts + 1):
+            await run_blocking(TasksRepo.update, task_id, {"status": "running", "attempts": attempt, "startedAt": now_ts()})
+            try:
+                result = await self._run_handler(handler, record["payload"])
+            except Exception as exc:
+                logger.warning("task %s (%s) attempt %d failed: %s", task_id, record["name"], attempt, exc)
+                if attempt == self.max_attempts:
+                    await run_blocking(TasksRepo.update, task_id, {"status": "failed", "error": str(exc), "finishedAt": now_ts()})
+                    return
+                await run_blocking(TasksRepo.update, task_id, {"status": "retrying", "error": str(exc)})
+                delay = self.backoff_seconds * 2 ** (attempt - 1)
+                await asyncio.sleep(delay + random.uniform(0, delay / 2))
+                continue
+            await run_blocking(TasksRepo.update, task_id, {"status": "succeeded", "result": result, "error": None, "finishedAt": now_ts()})
+            return
+
+    async def _worker(self) -> None:
+        assert self._queue is not None
+        while True:
+            record = await self._queue.get()
+            self._running[record["taskId"]] = record
+            try:
+                await self._execute(record)
+            except asyncio.CancelledError:
+                raise  # still in _running: drain() marks it interrupted and releases its lock
+            except Exception:
+                logger.exception("task %s crashed the worker loop", record.get("taskId"))
+            self._running.pop(record["taskId"], None)
+            await self._release(record)
+            self._queue.task_done()
+
+    async def _release(self, record: dict[str, Any]) -> None:
+        key = record.get("dedupeKey")
+        if key:
+            self._active.pop(key, None)
+            try:
+                await run_blocking(TasksRepo.release_lock, key)
+            except Exception:
+                logger.exception("failed to release task lock %s", key)
+
+    async def drain(self, timeout: float) -> None:
+        """Stop accepting work, let queued and running tasks finish for up to `timeout` seconds, then cancel.
+
+        Tasks cut off by the timeout are recorded as 'interrupted' and their dedupe locks released.
+        """
+        self._closing = True
+        if self._queue is not None:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning("task runner drain timed out with %d task(s) pending", self._queue.qsize())
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        # Whatever did not finish would otherwise read 'running'/'queued' forever and keep its dedupe lock
+        leftover = list(self._running.values())
+        self._running.clear()
+        while self._queue is not None and not self._queue.empty():
+            leftover.append(self._queue.get_nowait())
+        for record in leftover:
+            try:
+                await run_blocking(TasksRepo.update, record["taskId"], {"status": "interrupted", "error": "Interrupted by shutdown", "finishedAt": now_ts()})
+            except Exception:
+                logger.exception("failed to mark task %s interrupted", record["taskId"])
+            await self._release(record)
+
+
+runner = TaskRunner(
+    concurrency=settings.task_concurrency,
+    max_attempts=settings.task_max_attempts,
+    backoff_seconds=settings.task_backoff_seconds,
+)
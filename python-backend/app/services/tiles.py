@@ -0,0 +1,310 @@
+from __future__ import annotations
+import asyncio
+import hashlib
+import threading
+from datetime import date, datetime, timedelta
+from typing import Any, Iterable, Optional
+import numpy as np
+from google.cloud.firestore import Increment
+from ..config import settings
+from ..utils import geohash
+from .async_repos import run_blocking
+from .cache import invalidate_tags
+from .firebase import get_db
+from .heatmap import AREA_NAMES, JOB_CATEGORIES, KENYA_AREAS, intensity_levels, job_coordinates, nearest_area
+
+
+# Heatmap tiles: one document per (day, area, category) holding counts and sums, plus
+# per-geohash-cell sums so map points can be drawn without touching `jobs`.
+CELL_PRECISION = 6  # ~1.2 x 0.6 km
+UNMAPPED = 'Unmapped'
+COUNTED_STATUSES = ('active', 'completed')
+_DIMENSIONS = ('area', 'category', 'date')
+
+
+def _slug(value: str) -> str:
+    return ''.join(ch if ch.isalnum() else '-' for ch in value.lower())
+
+
+def tile_id(day: date, area: str, category: str) -> str:
+    # Tiles keep the job's raw category so filters match it exactly; names outside
+    # JOB_CATEGORIES get a short hash so spellings that slug alike stay apart
+    key = _slug(category) if category in JOB_CATEGORIES else f'{_slug(category)}-{hashlib.sha1(category.encode()).hexdigest()[:8]}'
+    return f'{day:%Y%m%d}_{_slug(area)}_{key}'
+
+
+def bucket(category: Optional[str]) -> str:
+    """Category a tile's jobs are reported under: unlisted names count as Other, as on the query path."""
+    return category if category in JOB_CATEGORIES else 'Other'
+
+
+def _area_of(lat: float, lng: float) -> str:
+    idx = int(nearest_area(np.array([lat]), np.array([lng]))[0])
+    return AREA_NAMES[idx] if idx >= 0 else UNMAPPED
+
+
+def _key(job: dict[str, Any], ts: datetime) -> tuple[str, dict[str, Any], Optional[tuple[float, float]]]:
+    geo = job.get('geo') or {}
+    point = (geo['lat'], geo['lng']) if geo.get('lat') is not None else job_coordinates(job)
+    area = job.get('area') or (_area_of(*point) if point else UNMAPPED)
+    category = str(job.get('category') or '')
+    day = ts.date()
+    return tile_id(day, area, category), {'area': area, 'category': category, 'date': day.isoformat()}, point
+
+
+def counts_in_tiles(job: dict[str, Any]) -> bool:
+    return job.get('status') in COUNTED_STATUSES and isinstance(job.get('createdAt'), datetime)
+
+
+def job_delta(job: dict[str, Any], sign: int = 1) -> tuple[str, dict[str, Any]]:
+    """Plain-number change one job makes to the tile of the day it was created."""
+    ts = job['createdAt']
+    doc_id, dims, point = _key(job, ts)
+    price = float(job.get('priceKes') or 0)
+    delta = dims | {'jobs': sign, 'priceSum': sign * price, 'hours': {str(ts.hour): sign}}
+    if point:
+        cell = geohash.encode(point[0], point[1], CELL_PRECISION)
+        delta['cells'] = {cell: {'n': sign, 'priceSum': sign * price, 'latSum': sign * point[0], 'lngSum': sign * point[1]}}
+    return doc_id, delta
+
+
+def completion_delta(job: dict[str, Any], sign: int = 1) -> tuple[str, dict[str, Any]]:
+    """Plain-number change a completion makes to the tile of the day it completed."""
+    doc_id, dims, _ = _key(job, job['completedAt'])
+    return doc_id, dims | {'completed': sign, 'completedValue': sign * float(job.get('priceKes') or 0)}
+
+
+def as_increments(delta: dict[str, Any]) -> dict[str, Any]:
+    """A job_delta/completion_delta as a set(merge=True) payload of server-side increments."""
+    def convert(d: dict[str, Any]) -> dict[str, Any]:
+        return {k: convert(v) if isinstance(v, dict) else Increment(v) for k, v in d.items()}
+    dims = {k: delta[k] for k in _DIMENSIONS}
+    return dims | convert({k: v for k, v in delta.items() if k not in _DIMENSIONS}) | {'updatedAt': datetime.utcnow()}
+
+
+def merge_delta(tile: dict[str, Any], delta: dict[str, Any]) -> dict[str, Any]:
+    for k, v in delta.items():
+        if k in _DIMENSIONS:
+            tile[k] = v
+        elif isinstance(v, dict):
+            merge_delta(tile.setdefault(k, {}), v)
+        else:
+            tile[k] = tile.get(k, 0) + v
+    return tile
+
+
+def deltas_for_change(before: Optional[dict[str, Any]], after: Optional[dict[str, Any]]) -> list[tuple[str, dict[str, Any]]]:
+    """Tile deltas that move a job from its `before` state to its `after` state (None = absent)."""
+    out = []
+    if before and counts_in_tiles(before):
+        out.append(job_delta(before, -1))
+    if after and counts_in_tiles(after):
+        out.append(job_delta(after, 1))
+    if before and before.get('status') == 'completed' and isinstance(before.get('completedAt'), datetime):
+        out.append(completion_delta(before, -1))
+    if after and after.get('status') == 'completed' and isinstance(after.get('completedAt'), datetime):
+        out.append(completion_delta(after, 1))
+    # One write per tile (an edit that leaves the tile unchanged nets out to nothing)
+    combined: dict[str, dict[str, Any]] = {}
+    for doc_id, delta in out:
+        merge_delta(combined.setdefault(doc_id, {}), delta)
+    return [(doc_id, delta) for doc_id, delta in combined.items() if _nonzero(delta)]
+
+
+def _nonzero(delta: dict[str, Any]) -> bool:
+    return any(_nonzero(v) if isinstance(v, dict) else v != 0 for k, v in delta.items() if k not in _DIMENSIONS)
+
+
+class TileStore:
+    """In-memory mirror of the recent tiles, refreshed by delta sync; every heatmap read is served from here."""
+
+    def __init__(self) -> None:
+        self._by_day: dict[str, dict[str, dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self.synced_at: Optional[datetime] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.synced_at is not None
+
+    def put(self, doc_id: str, tile: dict[str, Any]) -> None:
+        with self._lock:
+            self._by_day.setdefault(tile['date'], {})[doc_id] = tile
+
+    def apply(self, doc_id: str, delta: dict[str, Any]) -> None:
+        # Local writes show up at once; the next sync replaces the tile with the stored one anyway
+        with self._lock:
+            day = self._by_day.setdefault(delta['date'], {})
+            day[doc_id] = merge_delta(day.get(doc_id, {}), delta)
+
+    def apply_all(self, deltas: list[tuple[str, dict[str, Any]]]) -> None:
+        for doc_id, delta in deltas:
+            self.apply(doc_id, delta)
+        if deltas:
+            invalidate_tags('heatmap')
+
+    def tiles(self, start: date, end: date, category: Optional[str] = None, area: Optional[str] = None) -> list[dict[str, Any]]:
+        out = []
+        with self._lock:
+            for i in range((end - start).days + 1):
+                for tile in self._by_day.get((start + timedelta(days=i)).isoformat(), {}).values():
+                    if (category is None or tile.get('category') == category) and (area is None or tile.get('area') == area):
+                        out.append(tile)
+        return out
+
+    def sync_from_store(self) -> int:
+        from .repos import HeatmapTilesRepo
+        if get_db() is None:
+            return 0
+        started = datetime.utcnow()
+        if self.synced_at:
+            docs = HeatmapTilesRepo.changed_since(self.synced_at - timedelta(seconds=5))
+        else:
+            docs = HeatmapTilesRepo.since_day(datetime.utcnow().date() - timedelta(days=settings.heatmap_tile_days))
+        count = 0
+        for doc_id, tile in docs:
+            self.put(doc_id, tile)
+            count += 1
+        if count:
+            invalidate_tags('heatmap')
+        cutoff = (datetime.utcnow().date() - timedelta(days=settings.heatmap_tile_days)).isoformat()
+        with self._lock:
+            for day in [d for d in self._by_day if d < cutoff]:
+                del self._by_day[day]
+        self.synced_at = started
+        return count
+
+
+tile_store = TileStore()
+
+
+def window(period: int, end: Optional[date] = None) -> tuple[date, date]:
+    end = end or datetime.utcnow().date()
+    return end - timedelta(days=period - 1), end
+
+
+def density(tiles: Iterable[dict[str, Any]]) -> dict[str, Any]:
+    out = {
+        area: {
+            'totalJobs': 0,
+            'averagePrice': 0,
+            'categories': {k: {'count': 0, 'percentage': 0, 'averagePrice': 0} for k in JOB_CATEGORIES},
+            'coordinates': data['coordinates'],
+            'districts': data['districts'],
+            '_priceSum': 0.0,
+        }
+        for area, data in KENYA_AREAS.items()
+    }
+    sums: dict[tuple[str, str], float] = {}
+    for t in tiles:
+        a = out.get(t.get('area'))
+        if a is None:
+            continue
+        n = int(t.get('jobs', 0))
+        a['totalJobs'] += n
+        a['_priceSum'] += float(t.get('priceSum', 0))
+        category = bucket(t.get('category'))
+        a['categories'][category]['count'] += n
+        sums[(t['area'], category)] = sums.get((t['area'], category), 0.0) + float(t.get('priceSum', 0))
+    for area, a in out.items():
+        total = a['totalJobs']
+        a['averagePrice'] = a.pop('_priceSum') / total if total else 0
+        for cat, c in a['categories'].items():
+            c['percentage'] = c['count'] / total * 100 if total else 0
+            c['averagePrice'] = sums.get((area, cat), 0.0) / c['count'] if c['count'] else 0
+    return out
+
+
+def categories(tiles: Iterable[dict[str, Any]]) -> dict[str, Any]:
+    counts = {k: 0 for k in JOB_CATEGORIES}
+    values = {k: 0.0 for k in JOB_CATEGORIES}
+    for t in tiles:
+        category = bucket(t.get('category'))
+        counts[category] += int(t.get('jobs', 0))
+        values[category] += float(t.get('priceSum', 0))
+    total = sum(counts.values())
+    return {
+        k: {
+            'count': counts[k],
+            'percentage': counts[k] / total * 100 if total else 0,
+            'averagePrice': values[k] / counts[k] if counts[k] else 0,
+            'totalValue': values[k],
+            'color': v['color'],
+            'icon': v['icon'],
+            'intensity': v['intensity'],
+        } for k, v in JOB_CATEGORIES.items()
+    }
+
+
+def heatmap(tiles: Iterable[dict[str, Any]]) -> dict[str, Any]:
+    """The /heatmap/jobs payload assembled from tile sums instead of individual jobs."""
+    cells: dict[str, dict[str, Any]] = {}
+    area_counts = {name: 0 for name in AREA_NAMES}
+    hours = [0] * 24
+    cat_counts = {k: 0 for k in JOB_CATEGORIES}
+    cat_sums = {k: 0.0 for k in JOB_CATEGORIES}
+    total = 0
+    price_sum = 0.0
+    for t in tiles:
+        n = int(t.get('jobs', 0))
+        total += n
+        price_sum += float(t.get('priceSum', 0))
+        category = bucket(t.get('category'))
+        cat_counts[category] += n
+        cat_sums[category] += float(t.get('priceSum', 0))
+        if t['area'] in area_counts:
+            area_counts[t['area']] += n
+        for h, c in (t.get('hours') or {}).items():
+            hours[int(h)] += int(c)
+        for gh, c in (t.get('cells') or {}).items():
+            if not c.get('n'):
+                continue
+            agg = cells.setdefault(gh, {'n': 0, 'priceSum': 0.0, 'latSum': 0.0, 'lngSum': 0.0, 'byCategory': {}, 'avgs': [], 'area': t['area']})
+            agg['n'] += c['n']
+            agg['priceSum'] += c['priceSum']
+            agg['latSum'] += c['latSum']
+            agg['lngSum'] += c['lngSum']
+            agg['byCategory'][category] = agg['byCategory'].get(category, 0) + c['n']
+            agg['avgs'].append(c['priceSum'] / c['n'])
+
+    points = []
+    live = [c for c in cells.values() if c['n'] > 0]
+    avg_prices = np.array([c['priceSum'] / c['n'] for c in live])
+    intensity = intensity_levels(avg_prices) if len(live) else []
+    for c, price, level in zip(live, avg_prices, intensity):
+        category = max(c['byCategory'].items(), key=lambda kv: kv[1])[0]
+        points.append({
+            'coordinates': {'latitude': c['latSum'] / c['n'], 'longitude': c['lngSum'] / c['n']},
+            'count': int(c['n']),
+            'category': category,
+            'price': float(price),
+            'minPrice': float(min(c['avgs'])),
+            'maxPrice': float(max(c['avgs'])),
+            'intensity': float(level),
+            'color': JOB_CATEGORIES[category]['color'],
+            'icon': JOB_CATEGORIES[category]['icon'],
+            'area': c['area'] if c['area'] != UNMAPPED else None,
+        })
+    return {
+        'heatmap': {'points': points, 'areaCounts': area_counts, 'totalJobs': total},
+        'statistics': {
+            'totalJobs': total,
+            'averagePrice': price_sum / total if total else 0,
+            'priceRange': {'min': float(avg_prices.min()) if len(live) else 0, 'max': float(avg_prices.max()) if len(live) else 0},
+            'categoryDistribution': {
+                k: {'count': cat_counts[k], 'percentage': cat_counts[k] / total * 100 if total else 0, 'averagePrice': cat_sums[k] / cat_counts[k] if cat_counts[k] else 0}
+                for k in JOB_CATEGORIES
+            },
+            'areaDistribution': area_counts,
+            'timeDistribution': {str(h): c for h, c in enumerate(hours) if c},
+        },
+    }
+
+
+async def sync_forever() -> None:
+    while True:
+        try:
+            await run_blocking(tile_store.sync_from_store)
+        except Exception:
+            pass  # serve the tiles we have; retry on the next tick
+        await asyncio.sleep(settings.heatmap_tile_sync_seconds)
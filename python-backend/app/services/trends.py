@@ -0,0 +1,219 @@
+from __future__ import annotations
+import asyncio
+import heapq
+import math
+import os
+import pickle
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterable, Optional
+from ..config import settings
+from .async_repos import run_blocking
+from .heatmap import JOB_CATEGORIES
+
+
+# Marginal counters use ANY for the dimension they sum over. Keys are bounded by
+# categories x areas, so memory does not grow with job volume.
+ANY = "*"
+KINDS = ("hotspots", "categories", "areas")
+# Job fields observe_new reads
+EVENT_FIELDS = ("id", "createdAt", "category", "area")
+
+
+def epoch(value: datetime) -> float:
+    """Seconds since the epoch; naive datetimes are UTC, as written by now_ts()."""
+    return (value if value.tzinfo else value.replace(tzinfo=timezone.utc)).timestamp()
+
+
+class RingCounter:
+    """Per-bucket event counts over a fixed ring, plus an exponentially weighted baseline.
+
+    A bucket feeds the baseline mean/variance once, when it falls `lag` buckets behind
+    the head, so a query window of up to `lag` buckets never counts towards its own
+    expectation. Each event is O(1) amortised no matter how long the counter sat idle.
+    """
+
+    __slots__ = ("counts", "head", "mean", "var")
+
+    def __init__(self, size: int) -> None:
+        self.counts = [0.0] * size
+        self.head: Optional[int] = None
+        self.mean = 0.0
+        self.var = 0.0
+
+    def _close(self, x: float, alpha: float) -> None:
+        diff = x - self.mean
+        incr = alpha * diff
+        self.mean += incr
+        self.var = (1 - alpha) * (self.var + diff * incr)
+
+    def advance(self, bucket: int, alpha: float, lag: int) -> None:
+        if self.head is None:
+            self.head = bucket
+            return
+        steps = bucket - self.head
+        if steps <= 0:
+            return
+        size = len(self.counts)
+        # Buckets head-lag+1 .. bucket-lag leave the lagged span; those past the head are empty
+        last = min(bucket - lag, self.head)
+        for b in range(self.head - lag + 1, last + 1):
+            self._close(self.counts[b % size], alpha)
+        empty = steps - max(0, last - self.head + lag)
+        for _ in range(min(empty, size)):
+            self._close(0.0, alpha)
+        idle = empty - size
+        if idle > 0:
+            # Long silence: decay through the remaining empty buckets in one step
+            self.mean *= (1 - alpha) ** idle
+            self.var *= (1 - alpha) ** idle
+        for b in range(self.head + 1, self.head + 1 + min(steps, size)):
+            self.counts[b % size] = 0.0
+        self.head = bucket
+
+    def add(self, bucket: int, alpha: float, lag: int) -> None:
+        self.advance(bucket, alpha, lag)
+        # Anything at or beyond the lag has already been folded into the baseline
+        if bucket > self.head - lag:
+            self.counts[bucket % len(self.counts)] += 1
+
+    def recent(self, window: int) -> float:
+        if self.head is None:
+            return 0.0
+        size = len(self.counts)
+        return sum(self.counts[(self.head - i) % size] for i in range(min(window, size)))
+
+
+class TrendEngine:
+    """Streaming job-posting counters per (category, area), ranked by how far the recent
+    window runs above each key's own decayed baseline.
+
+    The baseline lags the head by half the ring, which is also the longest window `top`
+    scores, so a multi-day surge is measured against the time before it started.
+    """
+
+    def __init__(self, bucket_seconds: int, buckets: int, half_life_buckets: float) -> None:
+        self.bucket_seconds = bucket_seconds
+        self.buckets = buckets
+        self.lag = buckets // 2
+        self.alpha = 1 - 0.5 ** (1 / half_life_buckets)
+        self._counters: dict[tuple[str, str], RingCounter] = {}
+        self._lock = threading.Lock()
+        # Newest event folded in; after a restore, replayed events at or before it are skipped
+        self.watermark = 0.0
+        self._restored_until = 0.0
+        # Jobs counted inside the last sync overlap, so the next pass doesn't count them again
+        self._overlap: set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self._counters)
+
+    def observe(self, category: Optional[str], area: Optional[str], ts: float) -> None:
+        if ts <= self._restored_until:
+            return
+        category = category if category in JOB_CATEGORIES else "Other"
+        area = area or "Unmapped"
+        bucket = int(ts // self.bucket_seconds)
+        with self._lock:
+            for key in ((category, area), (category, ANY), (ANY, area)):
+                counter = self._counters.get(key)
+                if counter is None:
+                    counter = self._counters[key] = RingCounter(self.buckets)
+                counter.add(bucket, self.alpha, self.lag)
+            self.watermark = max(self.watermark, ts)
+
+    def observe_new(self, jobs: Iterable[dict[str, Any]], since: Optional[datetime], started: datetime, overlap_seconds: float) -> int:
+        """Count jobs created after `since` from one incremental sync pass (all of them on a cold start).
+
+        The feed comes in document-id order, which is not creation order for legacy ids;
+        events are observed oldest first, as a bucket behind the baseline lag no longer counts.
+        """
+        cutoff = epoch(since) if since else 0.0
+        next_overlap = epoch(started) - overlap_seconds
+        fresh = []
+        for job in jobs:
+            created = job.get("createdAt")
+            if not isinstance(created, datetime):
+                continue
+            ts = epoch(created)
+            if ts > cutoff and job["id"] not in self._overlap:
+                fresh.append((ts, job["id"], job.get("category"), job.get("area")))
+        fresh.sort(key=lambda e: e[0])
+        overlap: set[str] = set()
+        for ts, job_id, category, area in fresh:
+            self.observe(category, area, ts)
+            if ts > next_overlap:
+                overlap.add(job_id)
+        self._overlap = overlap
+        return len(fresh)
+
+    def top(self, kind: str = "hotspots", k: int = 10, window: int = 24, min_jobs: int = 3, now: Optional[float] = None) -> list[dict[str, Any]]:
+        """The k keys whose last `window` buckets (at most `lag`) sit furthest above their baseline, by z-score."""
+        window = min(window, self.lag)
+        bucket = int((now or time.time()) // self.bucket_seconds)
+        scored = []
+        with self._lock:
+            for (category, area), counter in self._counters.items():
+                if (kind == "categories") != (area == ANY) or (kind == "areas") != (category == ANY):
+                    continue
+                counter.advance(bucket, self.alpha, self.lag)
+                jobs = counter.recent(window)
+                if jobs < min_jobs:
+                    continue
+                expected = counter.mean * window
+                z = (jobs - expected) / math.sqrt(counter.var * window + 1.0)
+                scored.append((z, jobs, expected, category, area))
+        rows = []
+        for z, jobs, expected, category, area in heapq.nlargest(k, scored):
+            if kind == "hotspots":
+                row = {"category": category, "area": area}
+            else:
+                row = {"name": category if kind == "categories" else area}
+            rows.append(row | {"jobs": int(jobs), "expected": round(expected, 2), "ratio": round((jobs + 1) / (expected + 1), 3), "zScore": round(z, 3)})
+        return rows
+
+    def save_snapshot(self, path: Path) -> None:
+        with self._lock:
+            payload = {
+                "bucketSeconds": self.bucket_seconds,
+                "buckets": self.buckets,
+                "lag": self.lag,
+                "watermark": self.watermark,
+                "counters": {key: (list(c.counts), c.head, c.mean, c.var) for key, c in self._counters.items()},
+            }
+        tmp = path.with_name(f".{path.name}.tmp")
+        tmp.parent.mkdir(parents=True, exist_ok=True)
+        tmp.write_bytes(pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL))
+        os.replace(tmp, path)
+
+    def load_snapshot(self, path: Path) -> bool:
+        """Restore the window so a restart doesn't start trending from zero."""
+        try:
+            payload = pickle.loads(path.read_bytes())
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return False
+        geometry = (payload.get("bucketSeconds"), payload.get("buckets"), payload.get("lag"))
+        if geometry != (self.bucket_seconds, self.buckets, self.lag):
+            return False  # bucket geometry or baseline lag changed; rebuild from the job stream instead
+        with self._lock:
+            for key, (counts, head, mean, var) in payload["counters"].items():
+                counter = RingCounter(self.buckets)
+                counter.counts, counter.head, counter.mean, counter.var = counts, head, mean, var
+                self._counters[key] = counter
+            self.watermark = self._restored_until = payload.get("watermark", 0.0)
+        return True
+
+
+engine = TrendEngine(settings.trend_bucket_seconds, settings.trend_buckets, settings.trend_half_life_buckets)
+
+
+async def snapshot_forever() -> None:
+    while True:
+        await asyncio.sleep(settings.trend_snapshot_seconds)
+        try:
+            if len(engine):
+                await run_blocking(engine.save_snapshot, settings.trend_snapshot_path)
+        except Exception:
+            pass  # keep counting; the next tick writes a fresh snapshot
@@ -0,0 +1,123 @@
+from __future__ import annotations
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+from fastapi import UploadFile
+from .async_repos import run_blocking
+from ..config import settings
+from ..utils.ids import new_id
+
+
+IMAGE_TYPES = {"image/png", "image/jpeg", "image/webp"}
+AUDIO_TYPES = {"audio/mpeg", "audio/wav", "audio/webm", "audio/ogg", "audio/mp4", "audio/amr", "audio/flac"}
+
+EXTENSIONS = {
+    "image/png": "png", "image/jpeg": "jpg", "image/webp": "webp",
+    "audio/mpeg": "mp3", "audio/wav": "wav", "audio/webm": "webm", "audio/ogg": "ogg",
+    "audio/mp4": "m4a", "audio/amr": "amr", "audio/flac": "flac",
+}
+
+# ISO-BMFF major brand (bytes 8-12 after "ftyp") -> type. Plain mp42/isom is what phone
+# recorders write for .m4a voice notes; other brands are images or video, never audio.
+FTYP_BRANDS = {
+    b"M4A ": "audio/mp4", b"M4B ": "audio/mp4", b"mp42": "audio/mp4", b"isom": "audio/mp4",
+    b"heic": "image/heic", b"heix": "image/heic", b"mif1": "image/heif", b"avif": "image/avif",
+    b"qt  ": "video/quicktime",
+}
+
+# Bytes needed from the head of a file to recognise every type below
+SNIFF_BYTES = 16
+
+
+class UploadRejected(Exception):
+    def __init__(self, status_code: int, code: str, message: str) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+        self.code = code
+        self.message = message
+
+    def detail(self) -> dict:
+        return {"success": False, "message": self.message, "code": self.code}
+
+
+@dataclass(frozen=True)
+class StoredUpload:
+    path: Path
+    size: int
+    content_type: str
+
+
+def sniff(head: bytes) -> Optional[str]:
+    """Content type from magic bytes; the client's Content-Type header is never trusted."""
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+        return "audio/wav"
+    if head.startswith(b"ID3") or head[:2] in (b"\xff\xfb", b"\xff\xf3", b"\xff\xf2"):
+        return "audio/mpeg"
+    if head.startswith(b"OggS"):
+        return "audio/ogg"
+    if head.startswith(b"\x1a\x45\xdf\xa3"):
+        return "audio/webm"
+    if head[4:8] == b"ftyp":
+        return FTYP_BRANDS.get(head[8:12], "video/mp4")
+    if head.startswith(b"#!AMR"):
+        return "audio/amr"
+    if head.startswith(b"fLaC"):
+        return "audio/flac"
+    return None
+
+
+def _append(fh, chunk: bytes) -> None:
+    fh.write(chunk)
+
+
+def _finish(fh, tmp: Path, final: Path) -> None:
+    fh.flush()
+    os.fsync(fh.fileno())
+    fh.close()
+    os.replace(tmp, final)
+
+
+def _abort(fh, tmp: Path) -> None:
+    fh.close()
+    tmp.unlink(missing_ok=True)
+
+
+async def receive(upload: UploadFile, directory: Path, allowed: set[str], max_bytes: int, name: Optional[str] = None) -> StoredUpload:
+    """Stream an upload to `directory` in fixed-size chunks.
+
+    The type is sniffed from the first chunk and the size cap is enforced as bytes
+    arrive, so a rejected upload never costs more than one chunk of memory. Data
+    goes to a hidden temp file that is renamed into place only once complete.
+    """
+    if upload.size is not None and upload.size > max_bytes:
+        raise UploadRejected(413, "UPLOAD_TOO_LARGE", "File exceeds the upload size limit")
+    head = await upload.read(settings.upload_chunk_bytes)
+    content_type = sniff(head[:SNIFF_BYTES])
+    if content_type not in allowed:
+        raise UploadRejected(415, "UNSUPPORTED_MEDIA_TYPE", "Unsupported file type")
+
+    directory.mkdir(parents=True, exist_ok=True)
+    final = directory / f"{name or new_id('UPL')}.{EXTENSIONS[content_type]}"
+    tmp = directory / f".{final.name}.part"
+    fh = await run_blocking(tmp.open, "wb")
+    size = 0
+    try:
+        chunk = head
+        while chunk:
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadRejected(413, "UPLOAD_TOO_LARGE", "File exceeds the upload size limit")
+            await run_blocking(_append, fh, chunk)
+            chunk = await upload.read(settings.upload_chunk_bytes)
+        await run_blocking(_finish, fh, tmp, final)
+    except BaseException:
+        await run_blocking(_abort, fh, tmp)
+        raise
+    return StoredUpload(final, size, content_type)
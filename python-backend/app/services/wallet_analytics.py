@@ -0,0 +1,114 @@
+from __future__ import annotations
+from datetime import datetime
+from typing import Any, Optional
+import numpy as np
+import pandas as pd
+from .rollups import SUCCESS_STATUSES, tx_direction
+
+# Columnar counterpart of the per-row helpers in routers/wallet.py, for windows of
+# hundreds of thousands of transactions. Timestamps are handled as naive UTC.
+
+COLUMNS = ("id", "type", "amount", "currencyCode", "date", "status", "description", "category", "method", "hustle")
+
+
+def _parse_dates(values: pd.Series, now: datetime) -> pd.Series:
+    """ISO strings, datetimes and {_seconds} dicts -> naive UTC datetime64; unparseable values become `now`."""
+    out = pd.Series(pd.NaT, index=values.index, dtype="datetime64[ns]")
+    # One pass to sort values by shape: 1 string, 2 datetime, 3 {_seconds} dict, 0 anything else
+    kinds = np.fromiter(
+        (1 if isinstance(v, str) else 2 if isinstance(v, datetime) else 3 if isinstance(v, dict) else 0 for v in values),
+        dtype=np.int8, count=len(values),
+    )
+    is_str, is_dt, is_dict = kinds == 1, kinds == 2, kinds == 3
+    if is_str.any():
+        parsed = pd.to_datetime(values[is_str], utc=True, errors="coerce", format="ISO8601")
+        out[is_str] = parsed.dt.tz_localize(None)
+    if is_dt.any():
+        out[is_dt] = pd.to_datetime(values[is_dt], utc=True).dt.tz_localize(None)
+    if is_dict.any():
+        seconds = pd.to_numeric([d.get("_seconds") or d.get("seconds") for d in values[is_dict]], errors="coerce")
+        out[is_dict] = pd.to_datetime(np.trunc(seconds), unit="s")
+    return out.fillna(pd.Timestamp(now))
+
+
+def load_transactions(transactions: list[dict[str, Any]], now: Optional[datetime] = None) -> pd.DataFrame:
+    """Load raw transaction dicts into typed columns once (amount, currency, timestamp, direction)."""
+    now = now or datetime.utcnow()
+    raw = pd.DataFrame.from_records(transactions, columns=[*COLUMNS, "initiatedAt", "transactionId"])
+    date_src = raw["date"].where(raw["date"].notna() & (raw["date"] != ""), raw["initiatedAt"])
+    df = pd.DataFrame({
+        "id": raw["id"].where(raw["id"].notna(), raw["transactionId"]),
+        "type": raw["type"],
+        "amount": pd.to_numeric(raw["amount"], errors="coerce").fillna(0.0).astype(np.float64),
+        "currencyCode": raw["currencyCode"].where(raw["currencyCode"].notna() & (raw["currencyCode"] != ""), "KES").astype(str),
+        "ts": _parse_dates(date_src, now),
+        "status": raw["status"],
+        "description": raw["description"],
+        "category": raw["category"],
+        "method": raw["method"],
+        "hustle": raw["hustle"],
+    })
+    df["direction"] = direction_codes(df["type"])
+    return df
+
+
+def direction_codes(types: pd.Series) -> np.ndarray:
+    """+1 inflow, -1 outflow, 0 unknown, from the per-row classifier run once per distinct type."""
+    codes, uniques = pd.factorize(types)
+    lookup = np.array([{"in": 1, "out": -1}.get(tx_direction(t), 0) for t in uniques] + [0], dtype=np.int64)
+    return lookup[codes]  # code -1 (missing) picks the trailing 0
+
+
+def filter_window(df: pd.DataFrame, start_at: Optional[datetime], end_at: Optional[datetime], limit: int) -> pd.DataFrame:
+    mask = np.ones(len(df), dtype=bool)
+    if start_at:
+        mask &= (df["ts"] >= pd.Timestamp(start_at)).to_numpy()
+    if end_at:
+        mask &= (df["ts"] <= pd.Timestamp(end_at)).to_numpy()
+    return df[mask].sort_values("ts", ascending=False, kind="stable").head(limit)
+
+
+def analyze(df: pd.DataFrame) -> dict[str, Any]:
+    """Totals, averages, category counts and success rate via group-bys; same shape as _analyze_transactions."""
+    total = len(df)
+    if total == 0:
+        return {"totalsByCurrency": {}, "averagesByCurrency": [], "categoryCounts": [], "successRate": 0.0, "totalTransactions": 0, "lastActivity": None}
+    amount = df["amount"].to_numpy()
+    direction = df["direction"].to_numpy() if "direction" in df else direction_codes(df["type"])
+    grouped = pd.DataFrame({
+        "currency": df["currencyCode"].to_numpy(),
+        "inflow": np.where(direction == 1, amount, 0.0),
+        "outflow": np.where(direction == -1, amount, 0.0),
+        "abs": np.abs(amount),
+    }).groupby("currency", sort=False)
+    sums = grouped[["inflow", "outflow"]].sum()
+    means = grouped["abs"].mean()
+    totals = {
+        cur: {"inflow": float(row.inflow), "outflow": float(row.outflow), "net": float(row.inflow - row.outflow)}
+        for cur, row in sums.iterrows()
+    }
+
+    categories = df["category"].where(df["category"].notna() & (df["category"] != ""), "uncategorized").astype(str).str.lower()
+    counts = categories.value_counts()
+    category_counts = [{"category": k, "count": int(v)} for k, v in sorted(counts.items(), key=lambda x: (-x[1], x[0]))]
+
+    success = df["status"].fillna("").astype(str).str.lower().isin(SUCCESS_STATUSES).sum()
+    return {
+        "totalsByCurrency": totals,
+        "averagesByCurrency": [{"currencyCode": cur, "averageAmount": float(v)} for cur, v in means.items()],
+        "categoryCounts": category_counts,
+        "successRate": float(success / total),
+        "totalTransactions": total,
+        "lastActivity": df["ts"].max().to_pydatetime().isoformat(),
+    }
+
+
+def to_records(df: pd.DataFrame) -> list[dict[str, Any]]:
+    """Rows back as SimpleTransaction-shaped dicts (date as ISO string, missing values as None)."""
+    ts = df["ts"].to_numpy(dtype="datetime64[us]")
+    # datetime.isoformat() spelling: seconds, plus microseconds only when there are any
+    seconds = np.datetime_as_string(ts, unit="s").tolist()
+    micros = (ts - ts.astype("datetime64[s]")).astype(np.int64).tolist()
+    dates = [f"{s}.{us:06d}" if us else s for s, us in zip(seconds, micros)]
+    columns = [dates if name == "date" else df[name].astype(object).where(df[name].notna(), None).tolist() for name in COLUMNS]
+    return [dict(zip(COLUMNS, row)) for row in zip(*columns)]
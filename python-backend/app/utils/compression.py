@@ -0,0 +1,90 @@
+from __future__ import annotations
+import zlib
+from typing import Optional
+from ..config import settings
+
+try:
+    import brotli  # optional: enables Content-Encoding: br
+except ImportError:
+    brotli = None
+try:
+    import zstandard  # optional: enables Content-Encoding: zstd
+except ImportError:
+    zstandard = None
+
+
+# (per-request level, precompressed level). Bodies compressed on every response favour
+# speed; bodies compressed once and served from the response cache can afford more.
+LEVELS = {"br": (4, 6), "zstd": (3, 9), "gzip": (6, 9)}
+
+# Already-compressed media gain nothing from another pass
+INCOMPRESSIBLE_TYPES = ("image/", "audio/", "video/", "application/zip", "application/gzip", "application/octet-stream")
+
+
+def available() -> list[str]:
+    """Encodings this process can produce, in server preference order."""
+    installed = {"br": brotli is not None, "zstd": zstandard is not None, "gzip": True}
+    return [e for e in (s.strip() for s in settings.compression_encodings.split(",")) if installed.get(e)]
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """Best encoding the client accepts (highest q, ties broken by server preference), else None."""
+    if not accept_encoding:
+        return None
+    weights: dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding.strip()] = q
+    wildcard = weights.get("*", 0.0)
+    best, best_q = None, 0.0
+    for encoding in available():
+        q = weights.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compressible(content_type: Optional[str]) -> bool:
+    return not (content_type or "").lower().startswith(INCOMPRESSIBLE_TYPES)
+
+
+def compress(encoding: str, data: bytes, precompressed: bool = False) -> bytes:
+    level = LEVELS[encoding][precompressed]
+    if encoding == "br":
+        return brotli.compress(data, quality=level)
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    return zlib.compress(data, level, wbits=31)
+
+
+class StreamCompressor:
+    """Incremental encoder for streamed bodies, at the per-request level."""
+
+    def __init__(self, encoding: str) -> None:
+        level = LEVELS[encoding][0]
+        self.encoding = encoding
+        if encoding == "br":
+            self._obj = brotli.Compressor(quality=level)
+        elif encoding == "zstd":
+            self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+        else:
+            self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, chunk: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._obj.process(chunk) + self._obj.flush()
+        if self.encoding == "zstd":
+            return self._obj.compress(chunk) + self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        return self._obj.compress(chunk) + self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._obj.finish()
+        return self._obj.flush()
@@ -0,0 +1,85 @@
+from __future__ import annotations
+import math
+
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_DECODE = {c: i for i, c in enumerate(_BASE32)}
+
+
+def encode(lat: float, lng: float, precision: int = 9) -> str:
+    lat_lo, lat_hi, lng_lo, lng_hi = -90.0, 90.0, -180.0, 180.0
+    out = []
+    bits, ch, even = 0, 0, True
+    while len(out) < precision:
+        if even:
+            mid = (lng_lo + lng_hi) / 2
+            ch = ch << 1 | (lng >= mid)
+            lng_lo, lng_hi = (mid, lng_hi) if lng >= mid else (lng_lo, mid)
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            ch = ch << 1 | (lat >= mid)
+            lat_lo, lat_hi = (mid, lat_hi) if lat >= mid else (lat_lo, mid)
+        even = not even
+        bits += 1
+        if bits == 5:
+            out.append(_BASE32[ch])
+            bits, ch = 0, 0
+    return "".join(out)
+
+
+def bounds(geohash: str) -> tuple[float, float, float, float]:
+    """(south, west, north, east) of a geohash cell."""
+    lat_lo, lat_hi, lng_lo, lng_hi = -90.0, 90.0, -180.0, 180.0
+    even = True
+    for c in geohash:
+        v = _DECODE[c]
+        for shift in range(4, -1, -1):
+            bit = v >> shift & 1
+            if even:
+                mid = (lng_lo + lng_hi) / 2
+                lng_lo, lng_hi = (mid, lng_hi) if bit else (lng_lo, mid)
+            else:
+                mid = (lat_lo + lat_hi) / 2
+                lat_lo, lat_hi = (mid, lat_hi) if bit else (lat_lo, mid)
+            even = not even
+    return lat_lo, lng_lo, lat_hi, lng_hi
+
+
+def cell_size(precision: int) -> tuple[float, float]:
+    """(height, width) in degrees of a cell at `precision`."""
+    bits = 5 * precision
+    return 180.0 / 2 ** (bits // 2), 360.0 / 2 ** ((bits + 1) // 2)
+
+
+def covering(south: float, west: float, north: float, east: float, precision: int) -> set[str]:
+    """Every cell at `precision` intersecting the box (no antimeridian wrap; Kenya never needs it)."""
+    dlat, dlng = cell_size(precision)
+    south, north = max(south, -90.0), min(north, 90.0 - 1e-9)
+    west, east = max(west, -180.0), min(east, 180.0 - 1e-9)
+    cells = set()
+    lat = south
+    while True:
+        lng = west
+        while True:
+            cells.add(encode(lat, lng, precision))
+            if lng >= east:
+                break
+            lng = min(lng + dlng, east)
+        if lat >= north:
+            break
+        lat = min(lat + dlat, north)
+    return cells
+
+
+def radius_box(lat: float, lng: float, radius_km: float) -> tuple[float, float, float, float]:
+    dlat = radius_km / 110.574
+    dlng = radius_km / (111.320 * max(math.cos(math.radians(lat)), 1e-6))
+    return lat - dlat, lng - dlng, lat + dlat, lng + dlng
+
+
+def precision_for(radius_km: float, max_precision: int = 7) -> int:
+    """Finest precision whose cells are still at least `radius_km` tall, so a box needs few cells."""
+    for p in range(max_precision, 0, -1):
+        if cell_size(p)[0] * 110.574 >= radius_km:
+            return p
+    return 1
@@ -0,0 +1,48 @@
+from __future__ import annotations
+import os
+import threading
+import time
+
+# Crockford base32: lexicographic order of the encoded string matches numeric order
+_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_RANDOM_BITS = 80
+_RANDOM_MAX = (1 << _RANDOM_BITS) - 1
+
+_lock = threading.Lock()
+_last_ms = 0
+_last_rand = 0
+
+
+def _encode(value: int, length: int) -> str:
+    chars = []
+    for _ in range(length):
+        value, rem = divmod(value, 32)
+        chars.append(_ALPHABET[rem])
+    return "".join(reversed(chars))
+
+
+def ulid() -> str:
+    """26-char ULID: 48-bit millisecond timestamp + 80 random bits.
+
+    IDs from one process are strictly increasing (same-millisecond IDs bump the
+    random part); across processes the 80 random bits make collisions negligible
+    without any coordination. Sorting by ID sorts by creation time.
+    """
+    global _last_ms, _last_rand
+    with _lock:
+        now_ms = time.time_ns() // 1_000_000
+        if now_ms <= _last_ms:
+            now_ms = _last_ms
+            _last_rand += 1
+            if _last_rand > _RANDOM_MAX:
+                # Random space for this millisecond exhausted; borrow the next one
+                now_ms += 1
+                _last_rand = int.from_bytes(os.urandom(10), "big")
+        else:
+            _last_rand = int.from_bytes(os.urandom(10), "big")
+        _last_ms = now_ms
+        return _encode(now_ms, 10) + _encode(_last_rand, 16)
+
+
+def new_id(prefix: str) -> str:
+    return f"{prefix}_{ulid()}"
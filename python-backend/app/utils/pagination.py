@@ -0,0 +1,41 @@
+from __future__ import annotations
+import base64
+import json
+from datetime import datetime
+from typing import Any
+
+
+def encode_cursor(value: Any, doc_id: str) -> str:
+    """Opaque cursor for (sort value, doc id). Legacy rows may hold a string or no value at
+    all, so the value's kind is kept to resume in the same place of Firestore's type order."""
+    if isinstance(value, datetime):
+        parts = [value.isoformat(), doc_id]
+    elif isinstance(value, (str, int, float)) and not isinstance(value, bool):
+        parts = [doc_id, "s" if isinstance(value, str) else "n", value]
+    else:
+        parts = [doc_id]
+    raw = json.dumps(parts, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[Any, str]:
+    """Inverse of encode_cursor: (sort value or None, doc id); raises ValueError on anything malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        parts = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if len(parts) == 2:
+            return datetime.fromisoformat(parts[0]), str(parts[1])
+        if len(parts) == 3 and parts[1] in ("s", "n"):
+            value = parts[2]
+            if not isinstance(value, str if parts[1] == "s" else (int, float)):
+                raise ValueError(value)
+            return value, str(parts[0])
+        if len(parts) == 1:
+            return None, str(parts[0])
+        raise ValueError(parts)
+    except Exception as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def pagination_meta(page: int, limit: int, total: int, next_cursor: str | None) -> dict[str, Any]:
+    return {"page": page, "limit": limit, "total": total, "nextCursor": next_cursor, "hasMore": next_cursor is not None}
@@ -0,0 +1,60 @@
+from __future__ import annotations
+import re
+from typing import Optional
+
+# Country calling codes we canonicalise
+COUNTRY_CODES = ("254", "27")
+DEFAULT_COUNTRY_CODE = "254"
+# Only these local prefixes are unambiguously Kenyan mobile numbers (07x / 01x)
+LOCAL_PREFIXES = ("07", "01")
+
+_STRIP = re.compile(r"[\s\-().]")
+
+
+def _clean(raw: str) -> str:
+    s = _STRIP.sub("", str(raw or "").strip())
+    if s.startswith("00"):
+        s = "+" + s[2:]
+    return s
+
+
+def to_e164(raw: str | None) -> Optional[str]:
+    """Canonical E.164 form for KE/ZA numbers, or None if it cannot be derived.
+
+    Handles a missing '+', the trunk zero after the country code (+2540.. / +270..)
+    and local 07x/01x numbers; any other local number is not clearly Kenyan
+    and yields None.
+    """
+    s = _clean(raw or "")
+    if not s:
+        return None
+    digits = s.lstrip("+")
+    if not digits.isdigit():
+        return None
+    for cc in COUNTRY_CODES:
+        if digits.startswith(cc):
+            national = digits[len(cc):].lstrip("0")
+            return f"+{cc}{national}" if national else None
+    if s.startswith("+"):
+        return s
+    if digits.startswith(LOCAL_PREFIXES) and len(digits) > 2:
+        return f"+{DEFAULT_COUNTRY_CODE}{digits[1:]}"
+    return None
+
+
+def phone_variants(raw: str | None) -> list[str]:
+    """Spellings older records may have stored in `phoneNumber`, canonical form first."""
+    s = _clean(raw or "")
+    variants = [to_e164(s), s]
+    if s and not s.startswith("+") and s.startswith(COUNTRY_CODES):
+        variants.append("+" + s)
+    for cc in COUNTRY_CODES:
+        if s.startswith(f"+{cc}0"):
+            variants.append(f"+{cc}" + s[len(cc) + 2:])
+    seen: set[str] = set()
+    ordered: list[str] = []
+    for v in variants:
+        if v and v not in seen:
+            seen.add(v)
+            ordered.append(v)
+    return ordered
@@ -0,0 +1,78 @@
+from __future__ import annotations
+import functools
+import hashlib
+import inspect
+import json
+from typing import Any, Awaitable, Callable
+from starlette.requests import Request
+from starlette.responses import Response
+from ..config import settings
+from ..services.cache import get_cache, tag_versions
+from . import compression
+from .responses import dumps
+
+
+def _if_none_match(header: str | None, etag: str) -> bool:
+    if not header:
+        return False
+    return any(tag.strip().removeprefix("W/") in (etag, "*") for tag in header.split(","))
+
+
+def _respond(request: Request, entry: tuple[str, bytes, dict[str, bytes]], cache_control: str) -> Response:
+    etag, body, encoded = entry
+    headers = {"etag": etag, "cache-control": cache_control, "vary": "Accept-Encoding"}
+    if _if_none_match(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    encoding = compression.negotiate(request.headers.get("accept-encoding"))
+    if encoding in encoded:
+        return Response(encoded[encoding], media_type="application/json", headers=headers | {"content-encoding": encoding})
+    return Response(body, media_type="application/json", headers=headers)
+
+
+def _precompress(body: bytes) -> dict[str, bytes]:
+    if len(body) < settings.compression_min_bytes:
+        return {}
+    return {encoding: compression.compress(encoding, body, precompressed=True) for encoding in compression.available()}
+
+
+def cached_response(ttl: float, tags: tuple[str, ...] = (), per_user: bool = False) -> Callable:
+    """Cache a GET endpoint's serialized (and precompressed) body per route and validated params.
+
+    `tags` may reference params, e.g. "user:{userId}"; `invalidate_tags` on any of them
+    drops the entry everywhere the cache backend is shared. Hits, and conditional
+    requests matching the stored ETag, never call the endpoint.
+    """
+
+    def decorator(endpoint: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        signature = inspect.signature(endpoint, eval_str=True)
+        route = f"{endpoint.__module__}.{endpoint.__qualname__}"
+        # Anything behind authentication must not be stored by shared caches
+        cache_control = "private, no-cache" if "user" in signature.parameters else "public, no-cache"
+
+        @functools.wraps(endpoint)
+        async def wrapper(*args: Any, _cache_request: Request, **kwargs: Any) -> Any:
+            params = {k: v for k, v in kwargs.items() if k != "user"}
+            entry_tags = [tag.format(**params) for tag in tags]
+            identity = {
+                "params": params,
+                "user": kwargs["user"]["userId"] if per_user else None,
+                "tags": tag_versions(entry_tags),
+            }
+            digest = hashlib.blake2b(json.dumps(identity, sort_keys=True, default=str).encode(), digest_size=16).hexdigest()
+            key = f"response:{route}:{digest}"
+            entry = get_cache().get(key)
+            if entry is None:
+                result = await endpoint(*args, **kwargs)
+                if isinstance(result, Response):
+                    return result
+                body = dumps(result)
+                etag = f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+                entry = (etag, body, _precompress(body))
+                get_cache().set(key, entry, ttl=ttl)
+            return _respond(_cache_request, entry, cache_control)
+
+        request_param = inspect.Parameter("_cache_request", inspect.Parameter.KEYWORD_ONLY, annotation=Request)
+        wrapper.__signature__ = signature.replace(parameters=[*signature.parameters.values(), request_param])
+        return wrapper
+
+    return decorator
@@ -0,0 +1,45 @@
+from __future__ import annotations
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(obj: Any) -> Any:
+    # orjson only handles exact datetime types; Firestore's DatetimeWithNanoseconds is a subclass
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, Decimal):
+        return int(obj) if obj.as_tuple().exponent >= 0 else float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, bytes):
+        return obj.decode()
+    # Anything rarer keeps FastAPI's encoding
+    return jsonable_encoder(obj)
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=OPTIONS)
+
+
+class ORJSONResponse(JSONResponse):
+    """Default response class: same JSON as FastAPI's encoder, rendered by orjson.
+
+    FastAPI still runs jsonable_encoder over plain dicts returned by a route; routes
+    with large, already-plain payloads return this class directly to skip that pass.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
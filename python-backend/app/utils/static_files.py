@@ -0,0 +1,72 @@
+from __future__ import annotations
+import mimetypes
+import os
+import re
+import stat
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+from ..services.cache import LRUCache
+from ..services.uploads import SNIFF_BYTES, sniff
+
+
+# <anything>_<20 hex digest>.<ext>, as written by services.images.Variant.filename
+HASHED_NAME = re.compile(r"^.+_([0-9a-f]{20})\.[a-z0-9]+$")
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+# Un-hashed (legacy) names may change in place, so clients must revalidate
+REVALIDATE = "public, no-cache"
+
+GENERIC = "application/octet-stream"
+
+mimetypes.add_type("image/webp", ".webp")
+
+
+def _media_type(full_path: str) -> str:
+    guessed, _ = mimetypes.guess_type(full_path)
+    if guessed and guessed != GENERIC:
+        return guessed
+    # Legacy profile_{userId}.bin uploads: trust the bytes, not the extension
+    with open(full_path, "rb") as fh:
+        return sniff(fh.read(SNIFF_BYTES)) or GENERIC
+
+
+class ImmutableStaticFiles(StaticFiles):
+    """StaticFiles for content-addressed uploads.
+
+    A content-hashed file name never changes content, so its digest is a strong
+    ETag and the response may be cached forever; conditional requests get a 304.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        # Media type per (path, mtime), so legacy files are sniffed once, not per request
+        self._media_types = LRUCache(maxsize=4096)
+
+    def lookup_path(self, path: str) -> tuple[str, os.stat_result | None]:
+        # Starlette runs lookup_path in a worker thread: do the blocking sniff here, off the event loop
+        full_path, stat_result = super().lookup_path(path)
+        if stat_result is not None and stat.S_ISREG(stat_result.st_mode):
+            key = f"{full_path}:{stat_result.st_mtime_ns}"
+            if key not in self._media_types:
+                try:
+                    self._media_types.set(key, _media_type(full_path))
+                except OSError:
+                    pass
+        return full_path, stat_result
+
+    def file_response(self, full_path: os.PathLike, stat_result: os.stat_result, scope: Scope, status_code: int = 200) -> Response:
+        request_headers = Headers(scope=scope)
+        path = os.fspath(full_path)
+        media_type = self._media_types.get(f"{path}:{stat_result.st_mtime_ns}") or mimetypes.guess_type(path)[0] or GENERIC
+        response = FileResponse(path, status_code=status_code, stat_result=stat_result, media_type=media_type)
+        match = HASHED_NAME.match(os.path.basename(path))
+        if match:
+            response.headers["etag"] = f'"{match.group(1)}"'
+            response.headers["cache-control"] = IMMUTABLE
+        else:
+            response.headers["cache-control"] = REVALIDATE
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
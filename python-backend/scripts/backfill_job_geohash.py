@@ -0,0 +1,55 @@
+"""One-off backfill of the denormalised geo fields (`geo`, `geohash`, `area`) on existing jobs.
+
+New jobs get them from JobsRepo.create. Until this has run, older jobs are
+missing from geohash-prefix queries and from `area` filtering.
+
+    python scripts/backfill_job_geohash.py [--dry-run]
+"""
+from __future__ import annotations
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.firebase import get_db  # noqa: E402
+from app.services.geo import geo_fields  # noqa: E402
+from app.services.repos import now_ts  # noqa: E402
+
+BATCH_SIZE = 400
+
+
+def main(dry_run: bool) -> None:
+    db = get_db()
+    if db is None:
+        raise SystemExit("Firebase unavailable")
+    batch = db.batch()
+    pending = updated = unlocated = scanned = 0
+    for doc in db.collection("jobs").select(["location", "geohash", "area"]).stream():
+        scanned += 1
+        data = doc.to_dict() or {}
+        fields = geo_fields(data)
+        if not fields:
+            unlocated += 1
+            continue
+        if data.get("geohash") == fields["geohash"] and data.get("area") == fields["area"]:
+            continue
+        updated += 1
+        if dry_run:
+            continue
+        # updatedAt moves too, so running servers pick the change up on their next index sync
+        batch.update(doc.reference, fields | {"updatedAt": now_ts()})
+        pending += 1
+        if pending >= BATCH_SIZE:
+            batch.commit()
+            batch = db.batch()
+            pending = 0
+    if pending:
+        batch.commit()
+    print(f"scanned={scanned} updated={updated} unlocated={unlocated} dry_run={dry_run}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true")
+    main(parser.parse_args().dry_run)
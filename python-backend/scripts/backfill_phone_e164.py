@@ -0,0 +1,56 @@
+"""One-off backfill of the canonical `phoneE164` field on existing users.
+
+Streams the users collection and writes phoneE164 in batches, skipping users
+whose value is already correct. Once it has run, set
+PHONE_LOOKUP_LEGACY_FALLBACK=false so that login does exactly one indexed lookup.
+
+    python scripts/backfill_phone_e164.py [--dry-run]
+"""
+from __future__ import annotations
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.firebase import get_db  # noqa: E402
+from app.utils.phone import to_e164  # noqa: E402
+
+BATCH_SIZE = 400
+
+
+def main(dry_run: bool) -> None:
+    db = get_db()
+    if db is None:
+        raise SystemExit("Firebase unavailable")
+    batch = db.batch()
+    pending = updated = unparseable = scanned = 0
+    for doc in db.collection("users").select(["phoneNumber", "phoneE164"]).stream():
+        scanned += 1
+        data = doc.to_dict() or {}
+        if not data.get("phoneNumber"):
+            continue
+        canonical = to_e164(data["phoneNumber"])
+        if canonical is None:
+            unparseable += 1
+            continue
+        if data.get("phoneE164") == canonical:
+            continue
+        updated += 1
+        if dry_run:
+            continue
+        batch.update(doc.reference, {"phoneE164": canonical})
+        pending += 1
+        if pending >= BATCH_SIZE:
+            batch.commit()
+            batch = db.batch()
+            pending = 0
+    if pending:
+        batch.commit()
+    print(f"scanned={scanned} updated={updated} unparseable={unparseable} dry_run={dry_run}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true")
+    main(parser.parse_args().dry_run)
@@ -0,0 +1,42 @@
+"""One-off backfill of user_counters for users created before counters existed.
+
+Counts each user's transactions, savings goals and chat entries with server-side
+count aggregations and writes the totals, so list endpoints report correct
+totals without scanning history.
+
+    python scripts/backfill_user_counters.py
+"""
+from __future__ import annotations
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.firebase import get_db  # noqa: E402
+from app.services.repos import CountersRepo, now_ts  # noqa: E402
+
+
+COUNTED = {
+    "transactions": "transactions",
+    "savingsGoals": "savings_goals",
+    "chatEntries": "chat_history",
+}
+
+
+def main() -> None:
+    db = get_db()
+    if db is None:
+        raise SystemExit("Firebase unavailable")
+    done = 0
+    for user in db.collection("users").select([]).stream():
+        counts = {
+            field: int(db.collection(name).where("userId", "==", user.id).count().get()[0][0].value)
+            for field, name in COUNTED.items()
+        }
+        CountersRepo.ref(user.id).set(counts | {"updatedAt": now_ts()}, merge=True)
+        done += 1
+    print(f"backfilled counters for {done} users")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Benchmark the heatmap aggregation engine over a synthetic job set.
+
+    python scripts/bench_heatmap.py --jobs 100000
+"""
+from __future__ import annotations
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.heatmap import CATEGORY_NAMES, KENYA_AREAS, JobColumns, build_job_heatmap  # noqa: E402
+
+
+def synthetic_jobs(n: int, seed: int = 7) -> list[dict]:
+    rng = random.Random(seed)
+    areas = list(KENYA_AREAS.values())
+    now = datetime.utcnow()
+    jobs = []
+    for i in range(n):
+        centre = rng.choice(areas)['coordinates']
+        location = {'city': 'Nairobi', 'address': ''}
+        if rng.random() < 0.9:
+            location['coordinates'] = {
+                'latitude': centre['latitude'] + rng.gauss(0, 0.05),
+                'longitude': centre['longitude'] + rng.gauss(0, 0.05),
+            }
+        jobs.append({
+            'id': f'job_{i}',
+            'category': rng.choice(CATEGORY_NAMES),
+            'priceKes': round(rng.lognormvariate(6.5, 0.8), 2),
+            'location': location,
+            'status': 'active',
+            'createdAt': now - timedelta(minutes=rng.randrange(60 * 24 * 30)),
+        })
+    return jobs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    jobs = synthetic_jobs(args.jobs)
+
+    started = time.perf_counter()
+    cols = JobColumns.from_jobs(jobs)
+    load = time.perf_counter() - started
+
+    timings = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        result = build_job_heatmap(cols)
+        timings.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    build_job_heatmap(jobs)
+    end_to_end = time.perf_counter() - started
+
+    print(f"jobs={args.jobs} cells={len(result['heatmap']['points'])}")
+    print(f"column load: {load * 1000:.1f} ms")
+    print(f"aggregate:   best {min(timings) * 1000:.1f} ms over {args.repeat} runs")
+    print(f"end to end:  {end_to_end * 1000:.1f} ms")
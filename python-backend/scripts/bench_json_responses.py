@@ -0,0 +1,100 @@
+"""Micro-benchmark response rendering and compression on representative payloads.
+
+Compares FastAPI's jsonable_encoder + stdlib json against the orjson renderer, then
+each available encoding at its per-request and precompressed levels.
+
+    python scripts/bench_json_responses.py --points 5000 --repeat 20
+"""
+from __future__ import annotations
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from app.utils import compression  # noqa: E402
+from app.utils.responses import ORJSONResponse, dumps  # noqa: E402
+
+
+class Timestamp(datetime):
+    """Stands in for Firestore's DatetimeWithNanoseconds, which is a datetime subclass."""
+
+
+def heatmap_payload(rng: random.Random, n: int) -> dict:
+    points = [
+        {
+            "id": f"job_{i}",
+            "coordinates": {"latitude": -1.28 + rng.gauss(0, 0.05), "longitude": 36.82 + rng.gauss(0, 0.05)},
+            "intensity": rng.random(),
+            "category": rng.choice(["Cleaning", "Delivery", "Plumbing", "Tutoring"]),
+            "priceKes": round(rng.lognormvariate(6.5, 0.8), 2),
+        }
+        for i in range(n)
+    ]
+    return {"success": True, "data": {"heatmap": {"points": points}, "generatedAt": datetime.utcnow().isoformat()}}
+
+
+def transactions_payload(rng: random.Random, n: int) -> dict:
+    now = datetime.now(timezone.utc)
+    items = [
+        {
+            "id": f"tx_{i}",
+            "type": rng.choice(["deposit", "withdrawal", "transfer_in", "transfer_out"]),
+            "amount": round(rng.uniform(10, 5000), 2),
+            "currency": "KES",
+            "status": "completed",
+            "description": "M-Pesa payment",
+            "createdAt": Timestamp.fromtimestamp((now - timedelta(minutes=i * 7)).timestamp(), timezone.utc),
+        }
+        for i in range(n)
+    ]
+    return {"success": True, "data": {"transactions": items, "pagination": {"page": 1, "limit": n, "total": 5000, "nextCursor": "abc", "hasMore": True}}}
+
+
+def leaderboard_payload(rng: random.Random, n: int) -> dict:
+    entries = [{"rank": i + 1, "userId": f"user_{rng.getrandbits(64):016x}", "score": float(100000 - i * 37)} for i in range(n)]
+    return {"success": True, "data": {"leaderboard": entries, "myRank": 42, "myScore": 98446.0}}
+
+
+def best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    rng = random.Random(7)
+    payloads = {
+        "heatmap": heatmap_payload(rng, args.points),
+        "transactions": transactions_payload(rng, 100),
+        "leaderboard": leaderboard_payload(rng, 100),
+    }
+
+    for name, payload in payloads.items():
+        stdlib = best_of(lambda: JSONResponse(jsonable_encoder(payload)).body, args.repeat)
+        encoded = best_of(lambda: ORJSONResponse(jsonable_encoder(payload)).body, args.repeat)
+        direct = best_of(lambda: ORJSONResponse(payload).body, args.repeat)
+        body = dumps(payload)
+        # Same document either way; only the bytes' formatting may differ
+        assert ORJSONResponse(payload).body == dumps(jsonable_encoder(payload))
+        print(f"{name}: {len(body) / 1024:.0f} KiB")
+        print(f"  render  stdlib {stdlib:7.2f} ms   orjson+encoder {encoded:7.2f} ms   orjson direct {direct:7.2f} ms")
+        for encoding in compression.available():
+            for precompressed in (False, True):
+                level = compression.LEVELS[encoding][precompressed]
+                ms = best_of(lambda: compression.compress(encoding, body, precompressed), max(3, args.repeat // 4))
+                size = len(compression.compress(encoding, body, precompressed))
+                kind = "cached" if precompressed else "dynamic"
+                print(f"  {encoding:<4} {kind:<7} level {level:>2}: {ms:7.2f} ms  {size / 1024:6.1f} KiB ({size / len(body):.1%})")
@@ -0,0 +1,71 @@
+"""Load benchmark for GET /api/user/profile.
+
+Run the API against the Firestore emulator, then point this script at it:
+
+    gcloud emulators firestore start --host-port=localhost:8080
+    FIRESTORE_EMULATOR_HOST=localhost:8080 GOOGLE_CLOUD_PROJECT=demo-jashoo \
+        uvicorn app.main:app --port 3000
+    python scripts/bench_profile_latency.py --concurrency 50 --requests 2000
+
+A throwaway user is registered first and its token is reused for every call.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+import httpx
+
+
+async def _register(client: httpx.AsyncClient) -> str:
+    suffix = uuid.uuid4().hex[:10]
+    resp = await client.post("/api/auth/register", json={
+        "email": f"bench_{suffix}@example.com",
+        "password": "bench-password",
+        "fullName": "Bench User",
+        "phoneNumber": f"+2547{int(suffix, 16) % 10**8:08d}",
+        "location": "Nairobi",
+    })
+    resp.raise_for_status()
+    return resp.json()["data"]["token"]
+
+
+async def _worker(client: httpx.AsyncClient, headers: dict, remaining: list[int], latencies: list[float], errors: list[int]) -> None:
+    while remaining[0] > 0:
+        remaining[0] -= 1
+        started = time.perf_counter()
+        resp = await client.get("/api/user/profile", headers=headers)
+        latencies.append((time.perf_counter() - started) * 1000)
+        if resp.status_code != 200:
+            errors.append(resp.status_code)
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[idx]
+
+
+async def main(base_url: str, concurrency: int, total: int) -> None:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        headers = {"Authorization": f"Bearer {await _register(client)}"}
+        latencies: list[float] = []
+        errors: list[int] = []
+        remaining = [total]
+        started = time.perf_counter()
+        await asyncio.gather(*(_worker(client, headers, remaining, latencies, errors) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    print(f"requests={len(latencies)} concurrency={concurrency} errors={len(errors)} elapsed={elapsed:.2f}s rps={len(latencies) / elapsed:.1f}")
+    print(f"p50={_percentile(latencies, 50):.1f}ms p95={_percentile(latencies, 95):.1f}ms p99={_percentile(latencies, 99):.1f}ms mean={statistics.mean(latencies):.1f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:3000")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(main(args.base_url, args.concurrency, args.requests))
@@ -0,0 +1,44 @@
+"""Micro-benchmark: raw jose JWT decode vs the verified-token cache in get_current_user.
+
+    python scripts/bench_token_decode.py --iterations 50000 --tokens 100
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from jose import jwt  # noqa: E402
+from app.config import settings  # noqa: E402
+from app.middleware.auth import get_current_user  # noqa: E402
+from app.routers.auth import issue_token  # noqa: E402
+
+
+def _raw(tokens: list[str], iterations: int) -> float:
+    started = time.perf_counter()
+    for i in range(iterations):
+        jwt.decode(tokens[i % len(tokens)], settings.jwt_secret, algorithms=[settings.jwt_algorithm])
+    return time.perf_counter() - started
+
+
+async def _cached(tokens: list[str], iterations: int) -> float:
+    headers = [f"Bearer {t}" for t in tokens]
+    started = time.perf_counter()
+    for i in range(iterations):
+        await get_current_user(headers[i % len(headers)])
+    return time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=50000)
+    parser.add_argument("--tokens", type=int, default=100)
+    args = parser.parse_args()
+    tokens = [issue_token(f"user_bench_{i}") for i in range(args.tokens)]
+    raw = _raw(tokens, args.iterations)
+    cached = asyncio.run(_cached(tokens, args.iterations))
+    print(f"jose decode:  {args.iterations / raw:,.0f} decodes/s")
+    print(f"cached auth:  {args.iterations / cached:,.0f} requests/s ({raw / cached:.1f}x)")
@@ -0,0 +1,92 @@
+"""Check the columnar wallet analytics against the per-row helpers and time both.
+
+Times the route's own `limit` (50 by default, at most 500); settings.columnar_analytics_min_rows
+is the smallest size where the columnar path wins at both.
+
+    python scripts/bench_wallet_analytics.py --sizes 1000 2000 5000 100000 --limit 500
+"""
+from __future__ import annotations
+import argparse
+import math
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.routers.wallet import _analyze_columnar, _analyze_transactions, _filter_and_normalize_transactions  # noqa: E402
+
+TYPES = ["deposit", "withdraw", "transfer_in", "transfer_out", "payment", "bill", "refund", "convert_in", "topup", "cashout", None]
+STATUSES = ["completed", "success", "pending", "failed", "OK"]
+CATEGORIES = ["food", "Transport", "rent", "airtime", "", None]
+
+
+def synthetic_transactions(n: int, seed: int = 11) -> list[dict]:
+    rng = random.Random(seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    txs = []
+    for i in range(n):
+        when = now - timedelta(seconds=rng.randrange(60 * 60 * 24 * 60))
+        form = rng.random()
+        if form < 0.5:
+            date = when
+        elif form < 0.8:
+            date = when.isoformat()
+        else:
+            date = {"_seconds": int((when - datetime(1970, 1, 1)).total_seconds()), "_nanoseconds": 0}
+        txs.append({
+            "id": f"TXN{i}",
+            "type": rng.choice(TYPES),
+            "amount": round(rng.lognormvariate(6, 1.2), 2) if rng.random() > 0.01 else "n/a",
+            "currencyCode": rng.choice(["KES", "KES", "KES", "USDT", "USDC", None]),
+            "date": date,
+            "status": rng.choice(STATUSES),
+            "category": rng.choice(CATEGORIES),
+            "method": "mpesa",
+        })
+    return txs
+
+
+def assert_equivalent(rowwise: dict, columnar: dict) -> None:
+    assert rowwise["totalTransactions"] == columnar["totalTransactions"]
+    assert math.isclose(rowwise["successRate"], columnar["successRate"])
+    assert rowwise["lastActivity"] == columnar["lastActivity"]
+    assert rowwise["totalsByCurrency"].keys() == columnar["totalsByCurrency"].keys()
+    for cur, bucket in rowwise["totalsByCurrency"].items():
+        for key, value in bucket.items():
+            assert math.isclose(value, columnar["totalsByCurrency"][cur][key], rel_tol=1e-9, abs_tol=1e-6), (cur, key)
+    averages = {a["currencyCode"]: a["averageAmount"] for a in columnar["averagesByCurrency"]}
+    for avg in rowwise["averagesByCurrency"]:
+        assert math.isclose(avg.averageAmount, averages[avg.currencyCode], rel_tol=1e-9)
+    assert [(c.category, c.count) for c in rowwise["categoryCounts"]] == [(c["category"], c["count"]) for c in columnar["categoryCounts"]]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 1_000, 2_000, 5_000, 10_000, 100_000])
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--limit", type=int, default=50, help="rows kept, as the analytics route's `limit`")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for n in args.sizes:
+        txs = synthetic_transactions(n)
+        end_at = datetime.utcnow()
+        start_at = end_at - timedelta(days=args.days)
+
+        rowwise_s = columnar_s = math.inf
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            recent = _filter_and_normalize_transactions(txs, start_at, end_at, args.limit)
+            rowwise = _analyze_transactions(recent)
+            rowwise_s = min(rowwise_s, time.perf_counter() - started)
+
+            started = time.perf_counter()
+            recent_cols, columnar = _analyze_columnar(txs, start_at, end_at, args.limit)
+            columnar_s = min(columnar_s, time.perf_counter() - started)
+
+        assert_equivalent(rowwise, columnar)
+        assert [t.date for t in recent] == [t.date for t in recent_cols]
+        print(f"n={n:>9} window={rowwise['totalTransactions']:>9} rowwise {rowwise_s * 1000:9.1f} ms  columnar {columnar_s * 1000:9.1f} ms  x{rowwise_s / columnar_s:.1f}")
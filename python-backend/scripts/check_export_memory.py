@@ -0,0 +1,80 @@
+"""Stream a large synthetic statement through the export body and check RSS stays flat.
+
+    python scripts/check_export_memory.py --rows 500000 --format csv --budget-mb 64
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import random
+import resource
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.routers.wallet import _export_body  # noqa: E402
+from app.services.async_repos import shutdown_executor  # noqa: E402
+
+
+def synthetic_chunks(rows: int, chunk_size: int, seed: int = 5):
+    """Stands in for TransactionsRepo.iter_chunks: rows are generated lazily, one chunk at a time."""
+    rng = random.Random(seed)
+    ts = datetime.utcnow()
+    for offset in range(0, rows, chunk_size):
+        chunk = []
+        for i in range(offset, min(offset + chunk_size, rows)):
+            ts -= timedelta(seconds=rng.randrange(1, 600))
+            chunk.append({
+                "transactionId": f"TXN{i:012d}",
+                "userId": "user_export_check",
+                "initiatedAt": ts,
+                "type": rng.choice(["deposit", "withdraw", "transfer_out", "payment"]),
+                "status": "completed",
+                "amount": round(rng.lognormvariate(6, 1.1), 2),
+                "currencyCode": "KES",
+                "category": rng.choice(["food", "rent", "transport", None]),
+                "method": "mpesa",
+                "description": "Synthetic statement row, with a comma",
+                "reference": f"REF{rng.randrange(10**8):08d}",
+            })
+        yield chunk
+
+
+def max_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def drain(rows: int, fmt: str, chunk_size: int) -> tuple[int, int, float]:
+    total_bytes = 0
+    parts = 0
+    baseline = None
+    async for part in _export_body(synthetic_chunks(rows, chunk_size), fmt):
+        total_bytes += len(part)
+        parts += 1
+        if parts == 2:
+            baseline = max_rss_mb()
+    return total_bytes, parts, baseline or max_rss_mb()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--format", choices=["csv", "ndjson"], default="csv")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--budget-mb", type=float, default=64.0)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    total_bytes, parts, baseline = asyncio.run(drain(args.rows, args.format, args.chunk_size))
+    elapsed = time.perf_counter() - started
+    shutdown_executor()
+
+    growth = max_rss_mb() - baseline
+    print(f"rows={args.rows} format={args.format} parts={parts} bytes={total_bytes / 2**20:.1f} MiB in {elapsed:.1f}s")
+    print(f"max RSS growth after first chunk: {growth:.1f} MiB (budget {args.budget_mb:.0f} MiB)")
+    if growth > args.budget_mb:
+        sys.exit("FAIL: export memory grew with history size")
+    print("OK")
@@ -0,0 +1,97 @@
+"""Replay a synthetic job stream through the trend engine: window sums against a brute-force
+count, a planted spike must rank first, a multi-day surge must rank first over a week's
+window, and a snapshot must restore the same ranking.
+
+    python scripts/check_trends.py --days 14 --rate 40
+"""
+from __future__ import annotations
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.heatmap import AREA_NAMES, JOB_CATEGORIES  # noqa: E402
+from app.services.trends import TrendEngine  # noqa: E402
+
+
+def background(rng: random.Random, start: float, end: float, rate: float) -> list[tuple[str, str, float]]:
+    categories, areas = list(JOB_CATEGORIES), list(AREA_NAMES)
+    events = []
+    t = start
+    while t < end:
+        t += rng.expovariate(rate / 3600)
+        events.append((rng.choice(categories), rng.choice(areas), t))
+    return events
+
+
+def check_surge(rng: random.Random, days: int, rate: float) -> None:
+    """One key at ~4x its base rate for the last three days must lead a 168-hour window."""
+    engine = TrendEngine(bucket_seconds=3600, buckets=336, half_life_buckets=72)
+    surge = (list(JOB_CATEGORIES)[1], list(AREA_NAMES)[1])
+    end = time.time()
+    events = background(rng, end - days * 86400, end, rate)
+    per_key = rate / (len(JOB_CATEGORIES) * len(AREA_NAMES))
+    t = end - 3 * 86400
+    while t < end:
+        t += rng.expovariate(3 * per_key / 3600)
+        events.append((*surge, t))
+    events.sort(key=lambda e: e[2])
+    for category, area, ts in events:
+        engine.observe(category, area, ts)
+    hotspots = engine.top("hotspots", 5, 168, now=end)
+    assert (hotspots[0]["category"], hotspots[0]["area"]) == surge, hotspots
+    print("week window:", [(r["category"], r["area"], r["jobs"], r["expected"], r["zScore"]) for r in hotspots[:3]])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=14)
+    parser.add_argument("--rate", type=float, default=40.0, help="background jobs per hour")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    engine = TrendEngine(bucket_seconds=3600, buckets=336, half_life_buckets=72)
+    spike = (list(JOB_CATEGORIES)[0], list(AREA_NAMES)[0])
+    end = time.time()
+    events = background(rng, end - args.days * 86400, end, args.rate)
+    # Planted surge over the last six hours, well above the per-key background
+    events += [(*spike, end - rng.uniform(0, 6 * 3600)) for _ in range(60)]
+    events.sort(key=lambda e: e[2])
+
+    started = time.perf_counter()
+    for category, area, ts in events:
+        engine.observe(category, area, ts)
+    elapsed = time.perf_counter() - started
+    print(f"{len(events)} events in {elapsed * 1000:.0f} ms ({elapsed / len(events) * 1e6:.1f} us/event), {len(engine)} counters")
+
+    window = 24
+    first_bucket = int(end // 3600) - window + 1
+    expected = sum(1 for c, a, ts in events if (c, a) == spike and int(ts // 3600) >= first_bucket)
+    hotspots = engine.top("hotspots", 5, window, now=end)
+    found = next(r for r in hotspots if (r["category"], r["area"]) == spike)
+    assert found["jobs"] == expected, (found, expected)
+    assert (hotspots[0]["category"], hotspots[0]["area"]) == spike, hotspots[0]
+    print("top hotspots:", [(r["category"], r["area"], r["jobs"], r["zScore"]) for r in hotspots])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "trends.pickle"
+        engine.save_snapshot(path)
+        restored = TrendEngine(bucket_seconds=3600, buckets=336, half_life_buckets=72)
+        assert restored.load_snapshot(path)
+        assert restored.top("hotspots", 5, window, now=end) == hotspots
+        # Replaying the stream after a restore must not double count
+        for category, area, ts in events:
+            restored.observe(category, area, ts)
+        assert restored.top("hotspots", 5, window, now=end) == hotspots
+
+    check_surge(rng, args.days, args.rate)
+    print("ok")
+
+
+if __name__ == "__main__":
+    main()
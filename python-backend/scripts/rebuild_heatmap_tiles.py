@@ -0,0 +1,53 @@
+"""Rebuild heatmap_tiles from the jobs collection.
+
+Needed once for jobs written before tiles existed, or after a manual data fix.
+Streams every job once, folds it into per (day, area, category) tiles in memory
+(memory grows with the number of tiles, not jobs) and replaces the stored tiles.
+
+    python scripts/rebuild_heatmap_tiles.py [--dry-run]
+"""
+from __future__ import annotations
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.firebase import get_db  # noqa: E402
+from app.services.repos import HeatmapTilesRepo, now_ts  # noqa: E402
+from app.services.tiles import deltas_for_change, merge_delta  # noqa: E402
+
+
+def main(dry_run: bool) -> None:
+    db = get_db()
+    if db is None:
+        raise SystemExit("Firebase unavailable")
+    tiles: dict[str, dict] = {}
+    scanned = 0
+    fields = ["status", "category", "priceKes", "location", "geo", "area", "createdAt", "completedAt"]
+    for doc in db.collection("jobs").select(fields).stream():
+        scanned += 1
+        for doc_id, delta in deltas_for_change(None, doc.to_dict() or {}):
+            merge_delta(tiles.setdefault(doc_id, {}), delta)
+    print(f"scanned={scanned} tiles={len(tiles)} dry_run={dry_run}")
+    if dry_run:
+        return
+
+    writer = db.bulk_writer()
+    stale = 0
+    for doc in HeatmapTilesRepo.col().select([]).stream():
+        if doc.id not in tiles:
+            writer.delete(doc.reference)
+            stale += 1
+    updated_at = now_ts()
+    for doc_id, tile in tiles.items():
+        # updatedAt moves, so running servers reload every tile on their next sync
+        writer.set(HeatmapTilesRepo.col().document(doc_id), tile | {"updatedAt": updated_at})
+    writer.close()
+    print(f"wrote {len(tiles)} tiles, deleted {stale} stale")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true")
+    main(parser.parse_args().dry_run)
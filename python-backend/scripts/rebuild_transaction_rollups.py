@@ -0,0 +1,75 @@
+"""Rebuild transaction_rollups from the transactions collection.
+
+Needed once for history written before rollups existed, or after a manual data
+fix. Streams every transaction, sums them per (user, day) in memory and
+overwrites the rollup documents.
+
+    python scripts/rebuild_transaction_rollups.py
+"""
+from __future__ import annotations
+import sys
+from collections import defaultdict
+from datetime import timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.firebase import get_db  # noqa: E402
+from app.services.repos import RollupsRepo  # noqa: E402
+from app.services.rollups import SUCCESS_STATUSES, as_datetime, rollup_id, tx_direction  # noqa: E402
+
+BATCH_SIZE = 400
+
+
+def _empty(user_id: str, day: str) -> dict:
+    return {"userId": user_id, "date": day, "currencies": {}, "categories": defaultdict(int), "totalCount": 0, "successCount": 0, "lastActivityTs": None}
+
+
+def main() -> None:
+    db = get_db()
+    if db is None:
+        raise SystemExit("Firebase unavailable")
+    rollups: dict[str, dict] = {}
+    fields = ["userId", "amount", "currencyCode", "type", "status", "category", "initiatedAt", "createdAt"]
+    for doc in db.collection("transactions").select(fields).stream():
+        txn = doc.to_dict() or {}
+        ts = as_datetime(txn.get("initiatedAt")) or as_datetime(txn.get("createdAt"))
+        if not txn.get("userId") or ts is None:
+            continue
+        key = rollup_id(txn["userId"], ts.date())
+        r = rollups.setdefault(key, _empty(txn["userId"], ts.strftime("%Y-%m-%d")))
+        try:
+            amount = float(txn.get("amount") or 0)
+        except (TypeError, ValueError):
+            amount = 0.0
+        bucket = r["currencies"].setdefault(str(txn.get("currencyCode") or "KES").upper(), {"inflow": 0.0, "outflow": 0.0, "net": 0.0, "count": 0, "amountSum": 0.0})
+        direction = tx_direction(txn.get("type"))
+        if direction == "in":
+            bucket["inflow"] += amount
+            bucket["net"] += amount
+        elif direction == "out":
+            bucket["outflow"] += amount
+            bucket["net"] -= amount
+        bucket["count"] += 1
+        bucket["amountSum"] += abs(amount)
+        r["categories"][str(txn.get("category") or "uncategorized").lower()] += 1
+        r["totalCount"] += 1
+        r["successCount"] += str(txn.get("status") or "").lower() in SUCCESS_STATUSES
+        epoch = ts.replace(tzinfo=timezone.utc).timestamp()
+        if r["lastActivityTs"] is None or epoch > r["lastActivityTs"]:
+            r["lastActivityTs"] = epoch
+
+    batch, pending = db.batch(), 0
+    for key, r in rollups.items():
+        batch.set(RollupsRepo.col().document(key), r | {"categories": dict(r["categories"])})
+        pending += 1
+        if pending >= BATCH_SIZE:
+            batch.commit()
+            batch, pending = db.batch(), 0
+    if pending:
+        batch.commit()
+    print(f"rebuilt {len(rollups)} daily rollups")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Nightly bulk credit-score recalculation.
+
+Streams credit_scores in id-ordered chunks, scores each chunk as NumPy arrays
+and bulk-writes only the scores that changed.
+
+    python scripts/recalculate_credit_scores.py [--chunk-size 5000] [--dry-run]
+    python scripts/recalculate_credit_scores.py --synthetic 1000000   # scoring throughput only, no Firestore
+"""
+from __future__ import annotations
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np  # noqa: E402
+from app.services import credit_scoring  # noqa: E402
+from app.services.firebase import get_db  # noqa: E402
+
+
+def _synthetic(n: int) -> None:
+    rng = np.random.default_rng(11)
+    features = {
+        'monthlyIncome': rng.lognormal(10, 0.8, n),
+        'monthlyExpenses': rng.lognormal(9.8, 0.8, n),
+        'savingsRate': rng.uniform(0, 40, n),
+        'debtToIncomeRatio': rng.uniform(0, 0.8, n),
+        'employmentStability': rng.uniform(0, 100, n),
+        'gigWorkConsistency': rng.uniform(0, 100, n),
+        'onTimePayments': rng.integers(0, 40, n).astype(float),
+        'latePayments': rng.integers(0, 6, n).astype(float),
+        'missedPayments': rng.integers(0, 3, n).astype(float),
+    }
+    started = time.perf_counter()
+    scores = credit_scoring.score(features)
+    elapsed = time.perf_counter() - started
+    print(f"scored {n:,} users in {elapsed * 1000:.0f} ms (mean={scores.mean():.0f}, min={scores.min()}, max={scores.max()})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--synthetic", type=int, default=0)
+    args = parser.parse_args()
+    if args.synthetic:
+        _synthetic(args.synthetic)
+        return
+    db = get_db()
+    if db is None:
+        raise SystemExit("Firebase unavailable")
+    started = time.perf_counter()
+    done = credit_scoring.recalculate_all(db, chunk_size=args.chunk_size, dry_run=args.dry_run,
+                                          progress=lambda n: print(f"  scored {n:,}", flush=True))
+    print(f"recalculated {done:,} credit scores in {time.perf_counter() - started:.1f}s (dry_run={args.dry_run})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Concurrency stress test for the wallet balance engine (run against the Firestore emulator).
+
+    gcloud emulators firestore start --host-port=localhost:8080
+    FIRESTORE_EMULATOR_HOST=localhost:8080 GOOGLE_CLOUD_PROJECT=demo-jashoo \
+        python scripts/stress_wallet_balance.py --workers 32 --ops 2000
+
+Fires concurrent deposits and withdrawals at one wallet through the
+transactional path, then sharded credits at a second wallet, and exits
+non-zero if the final balances differ from the sum of the applied deltas.
+"""
+from __future__ import annotations
+import argparse
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services import balances  # noqa: E402
+from app.services.repos import WalletsRepo  # noqa: E402
+
+
+def _transactional(workers: int, ops: int) -> bool:
+    user_id = f"stress_{uuid.uuid4().hex[:8]}"
+    WalletsRepo.get_or_create(user_id)
+    balances.apply_delta(user_id, "KES", 10_000)
+
+    def op(i: int) -> float:
+        delta = 7.0 if i % 3 else -5.0
+        try:
+            balances.apply_delta(user_id, "KES", delta)
+            return delta
+        except balances.BalanceError:
+            return 0.0
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        applied = sum(pool.map(op, range(ops)))
+    elapsed = time.perf_counter() - started
+    final = balances.read_balances(user_id)["KES"]
+    expected = 10_000 + applied
+    print(f"transactional: ops={ops} elapsed={elapsed:.2f}s expected={expected} actual={final}")
+    return abs(final - expected) < 1e-6
+
+
+def _sharded(workers: int, ops: int) -> bool:
+    user_id = f"stress_hot_{uuid.uuid4().hex[:8]}"
+    balances.enable_sharding(user_id)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(lambda _: balances.credit(user_id, "KES", 3.0, sharded=True), range(ops)))
+    elapsed = time.perf_counter() - started
+    final = balances.read_balances(user_id)["KES"]
+    print(f"sharded: ops={ops} elapsed={elapsed:.2f}s expected={3.0 * ops} actual={final}")
+    return abs(final - 3.0 * ops) < 1e-6
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--ops", type=int, default=2000)
+    args = parser.parse_args()
+    ok = _transactional(args.workers, args.ops) & _sharded(args.workers, args.ops)
+    sys.exit(0 if ok else 1)